@@ -0,0 +1,95 @@
+import numpy as np
+
+# chances of a severity status of 1, 2 and 3 on admission, for covid positive and covid negative patients
+COVID_STATUS_CHANCES = [0.4, 0.3, 0.3]
+NON_COVID_STATUS_CHANCES = [0.6, 0.3, 0.1]
+COVID_VALUES = np.array(["false", "true"])
+STATUS_VALUES = np.array(["0", "1", "2", "3"])
+
+
+class AdmissionDraws:
+    """
+    AdmissionDraws is the random number generator of one simulation, seeded with seed. It draws whether admitted
+        patients are covid positive and their severity status in batches: every admission uses the next pair of
+        uniform numbers of a block of block_size pairs generated at once by a NumPy Generator, so drawing a day's
+        admissions together or one at a time gives the same patients. It also derives the seed of the random.Random
+        that hands out the patient ids of the simulation (get_id_seed), so two simulations with the same seed admit the
+        same patients with the same ids, even when they run side by side in one process.
+    """
+
+    def __init__(self, seed=None, block_size=4096):
+        admissions_seed, ids_seed = np.random.SeedSequence(seed).spawn(2)
+        self.__generator = np.random.Generator(np.random.PCG64(admissions_seed))
+        self.__id_seed = int(ids_seed.generate_state(1, np.uint64)[0])
+        self.__block_size = block_size
+        self.__block = np.empty((0, 2))  # uniform numbers not used yet: [covid, severity] per admission
+        self.__position = 0
+        # a draw of the covid and severity numbers below these is covid positive / has a status of 1 or at most 2
+        self.__covid_thresholds = np.cumsum(COVID_STATUS_CHANCES)[:2]
+        self.__non_covid_thresholds = np.cumsum(NON_COVID_STATUS_CHANCES)[:2]
+
+    def get_id_seed(self):
+        """
+        get_id_seed returns the seed of the random.Random handing out the patient ids of the simulation
+        :return: int
+        """
+        return self.__id_seed
+
+    def draw(self, count, covid_chance):
+        """
+        draw draws count admissions that are covid positive with the chance covid_chance (anything above 1 means
+            always), and returns whether each is covid positive ("true" or "false") and its severity status
+            ("1" - "3")
+        :param count: int
+        :param covid_chance: float
+        :return: list of [List of str, List of str]
+        """
+        uniforms = self.__take(count)
+        covid = uniforms[:, 0] < covid_chance
+        first = np.where(covid, self.__covid_thresholds[0], self.__non_covid_thresholds[0])
+        second = np.where(covid, self.__covid_thresholds[1], self.__non_covid_thresholds[1])
+        statuses = 1 + (uniforms[:, 1] >= first) + (uniforms[:, 1] >= second)
+        return [COVID_VALUES[covid.astype(np.int8)].tolist(), STATUS_VALUES[statuses].tolist()]
+
+    def get_state(self):
+        """
+        get_state returns the state of the generator and the numbers drawn but not used yet, for a checkpoint (see
+            from_state)
+        :return: dict
+        """
+        return {"generator": self.__generator.bit_generator.state, "id_seed": self.__id_seed,
+                "block_size": self.__block_size, "unused": self.__block[self.__position:].tobytes()}
+
+    @staticmethod
+    def from_state(state):
+        """
+        from_state returns an AdmissionDraws in the state returned by get_state, it draws the same admissions from then
+            on as the one it was taken from
+        :param state: dict
+        :return: AdmissionDraws
+        """
+        draws = AdmissionDraws(block_size=state["block_size"])
+        draws.__generator.bit_generator.state = state["generator"]
+        draws.__id_seed = state["id_seed"]
+        draws.__block = np.frombuffer(state["unused"], dtype=np.float64).reshape(-1, 2).copy()
+        return draws
+
+    def __take(self, count):
+        """
+        __take returns the next count pairs of uniform numbers, generating new blocks as they are used up
+        :param count: int
+        :return: numpy array of float with shape (count, 2)
+        """
+        end = self.__position + count
+        if end <= len(self.__block):
+            taken = self.__block[self.__position:end]
+            self.__position = end
+            return taken
+        parts = [self.__block[self.__position:]]
+        needed = count - len(parts[0])
+        while needed > 0:
+            block = self.__generator.random((self.__block_size, 2))
+            parts.append(block[:needed])
+            needed -= len(parts[-1])
+            self.__block, self.__position = block, len(parts[-1])
+        return np.concatenate(parts)
@@ -0,0 +1,113 @@
+import heapq
+
+
+class BedAvailability:
+    """
+    BedAvailability keeps track of the number of free beds of every hospital in a bucket queue: for every number of
+        free beds there is a heap of the hospitals that currently have that many free beds, ordered by the order the
+        hospitals were added in so ties are always broken in favour of the hospital added first. The hospital with the
+        most free beds, the hospitals with at least k free beds and whether the network is full can then be answered
+        without looking at every hospital.
+    """
+
+    def __init__(self):
+        self.__free_beds = {}  # hospital name -> free beds
+        self.__order = {}  # hospital name -> order the hospital was added in
+        self.__buckets = {}  # free beds -> heap of (order, hospital name)
+        self.__in_bucket = set()  # (free beds, hospital name) entries that are physically in a heap
+        self.__bucket_sizes = {}  # free beds -> number of hospitals with that many free beds
+        self.__most_free = 0
+        self.__open_hospitals = 0  # hospitals with at least one free bed
+
+    def add_hospital(self, name, free_beds):
+        """
+        add_hospital starts tracking the hospital called name, which has free_beds beds available
+        :param name: str
+        :param free_beds: int
+        :return: None
+        """
+        self.__order[name] = len(self.__order)
+        self.__add_to_bucket(name, free_beds)
+
+    def update(self, name, free_beds):
+        """
+        update records that the hospital called name now has free_beds beds available
+        :param name: str
+        :param free_beds: int
+        :return: None
+        """
+        old_free_beds = self.__free_beds[name]
+        if old_free_beds != free_beds:
+            # add before removing, so finding the new most free beds never has to search further down than free_beds
+            self.__add_to_bucket(name, free_beds)
+            self.__remove_from_bucket(name, old_free_beds)
+
+    def most_free(self):
+        """
+        most_free returns the name of the first added hospital with the most free beds, or an empty string if no
+            hospital has a free bed
+        :return: str
+        """
+        if self.__most_free <= 0:
+            return ""
+        heap = self.__buckets[self.__most_free]
+        while self.__free_beds[heap[0][1]] != self.__most_free:
+            self.__in_bucket.discard((self.__most_free, heapq.heappop(heap)[1]))  # drop hospitals that moved on
+        return heap[0][1]
+
+    def with_at_least(self, beds):
+        """
+        with_at_least returns the names of all hospitals with at least beds free beds, in the order they were added
+        :param beds: int
+        :return: List of str
+        """
+        found = []
+        for free_beds in range(self.__most_free, beds - 1, -1):
+            if self.__bucket_sizes.get(free_beds, 0) > 0:
+                found.extend(entry for entry in self.__buckets[free_beds] if self.__free_beds[entry[1]] == free_beds)
+        found.sort()
+        return [name for order, name in found]
+
+    def is_full(self):
+        """
+        is_full returns True if no hospital has a free bed
+        :return: Bool
+        """
+        return self.__open_hospitals == 0
+
+    def __add_to_bucket(self, name, free_beds):
+        """
+        __add_to_bucket puts the hospital called name into the bucket for free_beds
+        :param name: str
+        :param free_beds: int
+        :return: None
+        """
+        self.__free_beds[name] = free_beds
+        self.__bucket_sizes[free_beds] = self.__bucket_sizes.get(free_beds, 0) + 1
+        if (free_beds, name) not in self.__in_bucket:  # an outdated entry may still be in the heap, reuse it
+            heapq.heappush(self.__buckets.setdefault(free_beds, []), (self.__order[name], name))
+            self.__in_bucket.add((free_beds, name))
+        if free_beds > 0:
+            self.__open_hospitals += 1
+        if free_beds > self.__most_free:
+            self.__most_free = free_beds
+
+    def __remove_from_bucket(self, name, free_beds):
+        """
+        __remove_from_bucket takes the hospital called name out of the bucket for free_beds, the number of free beds it
+            had before. Its heap entry is left behind and skipped when it is read, unless the bucket is now empty: then
+            the bucket is dropped with every entry left in it, so the buckets of free bed counts that no hospital has
+            any more do not pile up as the hospitals fill.
+        :param name: str
+        :param free_beds: int
+        :return: None
+        """
+        self.__bucket_sizes[free_beds] -= 1
+        if self.__bucket_sizes[free_beds] == 0:
+            del self.__bucket_sizes[free_beds]
+            for _, entry_name in self.__buckets.pop(free_beds, []):
+                self.__in_bucket.discard((free_beds, entry_name))
+        if free_beds > 0:
+            self.__open_hospitals -= 1
+        while self.__most_free > 0 and self.__bucket_sizes.get(self.__most_free, 0) == 0:
+            self.__most_free -= 1
@@ -0,0 +1,99 @@
+"""
+Benchmark for drawing the admissions of a simulation. First times drawing ADMISSIONS admissions (covid status and
+severity status) one at a time with random.choices from the global random module, as a simulation without a seed
+does, against drawing them a day at a time from the AdmissionDraws of a seeded simulation, for days of 10 to 10,000
+admissions. Then runs an admission-heavy simulation (HOSPITALS hospitals that each admit a patient every day) for DAYS
+days with and without a seed.
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission_draws import AdmissionDraws
+from hospital_network import HospitalNetwork
+from journal import OperationJournal
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from simulate_data import SimulateData
+
+ADMISSIONS = 10 ** 6
+DAY_SIZES = [10, 100, 1000, 10000]
+HOSPITALS = 2000
+BEDS = 20
+DAYS = 30
+
+
+def draw_global(count, covid_chance):
+    """
+    draw_global draws count admissions one at a time from the global random module, the way SimulateData does
+        without a seed
+    :param count: int
+    :param covid_chance: float
+    :return: None
+    """
+    for _ in range(count):
+        has_covid = random.choices(['true', 'false'], [covid_chance, 1 - covid_chance])[0]
+        if has_covid == 'true':
+            random.choices(['1', '2', '3'], [0.4, 0.3, 0.3])
+        else:
+            random.choices(['1', '2', '3'], [0.6, 0.3, 0.1])
+
+
+def time_simulation(engine, seed):
+    """
+    time_simulation returns the time of simulating DAYS days of HOSPITALS hospitals that each admit a patient every
+        day, with the admissions drawn from the generator of the simulation if seed is given
+    :param engine: str
+    :param seed: int or None
+    :return: float
+    """
+    random.seed(1)
+    network = HospitalNetwork([("Hospital {}".format(i), BEDS, 1) for i in range(HOSPITALS)])
+    rng = random.Random(seed) if seed is not None else random
+    system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=6, letters=1, rng=rng),
+                                     hospitals=network.make_hospitals(),
+                                     storage=OperationJournal(compact_every=10 ** 7))
+    simulation = SimulateData(engine=engine, system=system, network=network, save_snapshots=False, seed=seed)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # the simulation reports every day
+        simulation.start_simulation(DAYS)
+    return time.perf_counter() - start
+
+
+def main():
+    random.seed(1)
+    start = time.perf_counter()
+    draw_global(ADMISSIONS, 0.3)
+    global_time = time.perf_counter() - start
+    print("drawing {} admissions".format(ADMISSIONS))
+    print("{:>16} {:>14} {:>14} {:>10}".format("admissions/day", "global (s)", "batched (s)", "speedup"))
+    for day_size in DAY_SIZES:
+        draws = AdmissionDraws(seed=1)
+        start = time.perf_counter()
+        for _ in range(ADMISSIONS // day_size):
+            draws.draw(day_size, 0.3)
+        batched_time = time.perf_counter() - start
+        print("{:>16} {:>14.3f} {:>14.3f} {:>9.1f}x".format(day_size, global_time, batched_time,
+                                                            global_time / batched_time))
+
+    print("\nsimulating {} days of {} hospitals admitting every day".format(DAYS, HOSPITALS))
+    print("{:<12} {:>14} {:>14}".format("engine", "global (s)", "seeded (s)"))
+    start_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)  # the storage files are written here
+        try:
+            for engine in ["vectorized", "pandas"]:
+                print("{:<12} {:>14.2f} {:>14.2f}".format(engine, time_simulation(engine, None),
+                                                          time_simulation(engine, 1)))
+        finally:
+            os.chdir(start_dir)
+
+
+if __name__ == "__main__":
+    main()
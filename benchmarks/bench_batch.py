@@ -0,0 +1,90 @@
+"""
+Benchmark for PatientManagementSystem.apply_batch. A network of 100 hospitals with 1,000 beds each is loaded with
+60,000 patients and a batch of 100,000 operations (25,000 each of update, transfer, discharge and add) is applied in
+atomic and keep-going mode, saving the state to final_hospital_state.csv or to a journal once at the end. Reports
+operations per second including the save.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_storage import CsvStorage
+from event_bus import EventBus
+from hospital_network import HospitalNetwork
+from journal import OperationJournal
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+
+HOSPITALS = 100
+BEDS = 1000
+PATIENTS = 60000
+ROUNDS = 25000  # each round is an update, a transfer, a discharge and an add
+
+
+def make_system(storage):
+    """
+    make_system returns a system loaded with PATIENTS patients of severity status 1 and the ids of the patients
+    :param storage: CsvStorage or OperationJournal
+    :return: list of [PatientManagementSystem, List of str]
+    """
+    network = HospitalNetwork([("Hospital {}".format(i), BEDS, 1) for i in range(HOSPITALS)])
+    system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=5, letters=1, rng=random.Random(1)),
+                                     hospitals=network.make_hospitals(), storage=storage,
+                                     events=EventBus([]))
+    names = list(system.hospitals)
+    patient_ids = [system.create_patient(names[i % HOSPITALS], "1", "false") for i in range(PATIENTS)]
+    return [system, patient_ids]
+
+
+def make_operations(system, patient_ids):
+    """
+    make_operations returns ROUNDS rounds of operations that are all valid when applied in order
+    :param system: PatientManagementSystem
+    :param patient_ids: List of str
+    :return: List of dict
+    """
+    rng = random.Random(2)
+    names = list(system.hospitals)
+    operations = []
+    for i in range(ROUNDS):
+        discharged, moved = patient_ids[i], patient_ids[ROUNDS + i]
+        current = system.find_patient_hospital(moved).get_name().lower()
+        target = rng.choice([name for name in rng.sample(names, 2) if name != current])
+        operations.append({"op": "update", "id": discharged, "status": "0"})
+        operations.append({"op": "transfer", "id": moved, "hospital": target})
+        operations.append({"op": "discharge", "id": discharged})
+        operations.append({"op": "add", "hospital": rng.choice(names), "status": "2", "covid": "true"})
+    return operations
+
+
+def main():
+    start_dir = os.getcwd()
+    print("{:<12} {:<10} {:>12} {:>16}".format("mode", "persist", "time (s)", "operations per s"))
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)  # final_hospital_state.csv and the journal are written here
+        try:
+            for persist in ["csv", "journal"]:
+                for atomic in [True, False]:
+                    if persist == "journal":
+                        storage = OperationJournal(compact_every=10 ** 9)
+                    else:
+                        storage = CsvStorage()
+                    system, patient_ids = make_system(storage)
+                    operations = make_operations(system, patient_ids)
+                    start = time.perf_counter()
+                    results = system.apply_batch(operations, atomic=atomic)
+                    elapsed = time.perf_counter() - start
+                    storage.close()
+                    assert all(result["ok"] for result in results)
+                    print("{:<12} {:<10} {:>12.3f} {:>16,.0f}".format("atomic" if atomic else "keep-going", persist,
+                                                                       elapsed, len(operations) / elapsed))
+        finally:
+            os.chdir(start_dir)
+
+
+if __name__ == "__main__":
+    main()
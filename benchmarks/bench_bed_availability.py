@@ -0,0 +1,79 @@
+"""
+Benchmark for the bed availability queries of PatientManagementSystem. Builds networks of 3 to 10,000 hospitals and
+times finding the hospital with the most free beds, checking whether the network is full and an admit/discharge cycle
+(which updates the bed availability), next to the scan over every hospital SimulateData.find_most_beds used to do.
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospitals import Hospital
+from patient_management_system import PatientManagementSystem
+
+HOSPITAL_COUNTS = [3, 100, 1000, 10000]
+REPEATS = 2000
+
+
+def build_system(num_hospitals):
+    """
+    build_system creates a PatientManagementSystem with num_hospitals hospitals of 10 to 20 beds, each about half full
+    :param num_hospitals: int
+    :return: PatientManagementSystem
+    """
+    rng = random.Random(num_hospitals)
+    system = PatientManagementSystem(hospitals=[Hospital("hospital_{}".format(i), rng.randint(10, 20), 0, {})
+                                                for i in range(num_hospitals)])
+    with contextlib.redirect_stdout(io.StringIO()):  # addPatient reports every admission
+        for name, hospital in system.hospitals.items():
+            for _ in range(rng.randint(0, hospital.available_beds() // 2)):
+                system.addPatient(name, "2", "false")
+    return system
+
+
+def scan_most_beds(system):
+    """
+    scan_most_beds returns the name of the hospital with the most available beds by checking every hospital
+    :param system: PatientManagementSystem
+    :return: str
+    """
+    max_beds = 0
+    name = ""
+    for hospital in system.hospitals.values():
+        if hospital.available_beds() > max_beds:
+            max_beds = hospital.available_beds()
+            name = hospital.get_name()
+    return name
+
+
+def admit_and_discharge(system):
+    """
+    admit_and_discharge admits a patient to the hospital with the most beds and discharges them again
+    :param system: PatientManagementSystem
+    :return: None
+    """
+    name = system.hospital_with_most_beds()
+    system.addPatient(name, "0", "false")
+    system.dischargePatient(list(system.hospitals[name].get_patients())[-1])
+
+
+def main():
+    print("{:>10} {:>18} {:>18} {:>20} {:>16}".format("hospitals", "most beds (us)", "network full (us)",
+                                                      "admit+discharge (us)", "scan (us)"))
+    for num_hospitals in HOSPITAL_COUNTS:
+        system = build_system(num_hospitals)
+        most_beds = min(timeit.repeat(system.hospital_with_most_beds, number=REPEATS, repeat=3)) / REPEATS
+        full = min(timeit.repeat(system.network_full, number=REPEATS, repeat=3)) / REPEATS
+        with contextlib.redirect_stdout(io.StringIO()):
+            cycle = min(timeit.repeat(lambda: admit_and_discharge(system), number=200, repeat=3)) / 200
+        scan = min(timeit.repeat(lambda: scan_most_beds(system), number=10, repeat=3)) / 10
+        print("{:>10} {:>18.3f} {:>18.3f} {:>20.2f} {:>16.1f}".format(num_hospitals, most_beds * 1e6, full * 1e6,
+                                                                       cycle * 1e6, scan * 1e6))
+
+
+if __name__ == "__main__":
+    main()
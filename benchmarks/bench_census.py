@@ -0,0 +1,106 @@
+"""
+Benchmark for the census counts of PatientManagementSystem. A network of HOSPITALS hospitals is filled with 10^4 to
+10^6 patients, then the time of reading the occupancy, covid positive count and severity histogram of the network and
+of one hospital from census_stats is compared with working them out by scanning the patients (get_values_or_keys).
+Also times recording one day's metrics of a simulation to a census file (record_census), next to saving the day's
+state to a hospital_state_<number>.csv file to read them back from later.
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital_network import HospitalNetwork
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from simulate_data import SimulateData
+
+HOSPITALS = 100
+CENSUS_SIZES = [10 ** 4, 10 ** 5, 10 ** 6]
+QUERIES = 1000
+
+
+def make_system(num_patients):
+    """
+    make_system returns a system of HOSPITALS hospitals holding num_patients patients
+    :param num_patients: int
+    :return: PatientManagementSystem
+    """
+    rng = random.Random(1)
+    network = HospitalNetwork([("Hospital {}".format(i), num_patients, 1) for i in range(HOSPITALS)])
+    system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=6, letters=1, rng=rng),
+                                     hospitals=network.make_hospitals())
+    names = list(system.hospitals)
+    for i in range(num_patients):
+        system.create_patient(names[i % HOSPITALS], rng.choice("0123"), rng.choice(["true", "false"]))
+    return system
+
+
+def scan_stats(system, hospital_name=None):
+    """
+    scan_stats works out the occupancy, covid positive count and severity histogram by covid status by looking at
+        every patient
+    :param system: PatientManagementSystem
+    :param hospital_name: str or None
+    :return: list of [int, int, List of int]
+    """
+    if hospital_name is None:
+        patients = system.get_values_or_keys("values")
+    else:
+        patients = system.hospitals[hospital_name].get_patients().values()
+    histogram = [0] * 8
+    for patient in patients:
+        info = patient.get_info()
+        histogram[int(info[2]) + (4 if info[3] == "true" else 0)] += 1
+    return [sum(histogram), sum(histogram[4:]), histogram]
+
+
+def time_calls(function, calls, *args):
+    """
+    time_calls returns the average time of calling function(*args)
+    :param function: function
+    :param calls: int
+    :param args: arguments of function
+    :return: float
+    """
+    start = time.perf_counter()
+    for _ in range(calls):
+        function(*args)
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    start_dir = os.getcwd()
+    # for one day's record the scan column is the time of saving the state to a csv file instead
+    print("{:>10} {:<16} {:>16} {:>16}".format("patients", "scope", "counts (ms)", "scan / csv (ms)"))
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)  # the census file and state files are written here
+        try:
+            for num_patients in CENSUS_SIZES:
+                system = make_system(num_patients)
+                for scope, name in [("network", None), ("hospital", "hospital 0")]:
+                    census = time_calls(system.census_stats, QUERIES, name)
+                    scan = time_calls(scan_stats, 3, system, name)
+                    print("{:>10} {:<16} {:>16.4f} {:>16.2f}".format(num_patients, scope, census * 1000,
+                                                                     scan * 1000))
+
+                network = HospitalNetwork([("Hospital {}".format(i), num_patients, 1) for i in range(HOSPITALS)])
+                simulation = SimulateData(system=system, network=network, census_file="census.csv")
+                record = time_calls(simulation.record_census, 10, 1)
+                simulation.close_census()
+                with contextlib.redirect_stdout(io.StringIO()):  # write_to_csv reports every file
+                    snapshot = time_calls(simulation.save_snapshot, 1, 1)
+                print("{:>10} {:<16} {:>16.4f} {:>16.2f}".format(num_patients, "one day's record", record * 1000,
+                                                                 snapshot * 1000))
+                del system, simulation
+        finally:
+            os.chdir(start_dir)
+
+
+if __name__ == "__main__":
+    main()
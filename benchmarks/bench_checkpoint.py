@@ -0,0 +1,103 @@
+"""
+Benchmark for checkpointing a long simulation. A network of HOSPITALS hospitals is filled with 10^5 and 10^6 patients
+admitted by the simulation (so their days stayed are tracked), with the vectorized engine and with the pandas engine.
+Reports the time and size of one checkpoint (save_checkpoint), the time to resume from it (SimulateData.resume) and
+the time of one simulated day after resuming, next to the time and size of pickling just the Hospital objects (with
+their Patient objects) of the system, which a checkpoint of pickled objects would need on top of the days stayed.
+"""
+import contextlib
+import io
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital_network import HospitalNetwork
+from journal import OperationJournal
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from simulate_data import SimulateData
+
+HOSPITALS = 100
+CHECKPOINT_SIZES = [10 ** 5, 10 ** 6]
+ENGINES = ["vectorized", "pandas"]
+
+
+def make_storage():
+    """
+    make_storage returns a journal storage that is only compacted rarely, so filling the system does not rewrite its
+        csv file after every admission
+    :return: OperationJournal
+    """
+    return OperationJournal(compact_every=10 ** 7)
+
+
+def make_simulation(engine, num_patients):
+    """
+    make_simulation returns a simulation with engine whose network of HOSPITALS hospitals has been filled with
+        num_patients patients admitted by the simulation
+    :param engine: str
+    :param num_patients: int
+    :return: SimulateData
+    """
+    random.seed(1)
+    network = HospitalNetwork([("Hospital {}".format(i), num_patients, 1) for i in range(HOSPITALS)])
+    system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=6, letters=1),
+                                     hospitals=network.make_hospitals(), storage=make_storage())
+    simulation = SimulateData(engine=engine, system=system, network=network, save_snapshots=False)
+    names = list(system.hospitals)
+    with contextlib.redirect_stdout(io.StringIO()):  # the system reports every admission
+        for i in range(num_patients):
+            simulation.admit_patient(names[i % HOSPITALS])
+    return simulation
+
+
+def main():
+    start_dir = os.getcwd()
+    print("{:>10} {:<11} {:>10} {:>10} {:>10} {:>10} {:>11} {:>11} {:>11}".format(
+        "patients", "engine", "save (s)", "size (MB)", "resume (s)", "day (s)", "pickle (s)", "unpick (s)",
+        "pickle (MB)"))
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)  # the storage files and checkpoints are written here
+        try:
+            for num_patients in CHECKPOINT_SIZES:
+                for engine in ENGINES:
+                    simulation = make_simulation(engine, num_patients)
+
+                    start = time.perf_counter()
+                    simulation.save_checkpoint("simulation.checkpoint", 1)
+                    save = time.perf_counter() - start
+                    size = os.path.getsize("simulation.checkpoint")
+
+                    start = time.perf_counter()
+                    pickled = pickle.dumps(simulation.get_system().hospitals, protocol=pickle.HIGHEST_PROTOCOL)
+                    pickle_time = time.perf_counter() - start
+                    pickle_size = len(pickled)
+                    del simulation
+                    start = time.perf_counter()
+                    hospitals = pickle.loads(pickled)  # every Patient object is rebuilt
+                    unpickle_time = time.perf_counter() - start
+                    del hospitals, pickled
+
+                    start = time.perf_counter()
+                    simulation = SimulateData.resume("simulation.checkpoint", storage=make_storage())
+                    resume = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):  # the simulation reports every day
+                        simulation.start_simulation(2)
+                    day = time.perf_counter() - start
+                    print("{:>10} {:<11} {:>10.2f} {:>10.1f} {:>10.2f} {:>10.2f} {:>11.2f} {:>11.2f} {:>11.1f}".format(
+                        num_patients, engine, save, size / 2 ** 20, resume, day, pickle_time, unpickle_time,
+                        pickle_size / 2 ** 20))
+                    del simulation
+        finally:
+            os.chdir(start_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Benchmark for the ensemble runner. Runs ensembles of the 90 day simulation with 1 process up to one process per core
+and reports replicas per second and the speedup over 1 process, then checks that the summary memory and results do
+not depend on the number of processes or replicas.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ensemble
+
+REPLICAS = 400
+
+
+def main():
+    cores = os.cpu_count() or 1
+    process_counts = sorted({1, 2, 4, cores} & set(range(1, cores + 1))) if cores > 1 else [1]
+    print("{} core(s) available".format(cores))
+    print("{:>10} {:>16} {:>10}".format("processes", "replicas per s", "speedup"))
+    results = {}
+    for processes in process_counts:
+        start = time.perf_counter()
+        results[processes] = ensemble.run_ensemble(REPLICAS, seed=1, processes=processes)
+        rate = REPLICAS / (time.perf_counter() - start)
+        if processes == 1:
+            single_rate = rate
+        print("{:>10} {:>16.1f} {:>10.2f}".format(processes, rate, rate / single_rate))
+
+    summaries = list(results.values())
+    assert all((summary.occupancy_counts == summaries[0].occupancy_counts).all() for summary in summaries)
+    print("All process counts gave the same summary.")
+
+    small = ensemble.run_ensemble(REPLICAS // 10, seed=1, processes=1)
+    print("Summary size: {} bytes for {} replicas, {} bytes for {} replicas".format(
+        small.occupancy_counts.nbytes, small.replicas, summaries[0].occupancy_counts.nbytes, summaries[0].replicas))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmark for the discrete-event simulation mode of SimulateData. Simulates a network of 1,000 hospitals, each
+admitting a patient every 1 to 7 days, over horizons of 1 to 4 years and reports the events processed and the time
+taken. The time should grow with the number of events, not with hospitals x days.
+"""
+import contextlib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospitals import Hospital
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from simulate_data import SimulateData
+
+NUM_HOSPITALS = 1000
+HORIZONS = [365, 2 * 365, 4 * 365]
+
+
+def main():
+    print("{:>8} {:>12} {:>14} {:>10} {:>14}".format("days", "events", "hospital-days", "time (s)", "events per s"))
+    with open(os.devnull, 'w') as devnull:
+        for days in HORIZONS:
+            random.seed(days)
+            rng = random.Random(0)
+            hospitals = [Hospital("hospital_{}".format(i), 30, 0, {}) for i in range(NUM_HOSPITALS)]
+            schedule = {hospital.get_name().lower(): rng.randint(1, 7) for hospital in hospitals}
+            system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=5, letters=1), hospitals=hospitals)
+
+            simulation = SimulateData(system=system, save_snapshots=False)
+            with contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                events = simulation.start_event_simulation(days, schedule)
+                elapsed = time.perf_counter() - start
+            print("{:>8} {:>12} {:>14} {:>10.2f} {:>14.3g}".format(days, events, days * NUM_HOSPITALS, elapsed,
+                                                                   events / elapsed))
+
+
+if __name__ == "__main__":
+    main()
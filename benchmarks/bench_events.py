@@ -0,0 +1,116 @@
+"""
+Benchmark for publishing the progress of a simulation to an EventBus (event_bus.py, event_sinks.py) instead of
+printing it. Runs a seeded DAYS day simulation of a network of HOSPITALS hospitals admitting every day with each of:
+    - console: the default ConsoleSink, printing to a discarded stream
+    - quiet: an EventBus without sinks, the messages are never built
+    - json lines: only the admissions, transfers, discharges, status changes and saved states, to a json lines file
+    - ring buffer: every event kept in memory by a RingBufferSink
+Reports the best of REPEATS runs of each, the runs take turns, and the number of events of the last run.
+"""
+import gc
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_bus import AUDIT_EVENTS, EventBus
+from event_sinks import ConsoleSink, JsonLinesSink, RingBufferSink
+from hospital_network import HospitalNetwork
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from simulate_data import SimulateData
+
+HOSPITALS = 200
+BEDS = 100
+DAYS = 90
+REPEATS = 5
+
+
+def make_console_bus():
+    """
+    make_console_bus returns a bus printing to a discarded stream, and no RingBufferSink
+    :return: List of EventBus and RingBufferSink or None
+    """
+    return [EventBus([ConsoleSink(io.StringIO())]), None]
+
+
+def make_quiet_bus():
+    """
+    make_quiet_bus returns a bus without sinks, and no RingBufferSink
+    :return: List of EventBus and RingBufferSink or None
+    """
+    return [EventBus(), None]
+
+
+def make_json_lines_bus():
+    """
+    make_json_lines_bus returns a bus writing the audit events to events.jsonl, and no RingBufferSink
+    :return: List of EventBus and RingBufferSink or None
+    """
+    bus = EventBus()
+    bus.subscribe(JsonLinesSink("events.jsonl"), AUDIT_EVENTS)
+    return [bus, None]
+
+
+def make_ring_buffer_bus():
+    """
+    make_ring_buffer_bus returns a bus keeping every event in a RingBufferSink, and the sink
+    :return: List of EventBus and RingBufferSink or None
+    """
+    sink = RingBufferSink(capacity=10 ** 7)
+    return [EventBus([sink]), sink]
+
+
+def time_run(make_bus, engine):
+    """
+    time_run returns the time of one simulation publishing to the EventBus made by make_bus, in a new working
+        directory (for the state and event files), and the number of events kept by its RingBufferSink, if any
+    :param make_bus: function
+    :param engine: str
+    :return: List of float and int or None
+    """
+    start_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        try:
+            events, sink = make_bus()
+            network = HospitalNetwork([("Hospital {}".format(i), BEDS, 1) for i in range(HOSPITALS)])
+            system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=5, letters=1,
+                                                                             rng=random.Random(1)),
+                                             hospitals=network.make_hospitals(), events=events)
+            simulation = SimulateData(engine=engine, system=system, network=network, seed=1)
+            gc.collect()
+            start = time.perf_counter()
+            simulation.start_simulation(DAYS)
+            events.close()
+            seconds = time.perf_counter() - start
+            return [seconds, len(sink.get_events()) if sink is not None else None]
+        finally:
+            os.chdir(start_dir)
+
+
+def main():
+    buses = [("console", make_console_bus), ("quiet", make_quiet_bus), ("json lines", make_json_lines_bus),
+             ("ring buffer", make_ring_buffer_bus)]
+    print("{:<12} {:<12} {:>12} {:>12}".format("engine", "sinks", "best (s)", "vs console"))
+    for engine in ["pandas", "vectorized"]:
+        times = {label: [] for label, _ in buses}
+        counted = None
+        for _ in range(REPEATS):
+            for label, make_bus in buses:
+                seconds, count = time_run(make_bus, engine)
+                times[label].append(seconds)
+                counted = count if count is not None else counted
+        console = min(times["console"])
+        for label, _ in buses:
+            best = min(times[label])
+            print("{:<12} {:<12} {:>12.3f} {:>11.2f}x".format(engine, label, best, console / best))
+        print("{:<12} {} events published\n".format(engine, counted))
+
+
+if __name__ == "__main__":
+    main()
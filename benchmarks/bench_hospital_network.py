@@ -0,0 +1,81 @@
+"""
+Scaling benchmark for data-driven hospital networks. For regions of 50, 500 and 5,000 hospitals it writes a
+hospital_network.csv into a temporary directory and times, end to end from that file:
+    - manage: reading the network, building the PatientManagementSystem, admitting one patient to every hospital,
+        printing the patient table and finding the hospital with the most beds
+    - simulate: the 90 day simulation (vectorized engine) with its state files
+    - plot: reading the state files back in and drawing both plots (Agg backend, saved to png files)
+Every stage should grow about linearly with the number of hospitals.
+"""
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from hospital_network import HospitalNetwork
+from patient_management_system import PatientManagementSystem
+from simulate_data import SimulateData
+from system_plots import SystemPlots
+
+SIZES = [50, 500, 5000]
+
+
+def make_network(size):
+    """
+    make_network returns a network of size hospitals with 5 - 40 beds admitting a patient every 1 - 7 days
+    :param size: int
+    :return: HospitalNetwork
+    """
+    rng = random.Random(size)
+    return HospitalNetwork([("Hospital {}".format(i), rng.randint(5, 40), rng.randint(1, 7)) for i in range(size)])
+
+
+def main():
+    print("{:>10} {:>12} {:>12} {:>12}".format("hospitals", "manage (s)", "simulate (s)", "plot (s)"))
+    start_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir, open(os.devnull, 'w') as devnull:
+        os.chdir(work_dir)  # the network, state files and plots are written here
+        try:
+            for size in SIZES:
+                make_network(size).write_csv()
+                random.seed(size)
+
+                with contextlib.redirect_stdout(devnull):
+                    start = time.perf_counter()
+                    system = PatientManagementSystem()
+                    for name in list(system.hospitals):
+                        system.addPatient(name, "2", "false")
+                    system.print_patients()
+                    system.hospital_with_most_beds()
+                    manage = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    SimulateData(engine="vectorized").start_simulation()
+                    simulate = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    plots = SystemPlots()
+                    plots.aggregates = plots.read_in_csv()
+                    plots.plot_hospital_covid_patients()
+                    plots.severity_scatter_plot()
+                    for number in plt.get_fignums():
+                        plt.figure(number).savefig("plot_{}.png".format(number))
+                    plt.close("all")
+                    plot = time.perf_counter() - start
+
+                assert len(plots.aggregates.get_hospitals()) == size
+                print("{:>10} {:>12.2f} {:>12.2f} {:>12.2f}".format(size, manage, simulate, plot))
+        finally:
+            os.chdir(start_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark for the overhead of instrumentation (metrics.py). Runs a workload of OPERATIONS management operations
+(create_patient, find_patient_hospital, move_patient and remove_patient on a network of HOSPITALS hospitals) and
+a seeded 90 day simulation of the same network, REPEATS times each:
+    - before anything has been instrumented
+    - after instrument and uninstrument (instrumentation disabled again)
+    - with instrumentation enabled
+The disabled and enabled runs take turns. Reports the best time of each and the overhead against the first, and checks
+that disabling instrumentation puts back the very same method objects, so a disabled run executes exactly the code of
+an uninstrumented one.
+"""
+import contextlib
+import gc
+import importlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital_network import HospitalNetwork
+from journal import OperationJournal
+from metrics import INSTRUMENTED_CLASSES, Metrics, instrument, uninstrument
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from simulate_data import SimulateData
+
+HOSPITALS = 200
+BEDS = 100
+OPERATIONS = 20000
+REPEATS = 7
+
+
+def run_operations():
+    """
+    run_operations creates OPERATIONS patients, looks each one up, moves every other one and removes them all
+    :return: None
+    """
+    rng = random.Random(1)
+    network = HospitalNetwork([("Hospital {}".format(i), BEDS, 1) for i in range(HOSPITALS)])
+    system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=5, letters=1, rng=rng),
+                                     hospitals=network.make_hospitals(),
+                                     storage=OperationJournal(compact_every=10 ** 7))
+    names = list(system.hospitals)
+    ids = [system.create_patient(names[i % HOSPITALS], rng.choice("123"), "false") for i in range(OPERATIONS)]
+    for i, patient_id in enumerate(ids):
+        system.find_patient_hospital(patient_id)
+        if i % 2:
+            system.move_patient(patient_id, names[(i + 1) % HOSPITALS])
+    for patient_id in ids:
+        system.remove_patient(patient_id)
+
+
+def run_simulation():
+    """
+    run_simulation runs a seeded 90 day simulation of a network of HOSPITALS hospitals admitting every 2 days
+    :return: None
+    """
+    network = HospitalNetwork([("Hospital {}".format(i), BEDS, 2) for i in range(HOSPITALS)])
+    system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=5, letters=1, rng=random.Random(1)),
+                                     hospitals=network.make_hospitals(),
+                                     storage=OperationJournal(compact_every=10 ** 7))
+    simulation = SimulateData(engine="vectorized", system=system, network=network, save_snapshots=False, seed=1)
+    simulation.start_simulation()
+
+
+def time_run(workload):
+    """
+    time_run returns the time of one run of workload in a new working directory (for the storage files), with its
+        console output discarded
+    :param workload: function
+    :return: float
+    """
+    start_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        try:
+            gc.collect()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                workload()
+            return time.perf_counter() - start
+        finally:
+            os.chdir(start_dir)
+
+
+def main():
+    original = {(module, name): dict(vars(getattr(importlib.import_module(module), name)))
+                for module, name, _, _ in INSTRUMENTED_CLASSES}
+    print("{:<12} {:>16} {:>16} {:>16}".format("workload", "never (s)", "disabled (s)", "enabled (s)"))
+    for label, workload in [("operations", run_operations), ("simulation", run_simulation)]:
+        never = min(time_run(workload) for _ in range(REPEATS))
+        # disabled and enabled runs take turns, so a machine getting slower or faster affects both alike
+        disabled = []
+        enabled = []
+        for _ in range(REPEATS):
+            instrument(Metrics())
+            enabled.append(time_run(workload))
+            uninstrument()
+            disabled.append(time_run(workload))
+        disabled, enabled = min(disabled), min(enabled)
+        print("{:<12} {:>16.3f} {:>9.3f} ({:+.1%}) {:>9.3f} ({:+.1%})".format(
+            label, never, disabled, disabled / never - 1, enabled, enabled / never - 1))
+    restored = all(dict(vars(getattr(importlib.import_module(module), name))) == methods
+                   for (module, name), methods in original.items())
+    print("\nmethods restored exactly after uninstrument: {}".format(restored))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark for PatientIdAllocator. Fills the default 52,000 id space to different occupancies and times allocating
+(and then releasing) ids, next to the rejection sampling addPatient used to do. The allocator should cost the same at
+any occupancy.
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from patient_ids import PatientIdAllocator
+
+OCCUPANCIES = [0.0, 0.5, 0.9, 0.99, 0.999]
+DRAWS = 50
+
+
+def rejection_sample(existing_ids):
+    """
+    rejection_sample draws random ids until one is not in existing_ids, like addPatient used to
+    :param existing_ids: List of str
+    :return: str
+    """
+    random_id = str(random.randint(0, 9)) + str(random.randint(0, 9)) + str(random.randint(0, 9)) \
+        + random.choice(string.ascii_letters)
+    while random_id in existing_ids:
+        random_id = str(random.randint(0, 9)) + str(random.randint(0, 9)) + str(random.randint(0, 9)) \
+            + random.choice(string.ascii_letters)
+    return random_id
+
+
+def main():
+    print("{:>10} {:>20} {:>26}".format("occupancy", "allocator (us/id)", "rejection sampling (us/id)"))
+    for occupancy in OCCUPANCIES:
+        allocator = PatientIdAllocator()
+        in_use = [allocator.allocate() for _ in range(int(allocator.get_capacity() * occupancy))]
+
+        start = time.perf_counter()
+        for _ in range(DRAWS):
+            allocator.release(allocator.allocate())
+        allocator_time = (time.perf_counter() - start) / DRAWS
+
+        start = time.perf_counter()
+        for _ in range(DRAWS):
+            rejection_sample(in_use)  # addPatient searched a list of every id in use
+        rejection_time = (time.perf_counter() - start) / DRAWS
+        print("{:>10.1%} {:>20.2f} {:>26.2f}".format(occupancy, allocator_time * 1e6, rejection_time * 1e6))
+
+
+if __name__ == "__main__":
+    main()
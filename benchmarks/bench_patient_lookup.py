@@ -0,0 +1,67 @@
+"""
+Benchmark for PatientManagementSystem.find_patient_hospital. Builds networks of 3 to 3,000 hospitals holding the same
+number of patients and times the lookup of every patient through the system-wide patient index, next to a scan over
+every hospital for comparison. The index lookup time should stay flat as the number of hospitals grows.
+"""
+import contextlib
+import io
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospitals import Hospital
+from patient_management_system import PatientManagementSystem
+
+NUM_PATIENTS = 3000
+HOSPITAL_COUNTS = [3, 30, 300, 3000]
+
+
+def build_system(num_hospitals, num_patients):
+    """
+    build_system creates a PatientManagementSystem with num_hospitals hospitals and admits num_patients patients
+        spread evenly across them
+    :param num_hospitals: int
+    :param num_patients: int
+    :return: PatientManagementSystem
+    """
+    beds = num_patients // num_hospitals + 1
+    system = PatientManagementSystem(hospitals=[Hospital("hospital_{}".format(i), beds, 0, {})
+                                                for i in range(num_hospitals)])
+    names = list(system.hospitals.keys())
+    with contextlib.redirect_stdout(io.StringIO()):  # addPatient reports every admission
+        for i in range(num_patients):
+            system.addPatient(names[i % num_hospitals], "2", "false")
+    return system
+
+
+def scan_hospitals(system, patient_id):
+    """
+    scan_hospitals finds the hospital of patient_id by checking every hospital in turn
+    :param system: PatientManagementSystem
+    :param patient_id: str
+    :return: Hospital or Bool
+    """
+    for hospital in system.hospitals.values():
+        if patient_id in hospital.get_patients():
+            return hospital
+    return False
+
+
+def main():
+    print("{:>10} {:>22} {:>22}".format("hospitals", "index lookup (ns/op)", "hospital scan (ns/op)"))
+    for num_hospitals in HOSPITAL_COUNTS:
+        system = build_system(num_hospitals, NUM_PATIENTS)
+        patient_ids = [patient_id for hospital in system.hospitals.values() for patient_id in hospital.get_patients()]
+        lookups = len(patient_ids)
+
+        index_time = min(timeit.repeat(lambda: [system.find_patient_hospital(p) for p in patient_ids],
+                                       number=5, repeat=3)) / (5 * lookups)
+        scan_time = min(timeit.repeat(lambda: [scan_hospitals(system, p) for p in patient_ids],
+                                      number=1, repeat=3)) / lookups
+        print("{:>10} {:>22.1f} {:>22.1f}".format(num_hospitals, index_time * 1e9, scan_time * 1e9))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark comparing the Patient object model with the NumPy backed PatientStore. Admits the same patients to a
+PatientManagementSystem of 100 hospitals with each model and reports the memory used per patient and the throughput of
+a scan counting the covid positive patients at every hospital.
+"""
+import functools
+import gc
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_bus import EventBus
+from hospitals import Hospital
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from patient_store import PatientStore
+
+NUM_PATIENTS = [10000, 100000, 1000000]
+NUM_HOSPITALS = 100
+
+
+def build_system(num_patients, use_store):
+    """
+    build_system creates a PatientManagementSystem holding num_patients patients and returns it together with its
+        PatientStore (None for the object model) and the memory it took in bytes
+    :param num_patients: int
+    :param use_store: Bool
+    :return: list of [PatientManagementSystem, PatientStore, int]
+    """
+    gc.collect()
+    tracemalloc.start()
+    allocator = PatientIdAllocator(digits=6, letters=1)
+    store = PatientStore(id_codec=allocator) if use_store else None
+    system = PatientManagementSystem(id_allocator=allocator, patient_store=store, events=EventBus([]),
+                                     hospitals=[Hospital("hospital_{}".format(i), num_patients, 0, {})
+                                                for i in range(NUM_HOSPITALS)])
+    names = list(system.hospitals.keys())
+    baseline = tracemalloc.get_traced_memory()[0]
+    for i in range(num_patients):
+        system.addPatient(names[i % NUM_HOSPITALS], str(i % 4), "true" if i % 3 == 0 else "false")
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return [system, store, used]
+
+
+def scan_objects(system):
+    """
+    scan_objects counts the covid positive patients at every hospital by looking at every Patient object
+    :param system: PatientManagementSystem
+    :return: List of int
+    """
+    return [sum(1 for patient in hospital.get_patients().values() if patient.get_info()[3] == "true")
+            for hospital in system.hospitals.values()]
+
+
+def main():
+    print("{:>10} {:>18} {:>18} {:>22} {:>22}".format("patients", "objects (B/pt)", "store (B/pt)",
+                                                      "object scan (pt/s)", "store scan (pt/s)"))
+    for num_patients in NUM_PATIENTS:
+        object_system, _, object_memory = build_system(num_patients, False)
+        object_counts = scan_objects(object_system)
+        object_scan = min(timeit.repeat(functools.partial(scan_objects, object_system), number=1, repeat=3))
+        del object_system
+
+        store_system, store, store_memory = build_system(num_patients, True)
+        store_counts = store.covid_counts()
+        store_scan = min(timeit.repeat(store.covid_counts, number=1, repeat=3))
+        assert list(store_counts) == object_counts
+        del store_system, store
+
+        print("{:>10} {:>18.0f} {:>18.0f} {:>22.3g} {:>22.3g}".format(
+            num_patients, object_memory / num_patients, store_memory / num_patients,
+            num_patients / object_scan, num_patients / store_scan))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark for saving the state of a PatientManagementSystem after an action. For censuses of 1,000 to 100,000 patients
+it times an update followed by save_state, once rewriting final_hospital_state.csv and once writing to an
+OperationJournal. The journal cost per action should not depend on the number of patients.
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospitals import Hospital
+from journal import OperationJournal
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+
+CENSUS_SIZES = [1000, 10000, 100000]
+ACTIONS = 200
+
+
+def build_system(num_patients, storage):
+    """
+    build_system creates a PatientManagementSystem with 10 hospitals holding num_patients patients
+    :param num_patients: int
+    :param storage: OperationJournal or None
+    :return: PatientManagementSystem
+    """
+    system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=5, letters=1),
+                                     hospitals=[Hospital("hospital_{}".format(i), num_patients, 0, {})
+                                                for i in range(10)],
+                                     storage=storage)
+    with contextlib.redirect_stdout(io.StringIO()):  # addPatient reports every admission
+        for i in range(num_patients):
+            system.addPatient("hospital_{}".format(i % 10), "2", "false")
+    return system
+
+
+def time_actions(system):
+    """
+    time_actions returns the average time of updating a patient's status and saving the state
+    :param system: PatientManagementSystem
+    :return: float
+    """
+    patient_ids = system.get_values_or_keys("keys")[:ACTIONS]
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for patient_id in patient_ids:
+            system.updateStatus(patient_id, "1")
+            system.save_state()
+        return (time.perf_counter() - start) / len(patient_ids)
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())  # keep the state files out of the working directory
+    print("{:>10} {:>22} {:>22}".format("patients", "csv rewrite (us/op)", "journal (us/op)"))
+    for num_patients in CENSUS_SIZES:
+        csv_time = time_actions(build_system(num_patients, None))
+        journal = OperationJournal(compact_every=10 ** 9)
+        system = build_system(num_patients, journal)
+        journal.compact(system)
+        journal_time = time_actions(system)
+        journal.close()
+        print("{:>10} {:>22.1f} {:>22.1f}".format(num_patients, csv_time * 1e6, journal_time * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmark for preparing the plot data of SystemPlots. A network of HOSPITALS hospitals holding PATIENTS patients saves
+a state every day for DAYS days, to a SnapshotLog and (for the first CSV_DAYS days) to hospital_state_<number>.csv
+files. Times reading the states into SnapshotAggregates and making the covid counts and severity counts both plots use,
+against the previous way of building a list per patient for every hospital and state and walking the lists, and
+reports the peak memory of each. The previous way is only run on the first NESTED_DAYS days, it needs gigabytes for
+all of them.
+"""
+import contextlib
+import csv
+import glob
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital_network import HospitalNetwork
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from simulate_data import SimulateData
+from snapshot_aggregates import SnapshotAggregates
+from snapshot_log import SnapshotLog
+
+HOSPITALS = 300
+BEDS = 50
+PATIENTS = 12000
+DAYS = 2000
+CSV_DAYS = 200
+NESTED_DAYS = 200
+CHANGES = 200  # patients given a new severity status every day
+
+
+def save_states(snapshot_log, csv_days):
+    """
+    save_states saves DAYS daily states of a filled network to snapshot_log, the first csv_days of them to csv files
+    :param snapshot_log: SnapshotLog
+    :param csv_days: int
+    :return: None
+    """
+    rng = random.Random(1)
+    network = HospitalNetwork([("Hospital {}".format(i), BEDS, 1) for i in range(HOSPITALS)])
+    system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=5, letters=1, rng=rng),
+                                     hospitals=network.make_hospitals())
+    names = list(system.hospitals)
+    for i in range(PATIENTS):
+        system.create_patient(names[i % HOSPITALS], rng.choice("123"), rng.choice(["true", "false"]))
+    patients = [patient for hospital in system.hospitals.values() for patient in hospital.get_patients().values()]
+    csv_simulation = SimulateData(system=system, network=network, snapshot_every=1)
+    for day in range(1, DAYS + 1):
+        for patient in rng.sample(patients, CHANGES):
+            patient.update_status(rng.choice("0123"))
+        snapshot_log.append(day, system)
+        if day <= csv_days:
+            with contextlib.redirect_stdout(io.StringIO()):  # write_to_csv reports every file
+                csv_simulation.save_snapshot(day)
+    snapshot_log.close()
+
+
+def read_nested(snapshot_log, days):
+    """
+    read_nested reads the first days states of snapshot_log the previous way, a list of [id, status, covid] for every
+        patient of every hospital in every state, and walks the lists with count_nested
+    :param snapshot_log: SnapshotLog
+    :param days: int
+    :return: list of [list, list]
+    """
+    names = snapshot_log.read_hospitals()
+    hospitals = {name: [] for name in names}
+    for day, counts, codes, ids in snapshot_log.read_days():
+        if day > days:
+            break
+        start = 0
+        for name, count in zip(names, counts):
+            patients = []
+            for number in range(start, start + count):
+                status, covid_positive = SnapshotLog.decode(codes[number])
+                patients.append(["", status, covid_positive])
+            hospitals[name].append(patients)
+            start += count
+    return count_nested(hospitals)
+
+
+def count_nested(hospitals):
+    """
+    count_nested counts the covid positive patients and collects the (state, severity status) of every patient of
+        every hospital by walking the lists of read_nested and read_csv_nested
+    :param hospitals: dict
+    :return: list of [list, list]
+    """
+    covid = [[sum(patient[2] == "true" for patient in state) for state in states] for states in hospitals.values()]
+    severity = [[(state + 1, int(patient[1])) for state in range(len(states)) for patient in states[state]]
+                for states in hospitals.values()]
+    return [covid, severity]
+
+
+def read_aggregates(snapshot_log, days):
+    """
+    read_aggregates reads the first days states of snapshot_log into SnapshotAggregates and makes the count arrays
+    :param snapshot_log: SnapshotLog
+    :param days: int
+    :return: list of [numpy.ndarray, numpy.ndarray]
+    """
+    aggregates = SnapshotAggregates()
+    hospitals = snapshot_log.read_hospitals()
+    for day, counts, codes, ids in snapshot_log.read_days():
+        if day > days:
+            break
+        aggregates.add_log_record(day, hospitals, counts, codes)
+    return [aggregates.get_covid_counts(), aggregates.get_severity_counts()]
+
+
+def read_csv_nested(files):
+    """
+    read_csv_nested reads the csv files the previous way, a list per patient for every hospital in every state, and
+        walks the lists like read_nested
+    :param files: List of str
+    :return: list of [list, list]
+    """
+    hospitals = {}
+    for number, file in enumerate(files):
+        with open(file, 'r') as csv_file:
+            patient_reader = csv.reader(csv_file, delimiter=',')
+            next(patient_reader)
+            day_patients = {}
+            for row in patient_reader:
+                day_patients.setdefault(row[2], []).append([row[1], row[3], row[4]])
+        for name, patients in day_patients.items():
+            hospitals.setdefault(name, [[] for _ in range(number)]).append(patients)
+    return count_nested(hospitals)
+
+
+def read_csv_aggregates(files):
+    """
+    read_csv_aggregates reads the csv files into SnapshotAggregates and makes the count arrays
+    :param files: List of str
+    :return: list of [numpy.ndarray, numpy.ndarray]
+    """
+    aggregates = SnapshotAggregates()
+    for file in files:
+        aggregates.add_csv_file(file)
+    return [aggregates.get_covid_counts(), aggregates.get_severity_counts()]
+
+
+def measure(function, *args):
+    """
+    measure returns the time taken by function(*args) and its peak memory, traced in a second run
+    :param function: function
+    :param args: arguments of function
+    :return: list of [float, float]
+    """
+    start = time.perf_counter()
+    function(*args)
+    taken = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return [taken, peak]
+
+
+def main():
+    start_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)  # the states are written here
+        try:
+            snapshot_log = SnapshotLog("states.snapshots")
+            save_states(snapshot_log, CSV_DAYS)
+            files = sorted(glob.glob("hospital_state_*.csv"), key=lambda name: int(name[15:-4]))
+
+            print("{} hospitals, {} patients".format(HOSPITALS, PATIENTS))
+            print("{:<12} {:<14} {:>8} {:>12} {:>12}".format("source", "reader", "states", "time (s)", "peak (MB)"))
+            runs = [("log", "nested lists", NESTED_DAYS, read_nested, [snapshot_log, NESTED_DAYS]),
+                    ("log", "aggregates", NESTED_DAYS, read_aggregates, [snapshot_log, NESTED_DAYS]),
+                    ("log", "aggregates", DAYS, read_aggregates, [snapshot_log, DAYS]),
+                    ("csv files", "nested lists", CSV_DAYS, read_csv_nested, [files]),
+                    ("csv files", "aggregates", CSV_DAYS, read_csv_aggregates, [files])]
+            for source, reader, states, function, args in runs:
+                taken, peak = measure(function, *args)
+                print("{:<12} {:<14} {:>8} {:>12.2f} {:>12.1f}".format(source, reader, states, taken, peak / 1024 ** 2))
+        finally:
+            os.chdir(start_dir)
+
+
+if __name__ == "__main__":
+    main()
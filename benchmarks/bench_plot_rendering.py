@@ -0,0 +1,110 @@
+"""
+Benchmark for drawing the plots of SystemPlots headless (saved as png files with the Agg backend) as the number of
+patients grows. STATES daily states of HOSPITALS hospitals holding from 10^3 to 10^6 patients are made up as
+SnapshotAggregates, and the time taken by plot_hospital_covid_patients and severity_scatter_plot is reported next to
+the time taken by the previous scatter plot drawing one point per patient in every state (up to MAX_PER_PATIENT
+points). Then times saving the chart sets of CHART_HOSPITALS hospitals in this process and across worker processes.
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from hospital_network import HospitalNetwork
+from snapshot_aggregates import SnapshotAggregates
+from system_plots import SystemPlots
+
+HOSPITALS = 300
+STATES = 90
+PATIENT_COUNTS = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+MAX_PER_PATIENT = 10 ** 6  # points drawn by the previous scatter plot, more takes minutes
+CHART_HOSPITALS = 20
+
+
+def make_aggregates(hospitals, patients, rng):
+    """
+    make_aggregates returns the aggregates of STATES states of hospitals hospitals holding patients patients with a
+        random hospital, severity status and covid status
+    :param hospitals: int
+    :param patients: int
+    :param rng: numpy.random.Generator
+    :return: SnapshotAggregates
+    """
+    names = ["hospital {}".format(i) for i in range(hospitals)]
+    aggregates = SnapshotAggregates(names)
+    for day in range(1, STATES + 1):
+        counts = np.bincount(rng.integers(0, hospitals, patients), minlength=hospitals).astype(np.uint32)
+        codes = rng.integers(0, 8, patients, dtype=np.uint8).tobytes()
+        aggregates.add_log_record(day, names, counts.tobytes(), codes)
+    return aggregates
+
+
+def make_plots(output_dir, hospitals):
+    """
+    make_plots returns headless SystemPlots of a network of hospitals hospitals saving its plots to output_dir
+    :param output_dir: str
+    :param hospitals: int
+    :return: SystemPlots
+    """
+    network = HospitalNetwork([("Hospital {}".format(i), 10, 1) for i in range(hospitals)])
+    return SystemPlots(network=network, output_dir=output_dir)
+
+
+def time_per_patient_scatter(aggregates, output_dir):
+    """
+    time_per_patient_scatter returns the time taken to draw and save the scatter plot the previous way, one point per
+        patient in every state coloured by hospital
+    :param aggregates: SnapshotAggregates
+    :param output_dir: str
+    :return: float
+    """
+    counts = aggregates.get_severity_counts().ravel()
+    days, rows, statuses = [index.ravel() for index in np.indices(aggregates.get_severity_counts().shape)]
+    start = time.perf_counter()
+    plt.figure(figsize=(12, 4))
+    plt.scatter(np.repeat(days + 1, counts), np.repeat(statuses, counts), c=np.repeat(rows, counts), cmap="viridis")
+    plt.savefig(os.path.join(output_dir, "per_patient.png"))
+    plt.close()
+    return time.perf_counter() - start
+
+
+def main():
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory() as output_dir:
+        print("{} hospitals, {} states".format(HOSPITALS, STATES))
+        print("{:>10} {:>16} {:>16} {:>22}".format("patients", "covid chart (s)", "severity (s)",
+                                                    "per patient scatter (s)"))
+        plots = make_plots(output_dir, HOSPITALS)
+        for patients in PATIENT_COUNTS:
+            plots.aggregates = make_aggregates(HOSPITALS, patients, rng)
+            start = time.perf_counter()
+            plots.plot_hospital_covid_patients()
+            covid = time.perf_counter() - start
+            start = time.perf_counter()
+            plots.severity_scatter_plot()
+            severity = time.perf_counter() - start
+            per_patient = "-"
+            if patients * STATES <= MAX_PER_PATIENT:
+                per_patient = "{:.2f}".format(time_per_patient_scatter(plots.aggregates, output_dir))
+            print("{:>10} {:>16.2f} {:>16.2f} {:>22}".format(patients, covid, severity, per_patient))
+
+        plots = make_plots(output_dir, CHART_HOSPITALS)
+        plots.aggregates = make_aggregates(CHART_HOSPITALS, 10 ** 5, rng)
+        print("\nchart sets of {} hospitals, {} cores".format(CHART_HOSPITALS, os.cpu_count()))
+        for processes in [1, None]:
+            start = time.perf_counter()
+            plots.save_hospital_charts(processes)
+            print("{:<24} {:>8.2f} s".format("in this process" if processes == 1 else "across worker processes",
+                                             time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
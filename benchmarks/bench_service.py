@@ -0,0 +1,154 @@
+"""
+Load generator for the HTTP service (cli.py serve). Starts the service in its own process with a journal and a network
+of 20 hospitals with 500 beds each, then opens CLIENTS keep-alive connections from one asyncio event loop. Each client
+keeps repeating: admit a patient, look it up, update its status to 0, read the census of its hospital and discharge it.
+Reports requests per second and the p50 and p99 latency of every kind of request, with the writer applying up to 1
+change at a time and up to 256 at a time.
+"""
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from hospital_network import HospitalNetwork
+
+CLIENTS = 2000
+DURATION = 8  # seconds of load for every setting
+MAX_BATCHES = [1, 256]
+
+
+async def request(reader, writer, method, path, payload=None):
+    """
+    request sends one request on a keep-alive connection and returns the status code and json payload of the answer
+    :param reader: asyncio.StreamReader
+    :param writer: asyncio.StreamWriter
+    :param method: str
+    :param path: str
+    :param payload: dict or None
+    :return: list of [int, object]
+    """
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write("{} {} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {}\r\n\r\n".format(method, path, len(body))
+                 .encode("latin-1") + body)
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split()[1])
+    length = 0
+    for line in head[1:]:
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return [status, json.loads(await reader.readexactly(length))]
+
+
+async def client(port, hospitals, deadline, latencies):
+    """
+    client repeats the admit, look up, update, census and discharge cycle until deadline, recording the latency of
+        every request by kind
+    :param port: int
+    :param hospitals: List of str
+    :param deadline: float
+    :param latencies: dict
+    :return: None
+    """
+    rng = random.Random()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < deadline:
+            hospital = rng.choice(hospitals)
+            steps = [("add", "POST", "/patients", {"hospital": hospital, "status": "1", "covid": "false"})]
+            for kind, method, path, payload in steps:
+                start = time.perf_counter()
+                status, answer = await request(reader, writer, method, path, payload)
+                latencies[kind].append(time.perf_counter() - start)
+                if status >= 300:
+                    raise RuntimeError("{} {} failed: {} {}".format(method, path, status, answer))
+                if kind == "add":
+                    patient = "/patients/" + answer["id"]
+                    steps += [("lookup", "GET", patient, None),
+                              ("update", "POST", patient + "/update", {"status": "0"}),
+                              ("census", "GET", "/hospitals/" + quote(hospital), None),
+                              ("discharge", "POST", patient + "/discharge", None)]
+    finally:
+        writer.close()
+
+
+async def generate_load(port, hospitals):
+    """
+    generate_load runs CLIENTS clients for DURATION seconds and returns the latencies of their requests by kind, the
+        time taken and the stats of the service
+    :param port: int
+    :param hospitals: List of str
+    :return: list of [dict, float, dict]
+    """
+    latencies = {kind: [] for kind in ["add", "lookup", "update", "census", "discharge"]}
+    start = time.perf_counter()
+    await asyncio.gather(*[client(port, hospitals, start + DURATION, latencies) for _ in range(CLIENTS)])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    stats = (await request(reader, writer, "GET", "/stats"))[1]
+    writer.close()
+    return [latencies, elapsed, stats]
+
+
+def start_service(work_dir, max_batch):
+    """
+    start_service starts the service in its own process and returns the process and the port it listens on
+    :param work_dir: str
+    :param max_batch: int
+    :return: list of [subprocess.Popen, int]
+    """
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "cli.py"), "--network", "network.csv", "serve",
+                                "--port", "0", "--storage", "journal", "--max-batch", str(max_batch)],
+                               cwd=work_dir, stdout=subprocess.PIPE, universal_newlines=True)
+    for line in process.stdout:
+        if "http://" in line:
+            return [process, int(line.rsplit(":", 1)[1])]
+    raise RuntimeError("the service did not start")
+
+
+def percentile(values, fraction):
+    """
+    percentile returns the value at fraction (0 - 1) of the sorted values
+    :param values: List of float
+    :param fraction: float
+    :return: float
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    network = HospitalNetwork([("Hospital {}".format(i), 500, 1) for i in range(20)])
+    hospitals = [name.lower() for name in network.get_names()]
+    print("{} clients, {} s per setting".format(CLIENTS, DURATION))
+    print("{:>10} {:<10} {:>10} {:>10} {:>10}".format("max batch", "request", "per s", "p50 (ms)", "p99 (ms)"))
+    for max_batch in MAX_BATCHES:
+        with tempfile.TemporaryDirectory() as work_dir:
+            network.write_csv(os.path.join(work_dir, "network.csv"))
+            process, port = start_service(work_dir, max_batch)
+            try:
+                latencies, elapsed, stats = asyncio.run(generate_load(port, hospitals))
+            finally:
+                process.terminate()
+                process.wait()
+        every = [latency for values in latencies.values() for latency in values]
+        for kind, values in list(latencies.items()) + [("all", every)]:
+            print("{:>10} {:<10} {:>10.0f} {:>10.2f} {:>10.2f}".format(
+                max_batch, kind, len(values) / elapsed, percentile(values, 0.5) * 1000,
+                percentile(values, 0.99) * 1000))
+        print("{:>10} mean latency of all requests: {:.2f} ms, {:.1f} changes per batch on average".format(
+            max_batch, statistics.mean(every) * 1000, stats["changes"] / max(stats["batches"], 1)))
+
+
+if __name__ == "__main__":
+    main()
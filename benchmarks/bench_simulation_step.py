@@ -0,0 +1,79 @@
+"""
+Benchmark for the daily severity status update of SimulateData. Admits a population of patients to a large network and
+times increment_days and update_sev_status for the pandas and vectorized engines, reporting patient-days processed per
+second. Both engines are run from the same seed and must end in the same state.
+"""
+import contextlib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospitals import Hospital
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from simulate_data import SimulateData
+
+NUM_HOSPITALS = 1000
+SIZES = {"pandas": [10000, 100000], "vectorized": [10000, 100000, 1000000]}
+DAYS = 10
+
+
+def build_simulation(engine, num_patients):
+    """
+    build_simulation creates a SimulateData with the given engine and admits num_patients patients
+    :param engine: str
+    :param num_patients: int
+    :return: list of [SimulateData, PatientManagementSystem]
+    """
+    random.seed(num_patients)
+    beds = num_patients // NUM_HOSPITALS + 1
+    system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=6, letters=1),
+                                     hospitals=[Hospital("hospital_{}".format(i), beds, 0, {})
+                                                for i in range(NUM_HOSPITALS)])
+    simulation = SimulateData(engine=engine, system=system)
+    names = list(system.hospitals.keys())
+    for i in range(num_patients):
+        simulation.admit_patient(names[i % NUM_HOSPITALS])
+        if i % 4 == 0:
+            simulation.increment_days()  # spread the days stayed out
+    return [simulation, system]
+
+
+def run_days(simulation):
+    """
+    run_days runs DAYS simulated days of status updates and returns the patient-days processed and the time taken
+    :param simulation: SimulateData
+    :return: list of [int, float]
+    """
+    patient_days = 0
+    start = time.perf_counter()
+    for _ in range(DAYS):
+        patient_days += simulation.patients_tracked()
+        simulation.increment_days()
+        simulation.update_sev_status()
+    return [patient_days, time.perf_counter() - start]
+
+
+def main():
+    print("{:>12} {:>10} {:>22}".format("engine", "patients", "patient-days per s"))
+    final_states = {}
+    with open(os.devnull, 'w') as devnull:
+        for engine, sizes in SIZES.items():
+            for num_patients in sizes:
+                with contextlib.redirect_stdout(devnull):  # every admission and discharge is reported
+                    simulation, system = build_simulation(engine, num_patients)
+                    patient_days, elapsed = run_days(simulation)
+                final_states[(engine, num_patients)] = [patient.get_info()
+                                                        for patient in system.get_values_or_keys("values")]
+                print("{:>12} {:>10} {:>22.3g}".format(engine, num_patients, patient_days / elapsed))
+
+    for num_patients in SIZES["pandas"]:
+        assert final_states[("pandas", num_patients)] == final_states[("vectorized", num_patients)]
+    print("Both engines ended in the same state.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark for saving the simulation state every day. A network of 1,000 hospitals with 50 beds each is filled with
+40,000 patients, then SNAPSHOTS states are saved as hospital_state_<number>.csv files, to a SnapshotLog and to a
+SnapshotLog with the patient ids. Reports the time and size of one saved state, what that comes to for two years of
+daily states, and the time to read one state back (parsing a csv file, or streaming a record of the log and counting
+its covid positive patients). The rows read and the covid positive patients counted are added up into a checksum, which
+is printed so the reads are not skipped.
+"""
+import contextlib
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital_network import HospitalNetwork
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from simulate_data import SimulateData
+from snapshot_log import COVID_BIT, SnapshotLog
+
+HOSPITALS = 1000
+BEDS = 50
+PATIENTS = 40000
+SNAPSHOTS = 30
+DAYS = 730  # two years of daily states
+
+
+def make_simulation(snapshot_log):
+    """
+    make_simulation returns a simulation of a filled network that saves its states to snapshot_log (or csv files if
+        None)
+    :param snapshot_log: SnapshotLog or None
+    :return: SimulateData
+    """
+    rng = random.Random(1)
+    network = HospitalNetwork([("Hospital {}".format(i), BEDS, 1) for i in range(HOSPITALS)])
+    system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=5, letters=1, rng=rng),
+                                     hospitals=network.make_hospitals())
+    names = list(system.hospitals)
+    for i in range(PATIENTS):
+        system.create_patient(names[i % HOSPITALS], rng.choice("123"), rng.choice(["true", "false"]))
+    return SimulateData(system=system, network=network, snapshot_every=1, snapshot_log=snapshot_log)
+
+
+def time_saves(simulation):
+    """
+    time_saves returns the average time of saving one state
+    :param simulation: SimulateData
+    :return: float
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # write_to_csv reports every file
+        for day in range(1, SNAPSHOTS + 1):
+            simulation.save_snapshot(day)
+    return (time.perf_counter() - start) / SNAPSHOTS
+
+
+def main():
+    start_dir = os.getcwd()
+    print("{:<16} {:>14} {:>14} {:>18} {:>16} {:>14} {:>10}".format("format", "save (ms)", "size (KB)", "2 years (s)",
+                                                                     "2 years (MB)", "read (ms)", "checksum"))
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)  # the states are written here
+        try:
+            save = time_saves(make_simulation(None))
+            size = sum(os.path.getsize(name) for name in os.listdir(work_dir)) / SNAPSHOTS
+            checksum = 0
+            start = time.perf_counter()
+            for day in range(1, SNAPSHOTS + 1):
+                with open("hospital_state_{:02d}.csv".format(day), 'r') as csv_file:
+                    checksum += len(list(csv.reader(csv_file)))
+            read = (time.perf_counter() - start) / SNAPSHOTS
+            print("{:<16} {:>14.2f} {:>14.1f} {:>18.1f} {:>16.1f} {:>14.2f} {:>10}".format(
+                "csv files", save * 1000, size / 1024, save * DAYS, size * DAYS / 1024 ** 2, read * 1000, checksum))
+
+            for with_ids in [False, True]:
+                snapshot_log = SnapshotLog("states_{}.snapshots".format(with_ids), with_ids=with_ids)
+                save = time_saves(make_simulation(snapshot_log))
+                snapshot_log.close()
+                size = os.path.getsize(snapshot_log.get_file_name()) / SNAPSHOTS
+                checksum = 0
+                start = time.perf_counter()
+                for day, counts, codes, ids in snapshot_log.read_days():
+                    checksum += sum(codes.count(bytes([status | COVID_BIT])) for status in range(4))
+                read = (time.perf_counter() - start) / SNAPSHOTS
+                print("{:<16} {:>14.2f} {:>14.1f} {:>18.1f} {:>16.1f} {:>14.2f} {:>10}".format(
+                    "log with ids" if with_ids else "log", save * 1000, size / 1024, save * DAYS,
+                    size * DAYS / 1024 ** 2, read * 1000, checksum))
+        finally:
+            os.chdir(start_dir)
+
+
+if __name__ == "__main__":
+    main()
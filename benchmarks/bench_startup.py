@@ -0,0 +1,56 @@
+"""
+Startup benchmark for the command line interface. Times a cold start of "python cli.py manage" that exits straight
+away (median of 20 runs in a fresh interpreter each) next to the start of a bare interpreter, and checks which of the
+heavy dependencies (pandas, NumPy, matplotlib) each module loads when it is imported.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 20
+MODULES = ["cli", "patient_management_system", "simulate_data", "system_plots", "journal", "hospital_network"]
+HEAVY = ["pandas", "numpy", "matplotlib"]
+
+
+def time_command(command, stdin, work_dir):
+    """
+    time_command returns the median wall time of running command RUNS times
+    :param command: List of str
+    :param stdin: str
+    :param work_dir: str
+    :return: float
+    """
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(command, input=stdin, cwd=work_dir, stdout=subprocess.DEVNULL, check=True,
+                       universal_newlines=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        bare = time_command([sys.executable, "-c", "pass"], "", work_dir)
+        manage = time_command([sys.executable, os.path.join(ROOT, "cli.py"), "manage"], "exit\n", work_dir)
+        help_text = time_command([sys.executable, os.path.join(ROOT, "cli.py"), "--help"], "", work_dir)
+
+        print("{:<28} {:>10} {:>18}".format("command", "time (ms)", "over python (ms)"))
+        for name, seconds in [("python -c pass", bare), ("cli.py --help", help_text), ("cli.py manage", manage)]:
+            print("{:<28} {:>10.1f} {:>18.1f}".format(name, seconds * 1000, (seconds - bare) * 1000))
+
+        print("\nHeavy modules loaded by importing:")
+        for module in MODULES:
+            code = "import sys; sys.path.insert(0, {!r}); import {}; print(','.join(m for m in {!r} if m in " \
+                   "sys.modules))".format(ROOT, module, HEAVY)
+            loaded = subprocess.run([sys.executable, "-c", code], cwd=work_dir, stdout=subprocess.PIPE, check=True,
+                                    universal_newlines=True).stdout.strip()
+            print("{:<28} {}".format(module, loaded or "none"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark for loading a hospital state file into an empty PatientManagementSystem. For state files of 10,000 to
+1,000,000 patients in networks of 3 and 3,000 hospitals it times loading every row one by one with load_patient (as
+read_in_csv used to) next to read_in_csv with a StateLoader, in rows per second, for a clean file and for a file with
+1% bad rows (duplicate ids, unknown hospitals, invalid statuses and short rows) that the StateLoader rejects.
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital_network import HospitalNetwork
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from state_loader import StateLoader
+
+STATE_SIZES = [10 ** 4, 10 ** 5, 10 ** 6]
+HOSPITALS = [3, 3000]
+BAD_ROWS = 0.01
+
+
+def write_state(file_name, num_patients, num_hospitals, bad_rows):
+    """
+    write_state writes a state file of num_patients patients spread over num_hospitals hospitals, with a fraction,
+        bad_rows, of the rows made invalid
+    :param file_name: str
+    :param num_patients: int
+    :param num_hospitals: int
+    :param bad_rows: float
+    :return: None
+    """
+    rng = random.Random(1)
+    allocator = PatientIdAllocator(digits=6, letters=1, rng=rng)
+    with open(file_name, 'w') as csv_file:
+        writer = csv.writer(csv_file, lineterminator='\n')
+        writer.writerow(["", "Patient_ID", "Hospital", "Status", "Covid_Positive"])
+        first_id = None
+        for number in range(num_patients):
+            row = [number, allocator.allocate(), "Hospital {}".format(number % num_hospitals), rng.choice("0123"),
+                   rng.choice(["true", "false"])]
+            first_id = first_id or row[1]
+            if rng.random() < bad_rows:
+                bad = rng.randrange(4)
+                if bad == 0:
+                    row[1] = first_id
+                elif bad == 1:
+                    row[2] = "Nowhere"
+                elif bad == 2:
+                    row[3] = "9"
+                else:
+                    row = row[:3]
+            writer.writerow(row)
+
+
+def make_system(num_patients, num_hospitals):
+    """
+    make_system returns an empty PatientManagementSystem with num_hospitals hospitals with room for num_patients
+    :param num_patients: int
+    :param num_hospitals: int
+    :return: PatientManagementSystem
+    """
+    beds = num_patients // num_hospitals + 1
+    network = HospitalNetwork([("Hospital {}".format(i), beds, 1) for i in range(num_hospitals)])
+    return PatientManagementSystem(id_allocator=PatientIdAllocator(digits=6, letters=1),
+                                   hospitals=network.make_hospitals())
+
+
+def load_rows(system, file_name):
+    """
+    load_rows loads the state file file_name into system one row at a time with load_patient, skipping the rows
+        load_patient fails on
+    :param system: PatientManagementSystem
+    :param file_name: str
+    :return: None
+    """
+    with open(file_name, 'r') as csv_file:
+        reader = csv.reader(csv_file)
+        next(reader)  # skip header
+        for row in reader:
+            try:
+                system.load_patient(row[1], row[2], row[3], row[4])
+            except (AttributeError, IndexError):
+                pass
+
+
+def main():
+    work_dir = tempfile.mkdtemp()
+    print("{:>10} {:>10} {:>6} {:>20} {:>20} {:>10}".format("patients", "hospitals", "bad", "load_patient (rows/s)",
+                                                            "StateLoader (rows/s)", "rejected"))
+    for num_patients in STATE_SIZES:
+        for num_hospitals in HOSPITALS:
+            for bad_rows in [0, BAD_ROWS]:
+                file_name = os.path.join(work_dir, "state.csv")
+                write_state(file_name, num_patients, num_hospitals, bad_rows)
+                system = make_system(num_patients, num_hospitals)
+                start = time.perf_counter()
+                load_rows(system, file_name)
+                rows_time = time.perf_counter() - start
+                system = make_system(num_patients, num_hospitals)
+                start = time.perf_counter()
+                report = StateLoader().load(system, file_name)
+                loader_time = time.perf_counter() - start
+                print("{:>10} {:>10} {:>6.0%} {:>20.0f} {:>20.0f} {:>10}".format(
+                    num_patients, num_hospitals, bad_rows, num_patients / rows_time, num_patients / loader_time,
+                    report.get_rejected()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark for the storages of a PatientManagementSystem at 10^5 and 10^6 patients spread over 100 hospitals. Times the
+startup (load_state) from the csv state file, from a journal snapshot and from a SQLite database, and from the SQLite
+database for a system made up of only one of the hospitals. Then times an update of one patient followed by
+save_state, the latency of committing one action, for every storage.
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_storage import CsvStorage
+from event_bus import EventBus
+from hospital_network import HospitalNetwork
+from journal import OperationJournal
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from sqlite_storage import SqliteStorage
+
+CENSUS_SIZES = [10 ** 5, 10 ** 6]
+HOSPITALS = 100
+ACTIONS = {"csv": 3, "journal": 2000, "sqlite": 2000, "sqlite (sync)": 200}  # actions timed for every storage
+
+
+def write_initial_state(file_name, num_patients):
+    """
+    write_initial_state writes a state file of num_patients patients spread over HOSPITALS hospitals
+    :param file_name: str
+    :param num_patients: int
+    :return: None
+    """
+    allocator = PatientIdAllocator(digits=6, letters=1, rng=random.Random(1))
+    with open(file_name, 'w') as csv_file:
+        writer = csv.writer(csv_file, lineterminator='\n')
+        writer.writerow(["", "Patient_ID", "Hospital", "Status", "Covid_Positive"])
+        for i in range(num_patients):
+            writer.writerow([i, allocator.allocate(), "hospital {}".format(i % HOSPITALS), i % 4,
+                             "true" if i % 3 == 0 else "false"])
+
+
+def make_system(storage, num_patients, hospitals=HOSPITALS):
+    """
+    make_system returns an empty system of hospitals hospitals big enough to hold num_patients patients
+    :param storage: CsvStorage or OperationJournal or SqliteStorage
+    :param num_patients: int
+    :param hospitals: int
+    :return: PatientManagementSystem
+    """
+    network = HospitalNetwork([("Hospital {}".format(i), num_patients, 1) for i in range(hospitals)])
+    return PatientManagementSystem(id_allocator=PatientIdAllocator(digits=6, letters=1),
+                                   hospitals=network.make_hospitals(), storage=storage, events=EventBus([]))
+
+
+def time_load(storage, num_patients, hospitals=HOSPITALS):
+    """
+    time_load returns a system loaded from storage and the time taken to load it
+    :param storage: CsvStorage or OperationJournal or SqliteStorage
+    :param num_patients: int
+    :param hospitals: int
+    :return: list of [PatientManagementSystem, float]
+    """
+    system = make_system(storage, num_patients, hospitals)
+    start = time.perf_counter()
+    system.load_state()
+    return [system, time.perf_counter() - start]
+
+
+def time_actions(system, actions):
+    """
+    time_actions returns the average time of changing a patient's status and saving the state
+    :param system: PatientManagementSystem
+    :param actions: int
+    :return: float
+    """
+    patients = list(system.hospitals["hospital 0"].get_patients().values())[:actions]
+    updates = [{"op": "update", "id": patient.get_id(), "status": str((int(patient.get_status()) + 1) % 4)}
+               for patient in patients]
+    start = time.perf_counter()
+    for update in updates:
+        system.apply_operation(update)
+        system.save_state()
+    return (time.perf_counter() - start) / len(updates)
+
+
+def main():
+    start_dir = os.getcwd()
+    print("{:>10} {:<16} {:>14} {:>20}".format("patients", "storage", "startup (s)", "commit (us/action)"))
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)  # the state files are written here
+        try:
+            for num_patients in CENSUS_SIZES:
+                write_initial_state("initial_hospital_state.csv", num_patients)
+                storages = [("csv", lambda: CsvStorage()),
+                            ("journal", lambda: OperationJournal(compact_every=10 ** 9)),
+                            ("sqlite", lambda: SqliteStorage("hospital_state.db")),
+                            ("sqlite (sync)", lambda: SqliteStorage("hospital_state.db", sync=True))]
+                for name, make_storage in storages:
+                    if name == "journal":  # write the snapshot that the journal starts up from
+                        storage = make_storage()
+                        time_load(storage, num_patients)
+                        storage.close()
+                    elif name == "sqlite" and os.path.exists("hospital_state.db"):
+                        os.remove("hospital_state.db")
+                    if name == "sqlite":  # import initial_hospital_state.csv into a new database
+                        storage = make_storage()
+                        time_load(storage, num_patients)
+                        storage.close()
+
+                    storage = make_storage()
+                    system, startup = time_load(storage, num_patients)
+                    commit = time_actions(system, ACTIONS[name])
+                    storage.close()
+                    del system
+                    print("{:>10} {:<16} {:>14.2f} {:>20.1f}".format(num_patients, name, startup, commit * 1e6))
+
+                storage = SqliteStorage("hospital_state.db")
+                startup = time_load(storage, num_patients, hospitals=1)[1]
+                storage.close()
+                print("{:>10} {:<16} {:>14.2f} {:>20}".format(num_patients, "sqlite, 1 of {}".format(HOSPITALS),
+                                                               startup, "-"))
+                for file_name in os.listdir(work_dir):
+                    os.remove(file_name)
+        finally:
+            os.chdir(start_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Stress test and benchmark for the thread-safe mode of PatientManagementSystem. Many threads call apply_operation at
+once on a network of 16 hospitals with 100 beds each, admitting, updating, transferring and discharging patients (their
+own and each other's). Once they are done the bed counts, the uniqueness of the patient ids, the patient index, the bed
+availability structure, the severity index and the census counts are checked against the hospitals. Reports operations
+per second as the number of threads grows, next to one thread without thread-safe mode. A first round runs with a very
+short thread switch interval so the threads are interleaved as often as possible.
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_bus import EventBus
+from hospital_network import HospitalNetwork
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem, STATUSES
+
+HOSPITALS = 16
+BEDS = 100
+OPERATIONS = 200000  # split between the threads
+THREAD_COUNTS = [1, 2, 4, 8, 16]
+
+
+def make_system(thread_safe):
+    """
+    make_system returns an empty system of HOSPITALS hospitals and its id allocator
+    :param thread_safe: Bool
+    :return: list of [PatientManagementSystem, PatientIdAllocator]
+    """
+    network = HospitalNetwork([("Hospital {}".format(i), BEDS, 1) for i in range(HOSPITALS)])
+    allocator = PatientIdAllocator(digits=5, letters=1)
+    system = PatientManagementSystem(id_allocator=allocator, hospitals=network.make_hospitals(),
+                                     thread_safe=thread_safe, events=EventBus([]))
+    return [system, allocator]
+
+
+def worker(system, operations, seed, shared_ids, counts):
+    """
+    worker applies operations random operations to system. Half of the patients it picks are ones it admitted itself,
+        the others come from shared_ids, the patients admitted by every thread (some of them long discharged). The
+        number of adds and discharges that succeeded is added to counts.
+    :param system: PatientManagementSystem
+    :param operations: int
+    :param seed: int
+    :param shared_ids: List of str
+    :param counts: dict
+    :return: None
+    """
+    rng = random.Random(seed)
+    names = list(system.hospitals)
+    own_ids = []
+    added = discharged = 0
+    for _ in range(operations):
+        kind = rng.random()
+        if kind < 0.3 or not own_ids:
+            result = system.apply_operation({"op": "add", "hospital": rng.choice(names), "status": rng.choice(STATUSES),
+                                             "covid": rng.choice(["true", "false"])})
+            if result["ok"]:
+                added += 1
+                own_ids.append(result["id"])
+                shared_ids.append(result["id"])
+            continue
+        own_index = rng.randrange(len(own_ids)) if rng.random() < 0.5 else None
+        if own_index is not None:
+            patient_id = own_ids[own_index]
+        else:
+            patient_id = shared_ids[rng.randrange(len(shared_ids))]
+        if kind < 0.55:
+            result = system.apply_operation({"op": "update", "id": patient_id, "status": rng.choice(STATUSES)})
+        elif kind < 0.8:
+            result = system.apply_operation({"op": "transfer", "id": patient_id, "hospital": rng.choice(names)})
+        else:
+            system.apply_operation({"op": "update", "id": patient_id, "status": "0"})
+            result = system.apply_operation({"op": "discharge", "id": patient_id})
+            discharged += result["ok"]
+            if own_index is not None and result["ok"]:
+                own_ids[own_index] = own_ids[-1]  # swap it out, the order of own_ids does not matter
+                own_ids.pop()
+    with counts["lock"]:
+        counts["added"] += added
+        counts["discharged"] += discharged
+
+
+def check_invariants(system, allocator, counts):
+    """
+    check_invariants raises AssertionError if the state of system does not add up
+    :param system: PatientManagementSystem
+    :param allocator: PatientIdAllocator
+    :param counts: dict
+    :return: None
+    """
+    all_ids = []
+    for name, hospital in system.hospitals.items():
+        patients = hospital.get_patients()
+        assert len(patients) <= hospital.get_total_beds(), "{} holds more patients than beds".format(name)
+        assert hospital.available_beds() == hospital.get_total_beds() - len(patients), \
+            "the bed count of {} is off".format(name)
+        for patient_id, patient in patients.items():
+            assert system.find_patient_hospital(patient_id) is hospital, "{} is indexed wrongly".format(patient_id)
+            assert patient.get_info()[1] == name, "{} has the wrong hospital name".format(patient_id)
+        lowest = ""
+        for status in ["0", "1", "2"]:
+            lowest = next((patient_id for patient_id, patient in patients.items()
+                           if patient.get_status() == status), "")
+            if lowest:
+                break
+        assert hospital.lowest_status_patient() == lowest, "the severity index of {} is off".format(name)
+        severity = [[sum(patient.get_status() == status and patient.get_covid_positive() == covid_positive
+                         for patient in patients.values()) for status in STATUSES]
+                    for covid_positive in ["false", "true"]]
+        census = system.census_stats(name)
+        assert [census["severity_covid_negative"], census["severity_covid_positive"]] == severity, \
+            "the census of {} is off".format(name)
+        all_ids.extend(patients)
+    assert len(all_ids) == len(set(all_ids)), "a patient id is in use twice"
+    assert len(all_ids) == counts["added"] - counts["discharged"], "patients were lost or made up"
+    assert allocator.available() == allocator.get_capacity() - len(all_ids), "the id allocator is off"
+    census = system.census_stats()
+    assert census["patients"] == len(all_ids), "the census of the network is off"
+    assert census["severity"] == [sum(system.census_stats(name)["severity"][status] for name in system.hospitals)
+                                  for status in range(4)], "the census of the network is off"
+
+    open_hospitals = [name for name, hospital in system.hospitals.items() if hospital.available_beds() > 0]
+    assert system.hospital_availability() == open_hospitals, "the bed availability is off"
+    most = max(system.hospitals.values(), key=lambda hospital: hospital.available_beds())
+    expected = most.get_name().lower() if most.available_beds() > 0 else ""
+    assert system.hospital_with_most_beds() == expected, "the hospital with the most beds is off"
+
+
+def run(threads, thread_safe=True):
+    """
+    run applies OPERATIONS operations split between threads threads, checks the invariants and returns the time taken
+    :param threads: int
+    :param thread_safe: Bool
+    :return: float
+    """
+    system, allocator = make_system(thread_safe)
+    shared_ids = []
+    counts = {"lock": threading.Lock(), "added": 0, "discharged": 0}
+    workers = [threading.Thread(target=worker, args=(system, OPERATIONS // threads, seed, shared_ids, counts))
+               for seed in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    check_invariants(system, allocator, counts)
+    return elapsed
+
+
+def main():
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible
+    try:
+        for threads in [8, 16]:
+            run(threads)
+        print("stress rounds of 8 and 16 threads with a 1 us switch interval: invariants hold")
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    print("{:>8} {:>12} {:>12} {:>18}".format("threads", "mode", "time (s)", "operations per s"))
+    elapsed = run(1, thread_safe=False)
+    print("{:>8} {:>12} {:>12.3f} {:>18,.0f}".format(1, "unlocked", elapsed, OPERATIONS / elapsed))
+    for threads in THREAD_COUNTS:
+        elapsed = run(threads)
+        print("{:>8} {:>12} {:>12.3f} {:>18,.0f}".format(threads, "thread-safe", elapsed, OPERATIONS / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Benchmark suite of the core operations, run non-interactively against generated states of 10^2 to 10^6 patients in
+networks of 3 to 3,000 hospitals. For every scale (patients, hospitals) of SCALES a simulation is filled with the
+patients and then these cases are timed:
+    - add_patient: PatientManagementSystem.addPatient (seconds per patient)
+    - find_patient_hospital: looking up the hospital of a patient by id (seconds per lookup)
+    - make_rows_df: the rows of the patient table of the text interface (seconds per call)
+    - write_out_csv / read_in_csv: saving the state to a csv file and loading it into an empty system (seconds)
+    - plot_read_in_csv: SystemPlots.read_in_csv of PLOT_STATES saved states (seconds)
+    - update_sev_status: one simulated day's status changes and discharges of the pandas engine (seconds)
+Every result is the best of a few runs (one run at the largest scales) and is written to a json file. Given a
+baseline (a results file of an earlier run) every case is compared with it and the suite exits with status 1 if any
+case is slower than its baseline by more than the threshold.
+
+    python benchmarks/run_suite.py [--quick] [--output <file>] [--baseline <file>] [--threshold <fraction>]
+                                   [--cases <case>,<case>...]
+
+e.g. save a baseline with "python benchmarks/run_suite.py --output baseline.json" and check a change against it with
+"python benchmarks/run_suite.py --baseline baseline.json". --quick only runs the scales of up to 10^4 patients.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_bus import EventBus
+from hospital_network import HospitalNetwork
+from patient_ids import PatientIdAllocator
+from patient_management_system import PatientManagementSystem
+from simulate_data import SimulateData
+
+# (patients, hospitals) of every state the cases are run against
+SCALES = [(10 ** 2, 3), (10 ** 3, 3), (10 ** 3, 300), (10 ** 4, 3), (10 ** 4, 3000), (10 ** 5, 3), (10 ** 5, 3000),
+          (10 ** 6, 3), (10 ** 6, 3000)]
+QUICK_PATIENTS = 10 ** 4  # largest number of patients of the scales run with --quick
+CASES = ["add_patient", "find_patient_hospital", "make_rows_df", "write_out_csv", "read_in_csv", "plot_read_in_csv",
+         "update_sev_status"]
+CALLS = 1000  # calls timed by the cases that time one call many times
+PLOT_STATES = 3
+DEFAULT_THRESHOLD = 0.25
+
+
+def build_simulation(num_patients, num_hospitals):
+    """
+    build_simulation returns a simulation with the pandas engine whose network of num_hospitals hospitals (with room
+        for everyone) has been filled with num_patients patients admitted by the simulation, so their days stayed are
+        tracked
+    :param num_patients: int
+    :param num_hospitals: int
+    :return: SimulateData
+    """
+    beds = num_patients // num_hospitals + CALLS
+    network = HospitalNetwork([("Hospital {}".format(i), beds, 1) for i in range(num_hospitals)])
+    system = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=6, letters=1, rng=random.Random(1)),
+                                     hospitals=network.make_hospitals(), events=EventBus([]))
+    simulation = SimulateData(engine="pandas", system=system, network=network, save_snapshots=False, seed=1,
+                              events=system.get_events())
+    names = list(system.hospitals)
+    for i in range(num_patients):
+        simulation.admit_patient(names[i % num_hospitals])
+    return simulation
+
+
+def best_of(runs, function):
+    """
+    best_of returns the shortest time of runs calls of function
+    :param runs: int
+    :param function: function
+    :return: float
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_scale(num_patients, num_hospitals, cases):
+    """
+    run_scale times the cases against a state of num_patients patients in num_hospitals hospitals, in the working
+        directory, and returns their times by case name. The cases that change the state run last, update_sev_status
+        before add_patient adds patients whose days stayed are not tracked.
+    :param num_patients: int
+    :param num_hospitals: int
+    :param cases: List of str
+    :return: dict
+    """
+    runs = 5 if num_patients <= QUICK_PATIENTS else 3 if num_patients < 10 ** 6 else 1
+    simulation = build_simulation(num_patients, num_hospitals)
+    system = simulation.get_system()
+    network = simulation.get_network()
+    rng = random.Random(2)
+    results = {}
+
+    if "find_patient_hospital" in cases:
+        ids = rng.sample(system.get_values_or_keys("keys"), min(CALLS, num_patients))
+
+        def find_patients():
+            for patient_id in ids:
+                system.find_patient_hospital(patient_id)
+        results["find_patient_hospital"] = best_of(runs, find_patients) / len(ids)
+    if "make_rows_df" in cases:
+        max_length = max(len(hospital.get_patients()) for hospital in system.hospitals.values())
+        results["make_rows_df"] = best_of(runs, lambda: system.make_rows_df(max_length))
+    if "write_out_csv" in cases or "read_in_csv" in cases:
+        write_time = best_of(runs, lambda: system.write_out_csv("suite_state.csv"))  # read_in_csv reads this file
+        if "write_out_csv" in cases:
+            results["write_out_csv"] = write_time
+    if "read_in_csv" in cases:
+        def read_state():
+            empty = PatientManagementSystem(id_allocator=PatientIdAllocator(digits=6, letters=1),
+                                            hospitals=network.make_hospitals(), events=EventBus([]))
+            start = time.perf_counter()
+            empty.read_in_csv("suite_state.csv")
+            return time.perf_counter() - start
+        results["read_in_csv"] = min(read_state() for _ in range(runs))
+    if "plot_read_in_csv" in cases:
+        from system_plots import SystemPlots  # loads NumPy
+        for _ in range(PLOT_STATES):
+            simulation.write_to_csv()  # hospital_state_01.csv, hospital_state_02.csv, ...
+        plots = SystemPlots(network=network)
+        results["plot_read_in_csv"] = best_of(runs, plots.read_in_csv)
+    if "update_sev_status" in cases:
+        for _ in range(3):  # patients with a status of 2 change status after 3 days
+            simulation.increment_days()
+
+        def update_statuses():
+            simulation.increment_days()
+            simulation.update_sev_status()
+        results["update_sev_status"] = best_of(1, update_statuses)
+    if "add_patient" in cases:
+        names = list(system.hospitals)
+
+        def add_patients():
+            for i in range(CALLS):
+                system.addPatient(names[i % num_hospitals], "2", "false")
+        # every run adds CALLS more patients, there are beds for CALLS more in every hospital
+        results["add_patient"] = best_of(1, add_patients) / CALLS
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    compare returns the cases of results that are slower than in baseline by more than threshold (a fraction), as
+        [name, baseline time, time] lists, and prints how every case compares
+    :param results: dict
+    :param baseline: dict
+    :param threshold: float
+    :return: List of list
+    """
+    regressions = []
+    print("\n{:<50} {:>14} {:>14} {:>9}".format("case", "baseline (s)", "now (s)", "change"))
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        change = seconds / baseline[name] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append([name, baseline[name], seconds])
+        print("{:<50} {:>14.6g} {:>14.6g} {:>+8.1%}{}".format(name, baseline[name], seconds, change, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="run_suite.py", description="Benchmark suite of the core operations")
+    parser.add_argument("--quick", action="store_true",
+                        help="only run the scales of up to {} patients".format(QUICK_PATIENTS))
+    parser.add_argument("--output", default="benchmark_results.json",
+                        help="json file to write the results to (default: benchmark_results.json)")
+    parser.add_argument("--baseline", help="json results file of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown against the baseline that counts as a regression, as a fraction "
+                             "(default: {})".format(DEFAULT_THRESHOLD))
+    parser.add_argument("--cases", help="comma separated cases to run (default: all of {})".format(", ".join(CASES)))
+    args = parser.parse_args(argv)
+    cases = CASES if args.cases is None else args.cases.split(",")
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error("unknown cases: {}".format(", ".join(unknown)))
+    if "update_sev_status" in cases:
+        # imported by the first update_sev_status otherwise, which would be timed with it
+        importlib.import_module("pandas")
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    results = {}
+    output = os.path.abspath(args.output)
+    start_dir = os.getcwd()
+    print("{:<50} {:>14}".format("case", "seconds"))
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)  # the csv files of the cases are written here
+        try:
+            for num_patients, num_hospitals in SCALES:
+                if args.quick and num_patients > QUICK_PATIENTS:
+                    continue
+                scale_results = run_scale(num_patients, num_hospitals, cases)
+                for case in cases:
+                    name = "{}/patients={}/hospitals={}".format(case, num_patients, num_hospitals)
+                    results[name] = scale_results[case]
+                    print("{:<50} {:>14.6g}".format(name, results[name]))
+                for file_name in os.listdir(work_dir):
+                    os.remove(file_name)
+        finally:
+            os.chdir(start_dir)
+
+    with open(output, 'w') as output_file:
+        json.dump({"python": platform.python_version(), "machine": platform.platform(), "results": results},
+                  output_file, indent=2)
+        output_file.write("\n")
+    print("\nThe results have been saved to {}".format(output))
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\n{} case(s) are more than {:.0%} slower than the baseline".format(len(regressions),
+                                                                                    args.threshold))
+            sys.exit(1)
+        print("\nNo case is more than {:.0%} slower than the baseline".format(args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import collections
+import contextlib
+
+
+class Census:
+    """
+    Census keeps running counts of the patients of a hospital, or of the whole network: the number of patients with
+        every severity status (0 - 3), split into covid positive and covid negative patients. The counts are changed by
+        one addition for every admission, discharge and change of status, so reading them never scans the patients.
+        A Census can have a parent Census (the network census of a hospital's census) that every change is passed on
+        to, with lock given the changes of the parent are made under that lock.
+    """
+
+    def __init__(self, lock=None):
+        self.__counts = [0] * 8  # status + 4 if covid positive -> number of patients
+        self.__patients = 0
+        self.__covid_positive = 0
+        self.__parent = None
+        self.__lock = lock if lock is not None else contextlib.nullcontext()
+
+    def set_parent(self, parent):
+        """
+        set_parent passes every later change on to the Census, parent, after adding the patients counted so far to it
+        :param parent: Census
+        :return: None
+        """
+        for group, count in enumerate(self.__counts):
+            if count:
+                parent.__change(group, count)
+        self.__parent = parent
+
+    def admit(self, status, covid_positive):
+        """
+        admit counts a patient with status and covid_positive coming in
+        :param status: str
+        :param covid_positive: str
+        :return: None
+        """
+        self.__change(self.__group(status, covid_positive), 1)
+
+    def admit_many(self, statuses, covid_positives):
+        """
+        admit_many counts patients with statuses and covid_positives (lists in the same order) coming in, with one
+            addition per group of patients instead of one per patient
+        :param statuses: List of str
+        :param covid_positives: List of str
+        :return: None
+        """
+        for (status, covid_positive), count in collections.Counter(zip(statuses, covid_positives)).items():
+            self.__change(self.__group(status, covid_positive), count)
+
+    def discharge(self, status, covid_positive):
+        """
+        discharge counts a patient with status and covid_positive leaving
+        :param status: str
+        :param covid_positive: str
+        :return: None
+        """
+        self.__change(self.__group(status, covid_positive), -1)
+
+    def change_status(self, old_status, new_status, covid_positive):
+        """
+        change_status counts a patient with covid_positive going from old_status to new_status
+        :param old_status: str
+        :param new_status: str
+        :param covid_positive: str
+        :return: None
+        """
+        self.__change(self.__group(old_status, covid_positive), -1)
+        self.__change(self.__group(new_status, covid_positive), 1)
+
+    def get_patients(self):
+        """
+        get_patients returns the number of patients
+        :return: int
+        """
+        return self.__patients
+
+    def get_covid_positive(self):
+        """
+        get_covid_positive returns the number of covid positive patients
+        :return: int
+        """
+        return self.__covid_positive
+
+    def get_severity_counts(self, covid_positive=None):
+        """
+        get_severity_counts returns the number of patients with each severity status (0 - 3), of only the covid
+            positive ("true") or covid negative ("false") patients if covid_positive is given
+        :param covid_positive: str or None
+        :return: List of int
+        """
+        if covid_positive is None:
+            return [self.__counts[status] + self.__counts[status + 4] for status in range(4)]
+        start = 4 if covid_positive == "true" else 0
+        return self.__counts[start:start + 4]
+
+    def get_stats(self):
+        """
+        get_stats returns the counts in a dictionary: the number of patients, of covid positive patients and of
+            patients with each severity status, in total and split by covid status
+        :return: dict
+        """
+        return {"patients": self.__patients, "covid_positive": self.__covid_positive,
+                "severity": self.get_severity_counts(),
+                "severity_covid_positive": self.get_severity_counts("true"),
+                "severity_covid_negative": self.get_severity_counts("false")}
+
+    @staticmethod
+    def __group(status, covid_positive):
+        """
+        __group returns the position of the count of patients with status and covid_positive
+        :param status: str
+        :param covid_positive: str
+        :return: int
+        """
+        return int(status) + (4 if covid_positive == "true" else 0)
+
+    def __change(self, group, count):
+        """
+        __change adds count patients to group, and to the same group of the parent
+        :param group: int
+        :param count: int
+        :return: None
+        """
+        with self.__lock:
+            self.__counts[group] += count
+            self.__patients += count
+            if group >= 4:
+                self.__covid_positive += count
+        if self.__parent is not None:
+            self.__parent.__change(group, count)
@@ -0,0 +1,382 @@
+"""
+This program is the command line interface of the Patient Management System:
+    python cli.py manage      runs the text interface of the Patient Management System
+    python cli.py batch       applies a file (or stdin) of add, transfer, discharge and update commands
+    python cli.py serve       serves the Patient Management System over HTTP with json bodies
+    python cli.py export      writes the saved state of the system to a csv file
+    python cli.py validate    loads a hospital state file and reports the rows that would be rejected
+    python cli.py simulate    simulates the use of the system and saves its state every 10 days
+    python cli.py plot        simulates the system and plots the saved states
+Every command reads the hospitals from hospital_network.csv (or the file given with --network). The modules of a
+command are only imported once that command is chosen, so pandas, NumPy and matplotlib are not loaded by commands
+that do not need them.
+"""
+import argparse
+import contextlib
+import csv
+import sys
+
+
+def load_network(file_name):
+    """
+    load_network returns the HospitalNetwork in file_name, or the one in hospital_network.csv (or the default network)
+        if file_name is None
+    :param file_name: str or None
+    :return: HospitalNetwork
+    """
+    from hospital_network import HospitalNetwork
+    if file_name is None:
+        return HospitalNetwork.load()
+    return HospitalNetwork.read_csv(file_name)
+
+
+def run_manage(args, network):
+    """
+    run_manage runs the text interface of the Patient Management System for the hospitals of network
+    :param args: argparse.Namespace
+    :param network: HospitalNetwork
+    :return: None
+    """
+    system, storage = make_system(args, network, console=True)
+    try:
+        system.run_program()
+    finally:
+        storage.close()
+        system.get_events().close()
+
+
+def run_batch(args, network):
+    """
+    run_batch applies the commands of a batch file (or stdin), one per csv row:
+            add,<hospital>,<status>,<covid positive>
+            transfer,<patient id>,<hospital>
+            discharge,<patient id>
+            update,<patient id>,<status>
+        Empty rows and rows starting with # are skipped. The result of every command is written to stdout as csv and
+        the state is saved once at the end. Exits with status 1 if a command failed.
+    :param args: argparse.Namespace
+    :param network: HospitalNetwork
+    :return: None
+    """
+    system, storage = make_system(args, network)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):  # keep stdout for the results
+            system.load_state()
+
+        batch_file = sys.stdin if args.file == "-" else open(args.file, 'r', newline='')
+        with batch_file:
+            lines = []
+            operations = []
+            reader = csv.reader(batch_file)
+            for row in reader:
+                if not row or not "".join(row).strip() or row[0].lstrip().startswith("#"):
+                    continue
+                lines.append(reader.line_num)
+                operations.append(system.parse_operation(row))
+
+        results = system.apply_batch(operations, atomic=not args.keep_going)
+    finally:
+        storage.close()
+        system.get_events().close()
+
+    writer = csv.writer(sys.stdout, lineterminator='\n')
+    writer.writerow(["Line", "Command", "Patient_ID", "Result", "Error"])
+    failed = 0
+    for line, result in zip(lines, results):
+        failed += result["error"] is not None
+        outcome = "ok" if result["ok"] else "failed" if result["error"] is not None else "rolled back"
+        writer.writerow([line, result["op"], result["id"] or "", outcome, result["error"] or ""])
+    if failed and not args.keep_going:
+        print("{} of {} commands failed, none of the batch was applied.".format(failed, len(results)),
+              file=sys.stderr)
+    else:
+        print("{} of {} commands applied.".format(len(results) - failed, len(results)), file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+def run_serve(args, network):
+    """
+    run_serve serves the Patient Management System over HTTP until it is interrupted
+    :param args: argparse.Namespace
+    :param network: HospitalNetwork
+    :return: None
+    """
+    import asyncio
+    from patient_service import PatientService
+    system, storage = make_system(args, network)
+    try:
+        system.load_state()
+        service = PatientService(system, max_batch=args.max_batch)
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        print("The service has now stopped!")
+    finally:
+        storage.close()
+        system.get_events().close()
+
+
+def run_export(args, network):
+    """
+    run_export loads the saved state of the Patient Management System for the hospitals of network from its storage
+        and writes it to a csv file in the format of final_hospital_state.csv
+    :param args: argparse.Namespace
+    :param network: HospitalNetwork
+    :return: None
+    """
+    system, storage = make_system(args, network)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            system.load_state()
+        system.write_out_csv(args.file)
+    finally:
+        storage.close()
+
+
+def run_validate(args, network):
+    """
+    run_validate loads a hospital state file into an empty Patient Management System for the hospitals of network,
+        prints which rows were rejected and why and how fast it was loaded, and exits with status 1 if any row was
+        rejected
+    :param args: argparse.Namespace
+    :param network: HospitalNetwork
+    :return: None
+    """
+    import time
+    from patient_ids import PatientIdAllocator
+    from patient_management_system import PatientManagementSystem
+    from state_loader import StateLoader
+    system = PatientManagementSystem(id_allocator=PatientIdAllocator(args.digits, args.letters),
+                                     hospitals=network.make_hospitals())
+    loader = StateLoader(chunk_rows=args.chunk_rows, rejects_file=args.rejects_file)
+    start = time.perf_counter()
+    try:
+        report = loader.load(system, args.file)
+    except (OSError, UnicodeDecodeError, csv.Error) as error:
+        sys.exit("{} could not be read: {}".format(args.file, error))
+    seconds = time.perf_counter() - start
+    rows = report.get_loaded() + report.get_rejected()
+    print("{} rows of {} loaded in {:.2f} seconds ({:.0f} rows per second)".format(
+        report.get_loaded(), args.file, seconds, rows / seconds if seconds > 0 else 0))
+    if report.get_rejected() > 0:
+        for line in report.describe(args.show):
+            print(line)
+        sys.exit(1)
+
+
+def make_system(args, network, console=False):
+    """
+    make_system returns a PatientManagementSystem for the hospitals of network and the storage chosen with --storage.
+        Its events are printed if console is True and appended to the file given with --event-log, if any.
+    :param args: argparse.Namespace
+    :param network: HospitalNetwork
+    :param console: Bool
+    :return: list of [PatientManagementSystem, CsvStorage or OperationJournal or SqliteStorage]
+    """
+    from event_bus import AUDIT_EVENTS, EventBus
+    from event_sinks import ConsoleSink, JsonLinesSink
+    from patient_management_system import PatientManagementSystem
+    events = EventBus([ConsoleSink()] if console else [])
+    if getattr(args, "event_log", None) is not None:
+        events.subscribe(JsonLinesSink(args.event_log), AUDIT_EVENTS)
+    if args.storage == "journal":
+        from journal import OperationJournal
+        storage = OperationJournal(compact_every=args.compact_every)
+    elif args.storage == "sqlite":
+        from sqlite_storage import SqliteStorage
+        storage = SqliteStorage(args.database)
+    else:
+        from csv_storage import CsvStorage
+        storage = CsvStorage()
+    return [PatientManagementSystem(hospitals=network.make_hospitals(), storage=storage, events=events), storage]
+
+
+def run_simulate(args, network):
+    """
+    run_simulate runs a simulation of the Patient Management System for the hospitals of network
+    :param args: argparse.Namespace
+    :param network: HospitalNetwork
+    :return: None
+    """
+    from event_bus import AUDIT_EVENTS, EventBus
+    from event_sinks import ConsoleSink, JsonLinesSink
+    from simulate_data import SimulateData
+    from snapshot_log import SnapshotLog
+    # the progress is printed unless --quiet, the changes made are written to --event-log as json lines
+    events = EventBus([] if args.quiet else [ConsoleSink()])
+    if args.event_log is not None:
+        events.subscribe(JsonLinesSink(args.event_log), AUDIT_EVENTS)
+    if args.resume is not None:
+        # the network, options, patients and random state all come from the checkpoint
+        simulation = SimulateData.resume(args.resume, events=events)
+        snapshot_log = simulation.get_snapshot_log()
+    else:
+        snapshot_log = None
+        if args.snapshot_file is not None:
+            snapshot_log = SnapshotLog(args.snapshot_file, with_ids=args.snapshot_ids)
+        simulation = SimulateData(engine=args.engine, save_snapshots=not args.no_snapshots,
+                                  network=network, snapshot_every=args.snapshot_every, snapshot_log=snapshot_log,
+                                  census_file=args.census_file, checkpoint_file=args.checkpoint_file,
+                                  checkpoint_every=args.checkpoint_every, seed=args.seed, events=events)
+    try:
+        if args.events:
+            simulation.start_event_simulation(args.days)
+        else:
+            simulation.start_simulation(args.days)
+    finally:
+        if snapshot_log is not None:
+            snapshot_log.close()
+        events.close()
+
+
+def run_plot(args, network):
+    """
+    run_plot simulates the Patient Management System for the hospitals of network (unless --existing is given) and
+        plots the saved states, or saves the plots to --output-dir
+    :param args: argparse.Namespace
+    :param network: HospitalNetwork
+    :return: None
+    """
+    from system_plots import SystemPlots  # loads NumPy and matplotlib
+    plots = SystemPlots(network=network, snapshot_file=args.snapshot_file, snapshot_every=args.snapshot_every,
+                        output_dir=args.output_dir, seed=args.seed)
+    plots.run_plots(simulate=not args.existing, per_hospital=args.per_hospital, processes=args.processes)
+
+
+def make_parser():
+    """
+    make_parser returns the parser of the command line arguments
+    :return: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(prog="cli.py", description="Patient Management System")
+    parser.add_argument("--network", help="csv file of the hospital network (default: hospital_network.csv)")
+    parser.add_argument("--metrics-file",
+                        help="time the operations of the command and write the metrics to this file in the Prometheus "
+                             "text format when it exits")
+    parser.add_argument("--metrics-json", help="like --metrics-file, but writes a JSON summary of the metrics")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    manage = commands.add_parser("manage", help="add, transfer, discharge and update patients")
+    manage.set_defaults(run=run_manage)
+
+    batch = commands.add_parser("batch", help="apply a file of add, transfer, discharge and update commands")
+    batch.add_argument("file", nargs="?", default="-", help="csv file of commands (default: stdin)")
+    batch.add_argument("--keep-going", action="store_true",
+                       help="skip the commands that fail instead of applying none of the batch")
+    batch.set_defaults(run=run_batch)
+
+    serve = commands.add_parser("serve", help="serve the system over HTTP with json bodies")
+    serve.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8080, help="port to listen on, 0 picks a free one (default: 8080)")
+    serve.add_argument("--max-batch", type=int, default=256,
+                       help="most changes applied (and saved) together (default: 256)")
+    serve.set_defaults(run=run_serve)
+
+    export = commands.add_parser("export", help="write the saved state of the system to a csv file")
+    export.add_argument("file", nargs="?", default="final_hospital_state.csv",
+                        help="csv file to write (default: final_hospital_state.csv)")
+    export.set_defaults(run=run_export)
+
+    validate = commands.add_parser("validate", help="load a hospital state file and report the rows it rejects")
+    validate.add_argument("file", nargs="?", default="initial_hospital_state.csv",
+                          help="hospital state csv file to check (default: initial_hospital_state.csv)")
+    validate.add_argument("--rejects-file", help="write every rejected row with its line number and reason to this csv "
+                                                 "file")
+    validate.add_argument("--chunk-rows", type=int, default=100000,
+                          help="rows read and loaded at a time (default: 100000)")
+    validate.add_argument("--show", type=int, default=10, help="rejected rows to print (default: 10)")
+    validate.add_argument("--digits", type=int, default=3, help="digits of the patient ids (default: 3)")
+    validate.add_argument("--letters", type=int, default=1, help="letters of the patient ids (default: 1)")
+    validate.set_defaults(run=run_validate)
+
+    for command in [manage, batch, serve]:
+        command.add_argument("--event-log",
+                             help="append every admission, transfer, discharge and status change to this file as json "
+                                  "lines")
+
+    for command in [manage, batch, serve, export]:
+        command.add_argument("--storage", choices=["csv", "journal", "sqlite"], default="csv",
+                             help="rewrite final_hospital_state.csv after every action, journal every action or write "
+                                  "every action to a SQLite database (default: csv)")
+        command.add_argument("--compact-every", type=int, default=1000,
+                             help="journaled actions between snapshots (default: 1000)")
+        command.add_argument("--database", default="hospital_state.db",
+                             help="SQLite database of --storage sqlite (default: hospital_state.db)")
+
+    simulate = commands.add_parser("simulate", help="simulate the use of the system")
+    simulate.add_argument("--days", type=int, default=90, help="number of days to simulate (default: 90)")
+    simulate.add_argument("--engine", choices=["pandas", "vectorized"], default="pandas",
+                          help="how the daily status changes are worked out (default: pandas)")
+    simulate.add_argument("--events", action="store_true",
+                          help="only process the days that something happens on (discrete-event mode)")
+    simulate.add_argument("--seed", type=int, help="random seed, for a repeatable simulation")
+    simulate.add_argument("--no-snapshots", action="store_true", help="do not save the hospital state files")
+    simulate.add_argument("--census-file",
+                          help="write the census of every hospital at the end of every day to this csv file")
+    simulate.add_argument("--snapshot-ids", action="store_true",
+                          help="also save the patient ids to the file given with --snapshot-file")
+    simulate.add_argument("--checkpoint-file", help="save a checkpoint of the simulation to this file while it runs")
+    simulate.add_argument("--checkpoint-every", type=int, default=10,
+                          help="days between checkpoints (default: 10)")
+    simulate.add_argument("--resume", metavar="CHECKPOINT_FILE",
+                          help="carry on the simulation saved to this checkpoint file up to --days, the other "
+                               "simulation options are taken from the checkpoint")
+    simulate.add_argument("--quiet", action="store_true", help="do not print the progress of the simulation")
+    simulate.add_argument("--event-log",
+                          help="append every admission, transfer, discharge, status change and saved state to this "
+                               "file as json lines")
+    simulate.set_defaults(run=run_simulate)
+
+    plot = commands.add_parser("plot", help="simulate the system and plot the saved states")
+    plot.add_argument("--existing", action="store_true",
+                      help="plot the hospital state files in the working directory instead of simulating")
+    plot.add_argument("--seed", type=int, help="random seed, for a repeatable simulation")
+    plot.add_argument("--output-dir",
+                      help="save the plots as png files in this directory instead of showing them (no display needed)")
+    plot.add_argument("--per-hospital", action="store_true",
+                      help="with --output-dir, also save a chart set for every hospital")
+    plot.add_argument("--processes", type=int,
+                      help="worker processes rendering the charts of the hospitals (default: all cores)")
+    plot.set_defaults(run=run_plot)
+
+    for command in [simulate, plot]:
+        command.add_argument("--snapshot-every", type=int, default=10,
+                             help="days between saved states, 1 saves every day (default: 10)")
+        command.add_argument("--snapshot-file",
+                             help="save the states to (or plot them from) this one streaming file instead of a "
+                                  "hospital_state_<number>.csv file per state")
+    return parser
+
+
+def main(argv=None):
+    """
+    Parses the command line arguments, argv (sys.argv by default), and runs the chosen command
+    :param argv: List of str or None
+    :return: None
+    """
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "per_hospital", False) and args.output_dir is None:
+        parser.error("--per-hospital needs --output-dir")
+    if getattr(args, "events", False) and (args.checkpoint_file is not None or args.resume is not None):
+        parser.error("--events simulations cannot be checkpointed or resumed")
+    try:
+        network = load_network(args.network)
+    except (OSError, ValueError) as error:
+        parser.error("the hospital network could not be read: {}".format(error))  # exits with status 2
+    if args.metrics_file is None and args.metrics_json is None:
+        args.run(args, network)  # nothing is instrumented, the operations run untimed
+        return
+    from metrics import Metrics, instrument, uninstrument
+    metrics = Metrics()
+    instrument(metrics)
+    try:
+        args.run(args, network)
+    finally:  # also when the command is stopped, e.g. the server with Ctrl+C
+        uninstrument()
+        metrics.save(args.metrics_file, args.metrics_json)
+
+
+if __name__ == "__main__":
+    main()
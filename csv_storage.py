@@ -0,0 +1,51 @@
+class CsvStorage:
+    """
+    CsvStorage is the default storage of a PatientManagementSystem: the state is read in from
+        initial_hospital_state.csv when the program starts and final_hospital_state.csv is rewritten after every action.
+        Every storage (CsvStorage, OperationJournal and SqliteStorage) has the same methods:
+            load(system)            reads the saved state into the system when the program starts
+            append(record)          persists the journal record of one action as soon as it is made
+            append_many(records)    persists the records of a batch of actions together
+            save(system)            called after every action (or batch) once its records have been appended
+            close()                 releases any open files or connections
+    """
+
+    def __init__(self, initial_file="initial_hospital_state.csv", final_file="final_hospital_state.csv"):
+        self.__initial_file = initial_file
+        self.__final_file = final_file
+
+    def load(self, system):
+        """
+        load reads the initial state file into the PatientManagementSystem, system
+        :param system: PatientManagementSystem
+        :return: None
+        """
+        system.read_in_csv(self.__initial_file)
+
+    def append(self, record):
+        """
+        append does nothing, the whole state is rewritten by save
+        :param record: dict
+        :return: None
+        """
+
+    def append_many(self, records):
+        """
+        append_many does nothing, the whole state is rewritten by save
+        :param records: List of dict
+        :return: None
+        """
+
+    def save(self, system):
+        """
+        save rewrites the final state file from the PatientManagementSystem, system
+        :param system: PatientManagementSystem
+        :return: None
+        """
+        system.write_out_csv(self.__final_file)
+
+    def close(self):
+        """
+        close does nothing, no file is kept open
+        :return: None
+        """
@@ -0,0 +1,225 @@
+"""
+This program runs many independent replicas of the 90 day simulation of the Patient Management System across a pool
+of processes and reduces their results, as they come in, into summary statistics: percentiles of the occupancy of
+every hospital on every day, the chance of a hospital being full, and the number of transfers and of admissions where
+no transfer was possible. Every replica gets its own seed derived from one ensemble seed, so an ensemble can be
+reproduced exactly no matter how many processes are used.
+"""
+import csv
+import multiprocessing
+import os
+import re
+import sys
+import numpy as np
+from event_bus import EventBus
+from simulate_data import SimulateData
+from system_plots import render_charts
+
+
+def replica_seed(ensemble_seed, replica):
+    """
+    replica_seed returns the seed of one replica, derived from the ensemble seed with an independent NumPy
+        SeedSequence stream per replica
+    :param ensemble_seed: int
+    :param replica: int
+    :return: int
+    """
+    return int(np.random.SeedSequence(ensemble_seed, spawn_key=(replica,)).generate_state(1, np.uint64)[0])
+
+
+def run_replica(task):
+    """
+    run_replica runs one simulation quietly (no console output or state files) and returns the occupancy of every
+        hospital at the end of every day and the event counts of the simulation
+    :param task: tuple of (int, str) with the seed and engine of the replica
+    :return: list of [numpy array of int with shape (days, hospitals), dict]
+    """
+    seed, engine = task
+    occupancy = []
+
+    def record_day(day, system):
+        occupancy.append([len(hospital.get_patients()) for hospital in system.hospitals.values()])
+
+    # an EventBus without sinks, nothing is printed and the progress messages are never built
+    simulation = SimulateData(engine=engine, save_snapshots=False, day_observer=record_day, seed=seed,
+                              events=EventBus())
+    simulation.start_simulation()
+    return [np.array(occupancy, dtype=np.int32), simulation.get_event_counts()]
+
+
+class EnsembleSummary:
+    """
+    EnsembleSummary accumulates the results of replicas one at a time. The occupancy of every hospital on every day
+        is kept as a histogram over the possible number of occupied beds, so the memory used does not grow with the
+        number of replicas and percentiles can still be read off exactly.
+    """
+
+    def __init__(self, hospital_names, total_beds, days):
+        self.hospital_names = hospital_names
+        self.total_beds = np.array(total_beds)
+        self.replicas = 0
+        # occupancy histogram: (day, hospital, occupied beds) -> number of replicas
+        self.occupancy_counts = np.zeros((days, len(hospital_names), int(self.total_beds.max()) + 1), dtype=np.int64)
+        self.event_totals = {}  # event name -> total over all replicas
+        self.replicas_with_event = {}  # event name -> number of replicas where it happened at least once
+
+    def add(self, occupancy, event_counts):
+        """
+        add adds the results of one replica to the summary
+        :param occupancy: numpy array of int with shape (days, hospitals)
+        :param event_counts: dict
+        :return: None
+        """
+        days, hospitals = np.indices(occupancy.shape)
+        np.add.at(self.occupancy_counts, (days, hospitals, np.minimum(occupancy, self.occupancy_counts.shape[2] - 1)),
+                  1)
+        for event, count in event_counts.items():
+            self.event_totals[event] = self.event_totals.get(event, 0) + count
+            self.replicas_with_event[event] = self.replicas_with_event.get(event, 0) + (count > 0)
+        self.replicas += 1
+
+    def occupancy_percentile(self, percentile):
+        """
+        occupancy_percentile returns the given percentile (0 - 100) of the occupancy of every hospital on every day
+        :param percentile: float
+        :return: numpy array of int with shape (days, hospitals)
+        """
+        cumulative = np.cumsum(self.occupancy_counts, axis=2)
+        rank = max(1, int(np.ceil(percentile / 100 * self.replicas)))  # nearest rank
+        return np.argmax(cumulative >= rank, axis=2)
+
+    def full_chance(self):
+        """
+        full_chance returns the chance of every hospital being full at the end of every day
+        :return: numpy array of float with shape (days, hospitals)
+        """
+        beds = np.broadcast_to(self.total_beds, self.occupancy_counts.shape[:2])
+        days, hospitals = np.indices(beds.shape)
+        return self.occupancy_counts[days, hospitals, beds] / max(self.replicas, 1)
+
+    def event_chance(self, event):
+        """
+        event_chance returns the chance of a replica having at least one of the given event
+        :param event: str
+        :return: float
+        """
+        return self.replicas_with_event.get(event, 0) / max(self.replicas, 1)
+
+    def write_csv(self, file_name):
+        """
+        write_csv writes the occupancy percentiles and full chance of every hospital on every day to a csv file
+        :param file_name: str
+        :return: None
+        """
+        percentiles = {p: self.occupancy_percentile(p) for p in [5, 50, 95]}
+        full_chance = self.full_chance()
+        with open(file_name, 'w') as csv_file:
+            writer = csv.writer(csv_file, delimiter=',', lineterminator='\n')
+            writer.writerow(["Day", "Hospital", "Occupancy_P5", "Occupancy_P50", "Occupancy_P95", "Full_Chance"])
+            for day in range(full_chance.shape[0]):
+                for hospital, name in enumerate(self.hospital_names):
+                    writer.writerow([day + 1, name] + [int(percentiles[p][day, hospital]) for p in [5, 50, 95]]
+                                    + ["{:.4f}".format(full_chance[day, hospital])])
+
+    def save_hospital_charts(self, output_dir, processes=None):
+        """
+        save_hospital_charts saves a chart of the occupancy percentiles and full chance of every hospital on every day
+            to occupancy_<name>.png in output_dir, rendered across processes worker processes (all cores by default, 1
+            renders them in this process)
+        :param output_dir: str
+        :param processes: int or None
+        :return: List of str
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        percentiles = {p: self.occupancy_percentile(p) for p in [5, 50, 95]}
+        full_chance = self.full_chance()
+        tasks = [(os.path.join(output_dir, "occupancy_{}.png".format(re.sub(r"\W+", "_", name.lower()))), name,
+                  int(self.total_beds[hospital]), [percentiles[p][:, hospital] for p in [5, 50, 95]],
+                  full_chance[:, hospital]) for hospital, name in enumerate(self.hospital_names)]
+        return render_charts(render_occupancy_chart, tasks, processes)
+
+
+def render_occupancy_chart(task):
+    """
+    render_occupancy_chart saves the chart of one hospital of an ensemble with the Agg backend: the band between the
+        5th and 95th percentile of its occupancy, the median occupancy and the chance of it being full on every day
+    :param task: tuple of (str, str, int, list of numpy array of int, numpy array of float) with the file name, the
+        hospital name, its number of beds, its 5th, 50th and 95th occupancy percentiles and its full chance
+    :return: str
+    """
+    file_name, name, total_beds, (low, median, high), full_chance = task
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    days = np.arange(1, len(median) + 1)
+    figure, (occupancy_axes, full_axes) = plt.subplots(2, 1, figsize=(12, 6), sharex=True)
+    occupancy_axes.fill_between(days, low, high, alpha=0.3, label="5th - 95th percentile")
+    occupancy_axes.plot(days, median, label="Median")
+    occupancy_axes.axhline(total_beds, color="black", linestyle="--", label="Beds")
+    occupancy_axes.set_ylabel("Occupied Beds")
+    occupancy_axes.legend()
+    full_axes.plot(days, full_chance)
+    full_axes.set_ylim(0, 1)
+    full_axes.set_ylabel("Chance Full")
+    full_axes.set_xlabel("Day")
+    figure.suptitle("Occupancy of {} over the replicas".format(name))
+    figure.savefig(file_name)
+    plt.close(figure)
+    return file_name
+
+
+def run_ensemble(replicas, seed=0, processes=None, engine="vectorized", chunksize=8):
+    """
+    run_ensemble runs replicas simulations across processes worker processes (all cores by default, 1 runs them in
+        this process) and returns the EnsembleSummary of their results
+    :param replicas: int
+    :param seed: int
+    :param processes: int or None
+    :param engine: str
+    :param chunksize: int
+    :return: EnsembleSummary
+    """
+    hospitals = SimulateData(save_snapshots=False).get_system().hospitals.values()
+    summary = EnsembleSummary([hospital.get_name() for hospital in hospitals],
+                              [hospital.get_total_beds() for hospital in hospitals], 90)
+    tasks = ((replica_seed(seed, replica), engine) for replica in range(replicas))
+
+    if processes == 1:
+        for occupancy, event_counts in map(run_replica, tasks):
+            summary.add(occupancy, event_counts)
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            for occupancy, event_counts in pool.imap_unordered(run_replica, tasks, chunksize):
+                summary.add(occupancy, event_counts)
+    return summary
+
+
+def main():
+    """
+    Runs an ensemble (python ensemble.py [replicas] [seed] [processes] [chart directory]), prints its summary and writes
+        the occupancy statistics to ensemble_summary.csv, and a chart of every hospital to the chart directory if one
+        is given
+    :return: None
+    """
+    replicas = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    chart_dir = sys.argv[4] if len(sys.argv) > 4 else None
+
+    summary = run_ensemble(replicas, seed, processes)
+    summary.write_csv('ensemble_summary.csv')
+    print("{} replicas of the 90 day simulation have finished!".format(summary.replicas))
+    print("Chance of a patient arriving at a full hospital: {:.2%}".format(summary.event_chance("full_arrivals")))
+    print("Chance of an admission where no transfer was possible: {:.2%}".format(
+        summary.event_chance("no_transfer_possible")))
+    for event, total in summary.event_totals.items():
+        print("Average {} per replica: {:.3f}".format(event.replace("_", " "), total / summary.replicas))
+    print("The occupancy percentiles have been saved to ensemble_summary.csv in the working directory")
+    if chart_dir is not None:
+        summary.save_hospital_charts(chart_dir, processes)
+        print("The occupancy chart of every hospital has been saved to {}".format(chart_dir))
+
+
+if __name__ == "__main__":
+    main()
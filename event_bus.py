@@ -0,0 +1,87 @@
+# kinds of the events published by the PatientManagementSystem and SimulateData, with the fields of each:
+#   admitted        id, hospital, status, covid
+#   transferred     id, hospital (the new one)
+#   discharged      id, hospital
+#   status_changed  id, old, new (and day, for the changes made by a simulation)
+#   snapshot_saved  day, file, format ("csv" or "log")
+#   message         text, the progress notes of a simulation (day headers, covid chance, table of current patients)
+#                   and the notes of the system (a status update to the status a patient already has)
+ADMITTED = "admitted"
+TRANSFERRED = "transferred"
+DISCHARGED = "discharged"
+STATUS_CHANGED = "status_changed"
+SNAPSHOT_SAVED = "snapshot_saved"
+MESSAGE = "message"
+EVENT_KINDS = [ADMITTED, TRANSFERRED, DISCHARGED, STATUS_CHANGED, SNAPSHOT_SAVED, MESSAGE]
+# the events that change the state of the system or save it, for an audit trail without the progress notes
+AUDIT_EVENTS = [ADMITTED, TRANSFERRED, DISCHARGED, STATUS_CHANGED, SNAPSHOT_SAVED]
+
+
+class EventBus:
+    """
+    EventBus passes the events of a PatientManagementSystem and SimulateData on to the sinks subscribed to their kind
+        (see event_sinks.py), as an event kind and a dictionary of fields. Publishing an event no sink is subscribed
+        to does nothing, and publishers check wants(kind) before building events that are costly to make, so a bus
+        without sinks runs a simulation quietly at full speed. sinks are subscribed to every kind of event.
+        Every sink has the methods:
+            handle(kind, fields)    called with every event of a kind the sink is subscribed to
+            close()                 writes out anything buffered and releases open files
+    """
+
+    def __init__(self, sinks=None):
+        self.__subscribers = {kind: [] for kind in EVENT_KINDS}  # event kind -> sinks subscribed to it
+        for sink in sinks if sinks is not None else []:
+            self.subscribe(sink)
+
+    def subscribe(self, sink, kinds=None):
+        """
+        subscribe passes every later event of the kinds (every kind if None) on to sink
+        :param sink: NullSink or ConsoleSink or JsonLinesSink or RingBufferSink
+        :param kinds: List of str or None
+        :return: None
+        """
+        for kind in kinds if kinds is not None else EVENT_KINDS:
+            if kind not in self.__subscribers:
+                raise ValueError("{} is not a kind of event, the kinds are {}".format(kind, ", ".join(EVENT_KINDS)))
+            if sink not in self.__subscribers[kind]:
+                self.__subscribers[kind].append(sink)
+
+    def unsubscribe(self, sink):
+        """
+        unsubscribe stops passing events on to sink
+        :param sink: NullSink or ConsoleSink or JsonLinesSink or RingBufferSink
+        :return: None
+        """
+        for sinks in self.__subscribers.values():
+            if sink in sinks:
+                sinks.remove(sink)
+
+    def wants(self, kind):
+        """
+        wants returns True if any sink is subscribed to the events of kind
+        :param kind: str
+        :return: Bool
+        """
+        return bool(self.__subscribers[kind])
+
+    def publish(self, kind, fields):
+        """
+        publish passes an event of kind with fields on to every sink subscribed to kind
+        :param kind: str
+        :param fields: dict
+        :return: None
+        """
+        for sink in self.__subscribers[kind]:
+            sink.handle(kind, fields)
+
+    def close(self):
+        """
+        close closes every sink subscribed to the bus
+        :return: None
+        """
+        closed = []
+        for sinks in self.__subscribers.values():
+            for sink in sinks:
+                if sink not in closed:
+                    sink.close()
+                    closed.append(sink)
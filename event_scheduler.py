@@ -0,0 +1,49 @@
+import heapq
+
+
+class EventScheduler:
+    """
+    EventScheduler is a heap of events for a discrete-event simulation. Every event is due on a day and has a
+        priority deciding the order of events due on the same day (lower first); events with the same day and priority
+        come out in the order they were scheduled.
+    """
+
+    def __init__(self):
+        self.__heap = []
+        self.__scheduled = 0
+
+    def __len__(self):
+        """
+        __len__ returns the number of events waiting
+        :return: int
+        """
+        return len(self.__heap)
+
+    def schedule(self, day, priority, event):
+        """
+        schedule adds event to the heap, due on day
+        :param day: int
+        :param priority: tuple
+        :param event: tuple
+        :return: None
+        """
+        heapq.heappush(self.__heap, (day, priority, self.__scheduled, event))
+        self.__scheduled += 1
+
+    def next_day(self):
+        """
+        next_day returns the day the next event is due on, or None if there are no events
+        :return: int or None
+        """
+        return self.__heap[0][0] if self.__heap else None
+
+    def pop_day(self, day):
+        """
+        pop_day removes and returns every event due on day, in order
+        :param day: int
+        :return: List of tuple
+        """
+        events = []
+        while self.__heap and self.__heap[0][0] == day:
+            events.append(heapq.heappop(self.__heap)[3])
+        return events
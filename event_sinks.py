@@ -0,0 +1,152 @@
+import collections
+import json
+import sys
+import threading
+from event_bus import ADMITTED, DISCHARGED, MESSAGE, SNAPSHOT_SAVED, STATUS_CHANGED, TRANSFERRED
+
+
+class NullSink:
+    """
+    NullSink drops every event, for a bus that needs a sink but nothing should be reported
+    """
+
+    def handle(self, kind, fields):
+        """
+        handle drops the event
+        :param kind: str
+        :param fields: dict
+        :return: None
+        """
+
+    def close(self):
+        """
+        close does nothing, there is nothing to release
+        :return: None
+        """
+
+
+class ConsoleSink:
+    """
+    ConsoleSink prints the events as the messages the system and simulation have always printed, to stream (stdout by
+        default). The status changes made by a simulation and the states saved to a snapshot log were never printed
+        and are not.
+    """
+
+    def __init__(self, stream=None):
+        self.__stream = stream
+
+    def handle(self, kind, fields):
+        """
+        handle prints the message of the event
+        :param kind: str
+        :param fields: dict
+        :return: None
+        """
+        if kind == ADMITTED:
+            text = "Patient successfully added to the {} hospital.".format(fields["hospital"])
+        elif kind == TRANSFERRED:
+            text = "Patient transferred successfully to the {} hospital.".format(fields["hospital"])
+        elif kind == DISCHARGED:
+            text = "Patient {} has been discharged from the {} hospital.".format(fields["id"], fields["hospital"])
+        elif kind == STATUS_CHANGED and "day" not in fields:
+            text = "The status of {} has been successfully updated.".format(fields["id"])
+        elif kind == SNAPSHOT_SAVED and fields["format"] == "csv":
+            text = "The state of the hospitals after {} days has been saved to {} in the working directory".format(
+                fields["day"], fields["file"])
+        elif kind == MESSAGE:
+            text = fields["text"]
+        else:
+            return
+        print(text, file=self.__stream if self.__stream is not None else sys.stdout)
+
+    def close(self):
+        """
+        close does nothing, the stream belongs to the caller
+        :return: None
+        """
+
+
+class JsonLinesSink:
+    """
+    JsonLinesSink appends every event to file_name as one json object per line, {"event": kind, **fields}, for an
+        audit trail of a run. Lines are buffered and written buffer_events at a time, and by flush and close.
+    """
+
+    def __init__(self, file_name="events.jsonl", buffer_events=10000):
+        self.__file = open(file_name, 'a')
+        self.__buffer = []
+        self.__buffer_events = buffer_events
+        self.__lock = threading.Lock()  # the events of a thread-safe system can come from many threads
+
+    def handle(self, kind, fields):
+        """
+        handle buffers the json line of the event, writing the buffer out once it is full
+        :param kind: str
+        :param fields: dict
+        :return: None
+        """
+        line = json.dumps(dict(fields, event=kind))
+        with self.__lock:
+            self.__buffer.append(line)
+            if len(self.__buffer) >= self.__buffer_events:
+                self.__write()
+
+    def flush(self):
+        """
+        flush writes out the buffered events
+        :return: None
+        """
+        with self.__lock:
+            self.__write()
+            self.__file.flush()
+
+    def close(self):
+        """
+        close writes out the buffered events and closes the file
+        :return: None
+        """
+        with self.__lock:
+            if not self.__file.closed:
+                self.__write()
+                self.__file.close()
+
+    def __write(self):
+        """
+        __write writes the buffered lines to the file, the lock must be held
+        :return: None
+        """
+        if self.__buffer:
+            self.__file.write("\n".join(self.__buffer) + "\n")
+            self.__buffer = []
+
+
+class RingBufferSink:
+    """
+    RingBufferSink keeps the last capacity events in memory as (kind, fields) pairs, dropping the oldest once full
+    """
+
+    def __init__(self, capacity=10000):
+        self.__events = collections.deque(maxlen=capacity)
+
+    def handle(self, kind, fields):
+        """
+        handle keeps the event
+        :param kind: str
+        :param fields: dict
+        :return: None
+        """
+        self.__events.append((kind, fields))
+
+    def get_events(self, kind=None):
+        """
+        get_events returns the events kept, oldest first, only those of kind if it is given
+        :param kind: str or None
+        :return: List of tuple of (str, dict)
+        """
+        return [event for event in list(self.__events) if kind is None or event[0] == kind]
+
+    def close(self):
+        """
+        close does nothing, the events stay readable
+        :return: None
+        """
@@ -0,0 +1,131 @@
+import csv
+import os
+from hospitals import Hospital
+
+# network used when there is no hospital_network.csv: (name, total beds, days between admissions)
+DEFAULT_HOSPITALS = [("Kingston", 10, 7), ("Hamilton", 13, 7), ("Toronto", 20, 4)]
+
+
+class HospitalNetwork:
+    """
+    HospitalNetwork holds the configuration of the hospitals in a region: the name of every hospital, its number of
+        beds and the number of days between the admissions of the simulation. It is read in from a csv file with the
+        columns Hospital, Total_Beds and Admission_Interval (hospital_network.csv by default) or built with
+        add_hospital, and makes the Hospital objects of a PatientManagementSystem.
+    """
+
+    def __init__(self, hospitals=None):
+        self.__names = []  # hospital names in the order they were added
+        self.__total_beds = {}  # lower case hospital name -> number of beds
+        self.__admission_intervals = {}  # lower case hospital name -> days between admissions
+        for name, total_beds, admission_interval in (hospitals if hospitals is not None else []):
+            self.add_hospital(name, total_beds, admission_interval)
+
+    def __len__(self):
+        """
+        __len__ returns the number of hospitals in the network
+        :return: int
+        """
+        return len(self.__names)
+
+    def add_hospital(self, name, total_beds, admission_interval):
+        """
+        add_hospital adds a hospital with total_beds beds that admits a patient every admission_interval days in the
+            simulation. Raises ValueError if the hospital is already in the network or a number is not positive.
+        :param name: str
+        :param total_beds: int
+        :param admission_interval: int
+        :return: None
+        """
+        key = name.lower()
+        if key in self.__total_beds:
+            raise ValueError("The hospital {} is already in the network.".format(name))
+        if int(total_beds) < 1 or int(admission_interval) < 1:
+            raise ValueError("The hospital {} must have at least 1 bed and admit patients at least 1 day apart."
+                             .format(name))
+        self.__names.append(name)
+        self.__total_beds[key] = int(total_beds)
+        self.__admission_intervals[key] = int(admission_interval)
+
+    def get_names(self):
+        """
+        get_names returns the names of the hospitals in the order they were added
+        :return: List of str
+        """
+        return list(self.__names)
+
+    def get_total_beds(self, name):
+        """
+        get_total_beds returns the number of beds of the hospital called name
+        :param name: str
+        :return: int
+        """
+        return self.__total_beds[name.lower()]
+
+    def get_admission_interval(self, name):
+        """
+        get_admission_interval returns the number of days between the admissions of the hospital called name
+        :param name: str
+        :return: int
+        """
+        return self.__admission_intervals[name.lower()]
+
+    def get_admission_schedule(self):
+        """
+        get_admission_schedule returns a dictionary of the days between admissions by lower case hospital name, ordered
+            by the days between admissions and then by the order the hospitals were added. This is the order hospitals
+            admitting on the same day admit their patients in.
+        :return: dict
+        """
+        names = sorted(self.__admission_intervals, key=self.__admission_intervals.get)  # sorted() is stable
+        return {name: self.__admission_intervals[name] for name in names}
+
+    def make_hospitals(self):
+        """
+        make_hospitals returns a new empty Hospital object for every hospital in the network
+        :return: List of Hospital
+        """
+        return [Hospital(name, self.__total_beds[name.lower()], 0, {}) for name in self.__names]
+
+    def write_csv(self, file_name='hospital_network.csv'):
+        """
+        write_csv writes the network to a csv file that read_csv can read back in
+        :param file_name: str
+        :return: None
+        """
+        with open(file_name, 'w') as csv_file:
+            writer = csv.writer(csv_file, delimiter=',', lineterminator='\n')
+            writer.writerow(["Hospital", "Total_Beds", "Admission_Interval"])
+            for name in self.__names:
+                writer.writerow([name, self.get_total_beds(name), self.get_admission_interval(name)])
+
+    @staticmethod
+    def read_csv(file_name='hospital_network.csv'):
+        """
+        read_csv reads a network in from a csv file with the columns Hospital, Total_Beds and Admission_Interval.
+            Raises ValueError naming the line of the file if a row is not valid.
+        :param file_name: str
+        :return: HospitalNetwork
+        """
+        network = HospitalNetwork()
+        with open(file_name, 'r') as csv_file:
+            reader = csv.DictReader(csv_file)
+            for row in reader:
+                try:
+                    network.add_hospital(row["Hospital"].strip(), row["Total_Beds"], row["Admission_Interval"])
+                except (KeyError, TypeError, ValueError, AttributeError) as error:
+                    raise ValueError("Line {} of {} is not a valid hospital: {}".format(reader.line_num, file_name,
+                                                                                       error))
+        return network
+
+    @staticmethod
+    def load(file_name='hospital_network.csv'):
+        """
+        load reads the network in from file_name if it exists, otherwise it returns the default network of Kingston
+            (10 beds), Hamilton (13 beds) and Toronto (20 beds)
+        :param file_name: str
+        :return: HospitalNetwork
+        """
+        if os.path.exists(file_name):
+            return HospitalNetwork.read_csv(file_name)
+        return HospitalNetwork(DEFAULT_HOSPITALS)
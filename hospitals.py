@@ -1,9 +1,32 @@
+import heapq
+from itertools import compress
+from operator import methodcaller
+from census import Census
+
+
+SLOT_MASK = (1 << 32) - 1  # the slot in the severity index entry of a hospital with a PatientStore
+
+
 class Hospital:
     def __init__(self, name, total_beds, num_beds_occupied, curr_patients):
         self.__name = name
         self.__total_beds = total_beds
         self.__occupied_beds = num_beds_occupied
         self.__patients_list = curr_patients
+        # severity index: for every severity status a heap of (admission number, patient id) so the first admitted
+        #   patient with a given status is always at the top. Entries of patients that have since changed status or
+        #   left are skipped (and dropped) when the heap is read. With a PatientStore the admission numbers are kept by
+        #   the store and an entry is one int, admission number << 32 | slot, instead of a tuple.
+        self.__admissions = 0
+        self.__admission_numbers = {}  # patient id -> admission number
+        self.__severity_index = {}  # int status -> heap of entries
+        self.__severity_counts = {}  # int status -> number of patients with that status
+        # running counts of the patients by severity status and covid status, see get_census
+        self.__census = Census()
+        # PatientStore the patients are kept in, see use_patient_store, or None
+        self.__store = None
+        for patient_id, patient in curr_patients.items():
+            self.__index_patient(patient_id, patient)
 
     def get_name(self):
         """
@@ -12,30 +35,86 @@ class Hospital:
         """
         return self.__name.capitalize()
 
+    def get_total_beds(self):
+        """
+        get_total_beds returns the total number of beds in the Hospital
+        :return: int
+        """
+        return self.__total_beds
+
+    def use_patient_store(self, store):
+        """
+        use_patient_store keeps the patients of the hospital in the PatientStore, store: the hospital only holds the
+            slot of every patient, in the order they were admitted, and hands out PatientViews when they are asked for.
+            The hospital must not have any patients yet.
+        :param store: PatientStore
+        :return: None
+        """
+        if self.__patients_list:
+            raise ValueError("the {} hospital already has patients".format(self.get_name()))
+        self.__store = store
+
     def add_patients(self, patient_id, patient):
         """
         add_patients adds the patient_id and Patient object, patient, to the dictionary of patients stored in the
             hospital object
         :param patient_id: str
-        :param patient: Patient
+        :param patient: Patient or PatientView
         :return: None
         """
-        self.__patients_list[patient_id] = patient
         self.__occupied_beds += 1
+        self.__patients_list[patient_id] = patient if self.__store is None else patient.get_slot()
+        self.__index_patient(patient_id, patient)
+
+    def add_many_patients(self, patient_ids, patients, statuses, covid_positives):
+        """
+        add_many_patients adds the patient ids and Patient objects, patients, with their severity statuses and covid
+            statuses (lists in the same order) to the hospital in bulk, as if add_patients was called for each of them
+            in turn
+        :param patient_ids: List of str
+        :param patients: List of Patient or List of PatientView
+        :param statuses: List of str
+        :param covid_positives: List of str
+        :return: None
+        """
+        self.__occupied_beds += len(patient_ids)
+        for patient in patients:
+            patient.set_current_hospital(self)  # in a PatientStore this gives the patient its admission number
+        if self.__store is None:
+            self.__patients_list.update(zip(patient_ids, patients))
+            numbers = range(self.__admissions, self.__admissions + len(patient_ids))
+            self.__admissions += len(patient_ids)
+            self.__admission_numbers.update(zip(patient_ids, numbers))
+            entries = list(zip(numbers, patient_ids))
+        else:
+            self.__patients_list.update(zip(patient_ids, map(methodcaller("get_slot"), patients)))
+            entries = list(map(self.__severity_entry, patient_ids))
+        for status in set(statuses):
+            status_entries = list(compress(entries, map(status.__eq__, statuses)))
+            self.__severity_counts[int(status)] = self.__severity_counts.get(int(status), 0) + len(status_entries)
+            # the new admission numbers are larger than any in the heap, so appended in order they keep it a heap
+            self.__severity_index.setdefault(int(status), []).extend(status_entries)
+        self.__census.admit_many(statuses, covid_positives)
 
     def get_patients(self):
         """
-        get_patients returns the dictionary of Patients
+        get_patients returns the dictionary of Patients, patient id -> Patient (or PatientView if the patients are kept
+            in a PatientStore) in the order they were admitted
         :return: dictionary of Patients
         """
+        if self.__store is not None:
+            return self.__store.patients(self.__patients_list)
         return self.__patients_list
 
     def get_patient(self, patient_id):
         """
         get_patient returns the Patient object with the id, patient_id.
         :param patient_id: str
-        :return: Patient
+        :return: Patient or PatientView
         """
+        if self.__store is not None:
+            slot = self.__patients_list.get(patient_id)
+            return self.__store.view(slot) if slot is not None else None
         return self.__patients_list.get(patient_id)
 
     def discharge_patient(self, patient_id):
@@ -43,10 +122,108 @@ class Hospital:
         discharge_patient pops the Patient object that corresponds with the patient_id from the dictionary of
             Patients in the hospital object and returns the Patient object
         :param patient_id: str
-        :return: Patient
+        :return: Patient or PatientView
         """
         self.__occupied_beds -= 1
-        return self.__patients_list.pop(patient_id)
+        patient = self.get_patient(patient_id)
+        del self.__patients_list[patient_id]
+        if self.__store is None:
+            del self.__admission_numbers[patient_id]
+        status = int(patient.get_status())
+        self.__severity_counts[status] -= 1
+        self.__census.discharge(patient.get_status(), patient.get_covid_positive())
+        patient.set_current_hospital(None)
+        return patient
+
+    def status_changed(self, patient_id, old_status, new_status):
+        """
+        status_changed moves patient_id to the severity index of its new status, it is called by the Patient object
+            whenever its status is updated while it is in this hospital
+        :param patient_id: str
+        :param old_status: str
+        :param new_status: str
+        :return: None
+        """
+        self.__severity_counts[int(old_status)] -= 1
+        self.__push_severity(int(new_status), self.__severity_entry(patient_id))
+        self.__census.change_status(old_status, new_status, self.get_patient(patient_id).get_covid_positive())
+
+    def get_census(self):
+        """
+        get_census returns the Census of the Hospital, the running counts of its patients by severity status and covid
+            status
+        :return: Census
+        """
+        return self.__census
+
+    def lowest_status_patient(self):
+        """
+        lowest_status_patient returns the id of the first admitted patient with the lowest severity status below 3, or
+            an empty string if all patients have a severity status of 3
+        :return: str
+        """
+        for status in range(3):
+            heap = self.__severity_index.get(status)
+            while heap and not self.__is_current(status, heap[0]):
+                heapq.heappop(heap)  # drop entries of patients that changed status or left
+            if heap:
+                return heap[0][1] if self.__store is None else self.__store.get_id(heap[0] & SLOT_MASK)
+        return ""
+
+    def __index_patient(self, patient_id, patient):
+        """
+        __index_patient gives patient_id the next admission number and adds it to the severity index
+        :param patient_id: str
+        :param patient: Patient or PatientView
+        :return: None
+        """
+        if self.__store is None:
+            self.__admission_numbers[patient_id] = self.__admissions
+            self.__admissions += 1
+        patient.set_current_hospital(self)  # in a PatientStore this gives the patient its admission number
+        self.__push_severity(int(patient.get_status()), self.__severity_entry(patient_id))
+        self.__census.admit(patient.get_status(), patient.get_covid_positive())
+
+    def __severity_entry(self, patient_id):
+        """
+        __severity_entry returns the severity index entry of patient_id: (admission number, patient id), or admission
+            number << 32 | slot if the patients are kept in a PatientStore
+        :param patient_id: str
+        :return: tuple of (int, str) or int
+        """
+        if self.__store is None:
+            return self.__admission_numbers[patient_id], patient_id
+        slot = self.__patients_list[patient_id]
+        return self.__store.get_admission(slot) << 32 | slot
+
+    def __push_severity(self, status, entry):
+        """
+        __push_severity adds the severity index entry, entry, to the heap of status, rebuilding the heap without
+            outdated entries when they outnumber the patients that currently have that status
+        :param status: int
+        :param entry: tuple of (int, str) or int
+        :return: None
+        """
+        count = self.__severity_counts.get(status, 0) + 1
+        self.__severity_counts[status] = count
+        heap = self.__severity_index.setdefault(status, [])
+        heapq.heappush(heap, entry)
+        if len(heap) > 2 * count + 16:
+            heap[:] = [entry for entry in heap if self.__is_current(status, entry)]
+            heapq.heapify(heap)
+
+    def __is_current(self, status, entry):
+        """
+        __is_current checks whether a severity index entry still belongs to a patient in this hospital with status
+        :param status: int
+        :param entry: tuple of (int, str) or int
+        :return: Bool
+        """
+        if self.__store is not None:
+            return self.__store.holds(entry & SLOT_MASK, self, entry >> 32, status)
+        admission_number, patient_id = entry
+        return self.__admission_numbers.get(patient_id) == admission_number \
+            and int(self.__patients_list[patient_id].get_status()) == status
 
     def available_beds(self):
         """
@@ -0,0 +1,171 @@
+import json
+import os
+
+# turns a record into one compact line of json, made once because json.dumps makes a new encoder for every call
+#   with separators given
+encode_record = json.JSONEncoder(separators=(",", ":")).encode
+
+
+class OperationJournal:
+    """
+    OperationJournal persists a PatientManagementSystem as a snapshot csv file (in the same format as
+        final_hospital_state.csv) plus an append-only journal file holding one small json record for every add,
+        transfer, discharge and status update made since the snapshot was written. Every compact_every records the
+        snapshot is rewritten and the journal emptied, so the cost of saving one operation does not depend on the
+        number of patients.
+        Every record holds the resulting state of one patient (not a change), so replaying the journal on top of a
+        snapshot that already contains some of its records gives the same state. This means a crash at any point,
+        including halfway through writing a record or a snapshot, can be recovered from.
+    """
+
+    def __init__(self, snapshot_file="final_hospital_state.csv", journal_file="final_hospital_state.journal",
+                 compact_every=1000, sync=False):
+        self.__snapshot_file = snapshot_file
+        self.__journal_file = journal_file
+        self.__compact_every = compact_every
+        self.__sync = sync  # fsync after every record instead of leaving it to the operating system
+        self.__journal = None
+        self.__records = 0  # records written since the last snapshot
+
+    def has_snapshot(self):
+        """
+        has_snapshot returns True if a snapshot has been written that the state can be recovered from
+        :return: Bool
+        """
+        return os.path.exists(self.__snapshot_file) and os.path.exists(self.__journal_file)
+
+    def load(self, system):
+        """
+        load reads the latest snapshot and the journal written after it into the PatientManagementSystem, system, if
+            they exist, otherwise initial_hospital_state.csv is read in and becomes the first snapshot
+        :param system: PatientManagementSystem
+        :return: None
+        """
+        if self.has_snapshot():
+            self.recover(system)
+        else:
+            system.read_in_csv()
+            self.compact(system)
+
+    def save(self, system):
+        """
+        save rewrites the snapshot of the PatientManagementSystem, system, once enough records have been journaled,
+            every action has already been written to the journal by append
+        :param system: PatientManagementSystem
+        :return: None
+        """
+        if self.compaction_due():
+            self.compact(system)
+
+    def recover(self, system):
+        """
+        recover reads the snapshot into the PatientManagementSystem, system, and replays every complete record of the
+            journal on top of it. A record cut off by a crash is dropped from the end of the journal.
+        :param system: PatientManagementSystem
+        :return: int (number of records replayed)
+        """
+        system.read_in_csv(self.__snapshot_file)
+
+        with open(self.__journal_file, 'rb') as journal:
+            data = journal.read()
+        complete = data.rfind(b"\n") + 1  # everything after the last new line is a partly written record
+        if complete < len(data):
+            with open(self.__journal_file, 'r+b') as journal:
+                journal.truncate(complete)
+
+        replayed = 0
+        for line in data[:complete].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # record damaged by a crash
+            self.replay(system, record)
+            replayed += 1
+        self.__records = replayed
+        return replayed
+
+    @staticmethod
+    def replay(system, record):
+        """
+        replay applies one journal record to the PatientManagementSystem, system, without printing anything or
+            writing to the journal again
+        :param system: PatientManagementSystem
+        :param record: dict
+        :return: None
+        """
+        patient_id = record["id"]
+        hospital = system.find_patient_hospital(patient_id)
+        if record["op"] == "add":
+            system.load_patient(patient_id, record["hospital"], record["status"], record["covid"])
+        elif hospital is False:
+            return  # the patient was discharged later on in the journal
+        elif record["op"] == "transfer":
+            if hospital.get_name().lower() != record["hospital"]:
+                system.move_patient(patient_id, record["hospital"])
+        elif record["op"] == "discharge":
+            system.remove_patient(patient_id)
+        elif record["op"] == "update":
+            hospital.get_patient(patient_id).update_status(record["status"])
+
+    def append(self, record):
+        """
+        append writes one record to the end of the journal
+        :param record: dict
+        :return: None
+        """
+        if self.__journal is None:
+            self.__journal = open(self.__journal_file, 'a')
+        self.__journal.write(encode_record(record) + "\n")
+        self.__journal.flush()
+        if self.__sync:
+            os.fsync(self.__journal.fileno())
+        self.__records += 1
+
+    def append_many(self, records):
+        """
+        append_many writes several records to the end of the journal with one write (and one fsync)
+        :param records: List of dict
+        :return: None
+        """
+        if self.__journal is None:
+            self.__journal = open(self.__journal_file, 'a')
+        self.__journal.write("".join([encode_record(record) + "\n" for record in records]))
+        self.__journal.flush()
+        if self.__sync:
+            os.fsync(self.__journal.fileno())
+        self.__records += len(records)
+
+    def compaction_due(self):
+        """
+        compaction_due returns True once compact_every records have been written since the last snapshot
+        :return: Bool
+        """
+        return self.__records >= self.__compact_every
+
+    def compact(self, system):
+        """
+        compact writes a new snapshot of the PatientManagementSystem, system, and empties the journal. The snapshot is
+            written to a temporary file first and then renamed, so there is always a complete snapshot on disk.
+        :param system: PatientManagementSystem
+        :return: None
+        """
+        temp_file = self.__snapshot_file + ".tmp"
+        system.write_out_csv(temp_file)
+        with open(temp_file, 'rb+') as snapshot:
+            os.fsync(snapshot.fileno())
+        os.replace(temp_file, self.__snapshot_file)
+
+        # the snapshot holds every record now, a crash before the journal is emptied only replays them again
+        if self.__journal is not None:
+            self.__journal.close()
+        self.__journal = open(self.__journal_file, 'w')
+        self.__records = 0
+
+    def close(self):
+        """
+        close closes the journal file
+        :return: None
+        """
+        if self.__journal is not None:
+            self.__journal.close()
+            self.__journal = None
@@ -0,0 +1,224 @@
+import bisect
+import functools
+import importlib
+import inspect
+import json
+import threading
+import time
+
+# upper bounds (seconds) of the latency histogram buckets, the last bucket (+Inf) catches everything slower
+LATENCY_BUCKETS = [0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]
+# classes whose public methods instrument times: module, class, the histogram their calls are recorded in and the
+#   methods left untimed, plain getters called so often that timing them would cost more than it tells (modules are
+#   only imported when instrumented, so pandas and NumPy are not loaded unless they already are)
+INSTRUMENTED_CLASSES = [
+    ("patient_management_system", "PatientManagementSystem", "operation_seconds", ()),
+    ("hospitals", "Hospital", "operation_seconds", ("get_name", "get_total_beds", "get_patients", "get_census")),
+    ("patient_ids", "PatientIdAllocator", "operation_seconds",
+     ("get_capacity", "get_release_policy", "available", "describe_format", "encode", "decode")),
+    ("csv_storage", "CsvStorage", "persistence_seconds", ()),
+    ("journal", "OperationJournal", "persistence_seconds", ()),
+    ("sqlite_storage", "SqliteStorage", "persistence_seconds", ()),
+    ("snapshot_log", "SnapshotLog", "persistence_seconds", ("get_file_name", "get_with_ids")),
+    ("simulate_data", "SimulateData", "simulation_seconds",
+     ("get_system", "get_network", "get_snapshot_log", "message")),
+    ("simulation_engine", "DayStepEngine", "simulation_seconds", ()),
+]
+METRIC_HELP = {
+    "operation_seconds": "Time spent in the operations of the patient management system",
+    "persistence_seconds": "Time spent saving and loading the state of the system",
+    "simulation_seconds": "Time spent in the steps of the simulation",
+    "operation_errors_total": "Operations that raised an exception",
+}
+
+# class -> {attribute name: original attribute} of the classes instrument has replaced methods of
+ORIGINAL_METHODS = {}
+
+
+class Metrics:
+    """
+    Metrics collects latency histograms and error counters of the instrumented operations (see instrument), labelled
+        by class and operation, and exports them as a Prometheus text file or a JSON summary. Every recording is made
+        under a lock, so the operations of a thread-safe PatientManagementSystem can be timed from many threads.
+    """
+
+    def __init__(self, buckets=None):
+        self.__buckets = list(buckets) if buckets is not None else LATENCY_BUCKETS
+        # (metric, class name, operation) -> [count of every bucket (the last one for +Inf), calls, total seconds]
+        self.__histograms = {}
+        self.__errors = {}  # (class name, operation) -> number of calls that raised an exception
+        self.__lock = threading.Lock()
+
+    def observe(self, metric, class_name, operation, seconds):
+        """
+        observe records one call of operation of class_name that took seconds in the histogram metric
+        :param metric: str
+        :param class_name: str
+        :param operation: str
+        :param seconds: float
+        :return: None
+        """
+        bucket = bisect.bisect_left(self.__buckets, seconds)
+        with self.__lock:
+            histogram = self.__histograms.get((metric, class_name, operation))
+            if histogram is None:
+                histogram = [[0] * (len(self.__buckets) + 1), 0, 0.0]
+                self.__histograms[(metric, class_name, operation)] = histogram
+            histogram[0][bucket] += 1
+            histogram[1] += 1
+            histogram[2] += seconds
+
+    def count_error(self, class_name, operation):
+        """
+        count_error records a call of operation of class_name that raised an exception
+        :param class_name: str
+        :param operation: str
+        :return: None
+        """
+        with self.__lock:
+            self.__errors[(class_name, operation)] = self.__errors.get((class_name, operation), 0) + 1
+
+    def get_summary(self):
+        """
+        get_summary returns the metrics as a dictionary: for every histogram and operation the number of calls, the
+            total and mean time and estimates of the 50th and 99th percentile (the upper bound of their bucket), and
+            the number of errors of every operation
+        :return: dict
+        """
+        with self.__lock:
+            histograms = {key: [list(value[0]), value[1], value[2]] for key, value in self.__histograms.items()}
+            errors = dict(self.__errors)
+        summary = {}
+        for (metric, class_name, operation), (counts, calls, total) in sorted(histograms.items()):
+            summary.setdefault(metric, {})["{}.{}".format(class_name, operation)] = {
+                "calls": calls, "total_seconds": total, "mean_seconds": total / calls,
+                "p50_seconds": self.__percentile(counts, calls, 0.5),
+                "p99_seconds": self.__percentile(counts, calls, 0.99)}
+        summary["operation_errors_total"] = {"{}.{}".format(class_name, operation): count
+                                             for (class_name, operation), count in sorted(errors.items())}
+        return summary
+
+    def to_prometheus(self):
+        """
+        to_prometheus returns the metrics in the Prometheus text exposition format, the histograms with cumulative
+            le buckets and the errors as a counter
+        :return: str
+        """
+        with self.__lock:
+            histograms = {key: [list(value[0]), value[1], value[2]] for key, value in self.__histograms.items()}
+            errors = dict(self.__errors)
+        lines = []
+        written = set()
+        for (metric, class_name, operation), (counts, calls, total) in sorted(histograms.items()):
+            if metric not in written:
+                lines.append("# HELP {} {}".format(metric, METRIC_HELP.get(metric, metric)))
+                lines.append("# TYPE {} histogram".format(metric))
+                written.add(metric)
+            labels = 'class="{}",operation="{}"'.format(class_name, operation)
+            cumulative = 0
+            for bound, count in zip(self.__buckets + ["+Inf"], counts):
+                cumulative += count
+                lines.append('{}_bucket{{{},le="{}"}} {}'.format(metric, labels, bound, cumulative))
+            lines.append("{}_sum{{{}}} {}".format(metric, labels, repr(total)))
+            lines.append("{}_count{{{}}} {}".format(metric, labels, calls))
+        if errors:
+            lines.append("# HELP operation_errors_total {}".format(METRIC_HELP["operation_errors_total"]))
+            lines.append("# TYPE operation_errors_total counter")
+            for (class_name, operation), count in sorted(errors.items()):
+                lines.append('operation_errors_total{{class="{}",operation="{}"}} {}'.format(class_name, operation,
+                                                                                           count))
+        return "\n".join(lines) + "\n"
+
+    def save(self, prometheus_file=None, json_file=None):
+        """
+        save writes the metrics to prometheus_file in the Prometheus text format and to json_file as a JSON summary,
+            either can be None to not write it
+        :param prometheus_file: str or None
+        :param json_file: str or None
+        :return: None
+        """
+        if prometheus_file is not None:
+            with open(prometheus_file, 'w') as out:
+                out.write(self.to_prometheus())
+        if json_file is not None:
+            with open(json_file, 'w') as out:
+                json.dump(self.get_summary(), out, indent=2)
+                out.write("\n")
+
+    def __percentile(self, counts, calls, fraction):
+        """
+        __percentile returns the upper bound of the bucket holding the given fraction of the calls, None if it is the
+            +Inf bucket
+        :param counts: List of int
+        :param calls: int
+        :param fraction: float
+        :return: float or None
+        """
+        seen = 0
+        for bound, count in zip(self.__buckets, counts):
+            seen += count
+            if seen >= fraction * calls:
+                return bound
+        return None
+
+
+def instrument(metrics, classes=None):
+    """
+    instrument replaces every public method of the classes (INSTRUMENTED_CLASSES by default, as (module, class, metric,
+        methods left untimed) tuples) with one that times each call into metrics and counts the calls that raise an
+        exception. Until it is called nothing is timed and the methods are the original functions, so disabled
+        instrumentation costs nothing. Instrumenting again replaces the Metrics the calls are recorded in.
+    :param metrics: Metrics
+    :param classes: List of tuple or None
+    :return: None
+    """
+    uninstrument()
+    for module_name, class_name, metric, skipped in classes if classes is not None else INSTRUMENTED_CLASSES:
+        cls = getattr(importlib.import_module(module_name), class_name)
+        originals = {}
+        for name, attribute in list(vars(cls).items()):
+            if name.startswith("_") or name in skipped:
+                continue
+            if isinstance(attribute, staticmethod):
+                originals[name] = attribute
+                setattr(cls, name, staticmethod(timed_method(attribute.__func__, metrics, metric, class_name, name)))
+            elif inspect.isfunction(attribute):
+                originals[name] = attribute
+                setattr(cls, name, timed_method(attribute, metrics, metric, class_name, name))
+        ORIGINAL_METHODS[cls] = originals
+
+
+def uninstrument():
+    """
+    uninstrument puts back the original methods of every class instrument has replaced them in
+    :return: None
+    """
+    for cls, originals in ORIGINAL_METHODS.items():
+        for name, attribute in originals.items():
+            setattr(cls, name, attribute)
+    ORIGINAL_METHODS.clear()
+
+
+def timed_method(function, metrics, metric, class_name, operation):
+    """
+    timed_method returns function wrapped to record the time of every call in metrics
+    :param function: function
+    :param metrics: Metrics
+    :param metric: str
+    :param class_name: str
+    :param operation: str
+    :return: function
+    """
+    clock = time.perf_counter
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        except BaseException:
+            metrics.count_error(class_name, operation)
+            raise
+        finally:
+            metrics.observe(metric, class_name, operation, clock() - start)
+    return timed
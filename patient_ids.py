@@ -0,0 +1,272 @@
+import random
+import re
+import string
+from array import array
+from itertools import product, repeat
+from operator import add, itemgetter, mul
+
+ID_LETTERS = string.ascii_letters
+
+
+class PatientIdsExhaustedError(Exception):
+    """
+    PatientIdsExhaustedError is raised when every patient id in the id space of a PatientIdAllocator is in use
+    """
+
+
+class PatientIdAllocator:
+    """
+    PatientIdAllocator hands out unique patient ids made up of a number of digits followed by a number of letters
+        (e.g. "123f" for the default 3 digits and 1 letter). Every id in the id space is given a code, and the codes
+        that are still free are kept at the front of a virtual shuffled list (a Fisher-Yates shuffle that is only
+        stored where it differs from the identity), so allocating, reserving and releasing an id are O(1) no matter
+        how full the id space is. Ids reserved in bulk (reserve_many, e.g. the patients of a state file) are only kept
+        in a set at first and left in the free part of the list: allocate draws again when it draws one of them,
+        moving it out of the free part for good, so reserving millions of ids is quick and every free id is still as
+        likely to be drawn.
+        release_policy decides what happens to the id of a discharged patient:
+            - "recycle": the id can be given to a new patient again
+            - "retire": the id is never given out again
+    """
+
+    def __init__(self, digits=3, letters=1, release_policy="recycle", rng=random):
+        if release_policy not in ["recycle", "retire"]:
+            raise ValueError("release_policy must be either \"recycle\" or \"retire\", not {}".format(release_policy))
+        self.__digits = digits
+        self.__letters = letters
+        self.__release_policy = release_policy
+        self.__randrange = rng.randrange
+        self.__letter_codes = len(ID_LETTERS) ** letters
+        self.__capacity = 10 ** digits * self.__letter_codes
+        self.__free_count = self.__capacity
+        self.__slots = {}  # position in the shuffled list -> code, only for positions not holding their own code
+        self.__positions = {}  # code -> position in the shuffled list, only for codes not at their own position
+        self.__reserved = set()  # ids reserved in bulk that are still in the free part of the shuffled list
+
+    def get_capacity(self):
+        """
+        get_capacity returns the number of ids in the id space
+        :return: int
+        """
+        return self.__capacity
+
+    def get_release_policy(self):
+        """
+        get_release_policy returns what happens to the id of a discharged patient, "recycle" or "retire"
+        :return: str
+        """
+        return self.__release_policy
+
+    def available(self):
+        """
+        available returns the number of ids that can still be allocated
+        :return: int
+        """
+        return self.__free_count - len(self.__reserved)
+
+    def describe_format(self):
+        """
+        describe_format returns a description of what an id looks like, used when asking the user for an id
+        :return: str
+        """
+        return "{} numbers followed by {} letter{}".format(self.__digits, self.__letters,
+                                                           "" if self.__letters == 1 else "s")
+
+    def allocate(self):
+        """
+        allocate picks a random free id, marks it as in use and returns it. Raises PatientIdsExhaustedError if there
+            are no free ids left.
+        :return: str
+        """
+        if self.available() == 0:
+            raise PatientIdsExhaustedError("All {} patient ids ({}) are in use, a patient needs to be discharged "
+                                           "first.".format(self.__capacity, self.describe_format()))
+        while True:
+            position = self.__randrange(self.__free_count)
+            code = self.__slots.get(position, position)
+            self.__swap(position, self.__free_count - 1)
+            self.__free_count -= 1
+            patient_id = self.encode(code)
+            if patient_id not in self.__reserved:
+                return patient_id
+            self.__reserved.remove(patient_id)  # reserved in bulk, now out of the free part like any id in use
+
+    def reserve(self, patient_id):
+        """
+        reserve marks an id that was not handed out by allocate (e.g. read in from a csv file) as in use. Returns False
+            if the id is already in use or is not in the id space, otherwise True
+        :param patient_id: str
+        :return: Bool
+        """
+        code = self.decode(patient_id)
+        if code is None or patient_id in self.__reserved:
+            return False
+        position = self.__positions.get(code, code)
+        if position >= self.__free_count:  # already in use
+            return False
+        self.__swap(position, self.__free_count - 1)
+        self.__free_count -= 1
+        return True
+
+    def reserve_many(self, patient_ids):
+        """
+        reserve_many marks every id of patient_ids as in use like reserve does, but for a long list of ids (e.g. a state
+            file of millions of patients) in one go: the ids are added to the set of ids reserved in bulk. Ids that are
+            already in use, repeated or not in the id space are skipped. Returns the number of ids reserved.
+        :param patient_ids: List of str
+        :return: int
+        """
+        new_ids = set(patient_ids)
+        new_ids.difference_update(self.__reserved)
+        if self.__free_count == self.__capacity and self.__in_id_space(new_ids):
+            # no id has been allocated or reserved one by one, so every id not reserved in bulk yet is free
+            self.__reserved.update(new_ids)
+            return len(new_ids)
+        new_ids = list(new_ids)
+        free_ids = [patient_id for patient_id, code in zip(new_ids, self.decode_many(new_ids))
+                    if code is not None and self.__positions.get(code, code) < self.__free_count]
+        self.__reserved.update(free_ids)
+        return len(free_ids)
+
+    def release(self, patient_id):
+        """
+        release hands the id of a discharged patient back to the allocator, which either makes it free again or
+            retires it depending on the release policy
+        :param patient_id: str
+        :return: None
+        """
+        code = self.decode(patient_id)
+        if code is None or self.__release_policy == "retire":
+            return
+        if patient_id in self.__reserved:  # reserved in bulk, it is still in the free part of the list
+            self.__reserved.remove(patient_id)
+            return
+        position = self.__positions.get(code, code)
+        if position < self.__free_count:  # already free
+            return
+        self.__swap(position, self.__free_count)
+        self.__free_count += 1
+
+    def get_state(self):
+        """
+        get_state returns everything needed to rebuild the allocator with from_state: its id format and release
+            policy, which ids are free, and the state of its random number generator (None if it uses the global
+            one of the random module, whose state is left to the caller)
+        :return: dict
+        """
+        if self.__randrange == random.randrange:
+            rng_state = None
+        else:
+            rng_state = self.__randrange.__self__.getstate()
+        return {"digits": self.__digits, "letters": self.__letters, "release_policy": self.__release_policy,
+                "free_count": self.__free_count, "rng": rng_state,
+                "slot_positions": array("q", self.__slots.keys()).tobytes(),
+                "slot_codes": array("q", self.__slots.values()).tobytes(),
+                "reserved": "\n".join(self.__reserved).encode("ascii")}
+
+    @staticmethod
+    def from_state(state):
+        """
+        from_state returns a PatientIdAllocator in the state returned by get_state, it hands out the same ids from
+            then on as the allocator it was taken from
+        :param state: dict
+        :return: PatientIdAllocator
+        """
+        rng = random
+        if state["rng"] is not None:
+            rng = random.Random()
+            rng.setstate(state["rng"])
+        allocator = PatientIdAllocator(state["digits"], state["letters"], state["release_policy"], rng)
+        positions = array("q")
+        positions.frombytes(state["slot_positions"])
+        codes = array("q")
+        codes.frombytes(state["slot_codes"])
+        allocator.__free_count = state["free_count"]
+        allocator.__slots = dict(zip(positions, codes))
+        allocator.__positions = dict(zip(codes, positions))
+        reserved = state.get("reserved")  # not in the states of allocators older than reserve_many
+        allocator.__reserved = set(reserved.decode("ascii").split("\n")) if reserved else set()
+        return allocator
+
+    def encode(self, code):
+        """
+        encode turns a code from the id space into its id string
+        :param code: int
+        :return: str
+        """
+        number, letter_code = divmod(code, self.__letter_codes)
+        letters = []
+        for _ in range(self.__letters):
+            letter_code, letter = divmod(letter_code, len(ID_LETTERS))
+            letters.append(ID_LETTERS[letter])
+        return str(number).zfill(self.__digits) + "".join(reversed(letters))
+
+    def decode(self, patient_id):
+        """
+        decode turns an id string back into its code, or returns None if the id is not in the id space
+        :param patient_id: str
+        :return: int or None
+        """
+        if len(patient_id) != self.__digits + self.__letters or patient_id[:self.__digits].strip(string.digits):
+            return None
+        letter_code = 0
+        for letter in patient_id[self.__digits:]:
+            index = ID_LETTERS.find(letter)
+            if index < 0:
+                return None
+            letter_code = letter_code * len(ID_LETTERS) + index
+        return int(patient_id[:self.__digits]) * self.__letter_codes + letter_code
+
+    def decode_many(self, patient_ids):
+        """
+        decode_many decodes every id of patient_ids like decode does, much faster for a long list of ids in the id space
+            as they are decoded without a loop in Python
+        :param patient_ids: List of str
+        :return: List of int or None
+        """
+        if self.__letters > 2 or not self.__in_id_space(patient_ids):
+            return list(map(self.decode, patient_ids))
+        # code of every combination of letters, there are at most 52 * 52
+        letter_codes = {"".join(letters): code
+                        for code, letters in enumerate(product(ID_LETTERS, repeat=self.__letters))}
+        numbers = map(int, map(itemgetter(slice(None, self.__digits)), patient_ids))
+        letters = map(letter_codes.__getitem__, map(itemgetter(slice(self.__digits, None)), patient_ids))
+        return list(map(add, map(mul, numbers, repeat(self.__letter_codes)), letters))
+
+    def __in_id_space(self, patient_ids):
+        """
+        __in_id_space checks whether every id of patient_ids is in the id space with one regular expression over all of
+            them
+        :param patient_ids: List of str or set of str
+        :return: Bool
+        """
+        if not set(map(len, patient_ids)) <= {self.__digits + self.__letters} or self.__digits == 0:
+            return False
+        pattern = "(?:[0-9]{{{}}}[a-zA-Z]{{{}}})*".format(self.__digits, self.__letters)
+        return re.fullmatch(pattern, "".join(patient_ids)) is not None
+
+    def __swap(self, first, second):
+        """
+        __swap swaps the codes at two positions of the shuffled list
+        :param first: int
+        :param second: int
+        :return: None
+        """
+        first_code = self.__slots.get(first, first)
+        second_code = self.__slots.get(second, second)
+        self.__place(first, second_code)
+        self.__place(second, first_code)
+
+    def __place(self, position, code):
+        """
+        __place stores code at position in the shuffled list, dropping the entries of codes back at their own position
+        :param position: int
+        :param code: int
+        :return: None
+        """
+        if position == code:
+            self.__slots.pop(position, None)
+            self.__positions.pop(code, None)
+        else:
+            self.__slots[position] = code
+            self.__positions[code] = position
@@ -5,12 +5,27 @@ unique ID, severity status between 0 - 3 and noted whether they are covid positi
 transfer patients from hospital to hospital as long as there is space available, discharge patients and update the
 severity status of a patient.
 """
+import contextlib
 import csv
-import random
-import string
-import pandas as pd
-from hospitals import Hospital
+import operator
+import threading
+from array import array
+from itertools import compress, islice, repeat, zip_longest
+from bed_availability import BedAvailability
+from census import Census
+from csv_storage import CsvStorage
+from event_bus import ADMITTED, DISCHARGED, MESSAGE, STATUS_CHANGED, TRANSFERRED, EventBus
+from event_sinks import ConsoleSink
+from hospital_network import HospitalNetwork
+from patient_ids import PatientIdAllocator, PatientIdsExhaustedError
 from patients import Patient
+from state_loader import DUPLICATE_ID, INVALID_ID, StateLoader
+
+# severity statuses a patient can have
+STATUSES = ["0", "1", "2", "3"]
+# commands of a batch (see PatientManagementSystem.parse_operation) and the values that follow each of them
+BATCH_COMMANDS = {"add": ["hospital", "status", "covid"], "transfer": ["id", "hospital"], "discharge": ["id"],
+                  "update": ["id", "status"]}
 
 class PatientManagementSystem:
     """
@@ -18,10 +33,66 @@ class PatientManagementSystem:
         Patient Management Program.
     """
 
-    def __init__(self):
-        self.hospitals = {"kingston": Hospital("Kingston", 10, 0, {}),
-                          "hamilton": Hospital("Hamilton", 13, 0, {}),
-                          "toronto": Hospital("Toronto", 20, 0, {})}
+    def __init__(self, id_allocator=None, hospitals=None, storage=None, patient_store=None, thread_safe=False,
+                 events=None):
+        self.hospitals = {}
+        # with thread_safe=True apply_operation, apply_batch and save_state can be called from many threads at once:
+        #   every hospital has a lock of its own, so operations on different hospitals do not wait for each other, and
+        #   the structures shared by every hospital (id allocator, bed availability, patient store and storage) are
+        #   guarded by one lock held only while they are changed. The text interface and the simulation are not
+        #   meant to be run from several threads.
+        if thread_safe and patient_store is not None:
+            # growing the arrays of the store would lose a status written by another thread at the same time
+            raise ValueError("a PatientStore cannot be used in thread-safe mode")
+        self.__thread_safe = thread_safe
+        self.__hospital_locks = {}  # lower case hospital name -> threading.Lock, only in thread-safe mode
+        self.__shared_lock = threading.Lock() if thread_safe else contextlib.nullcontext()
+        # free beds of every hospital, updated whenever a patient is admitted, transferred or discharged
+        self.__beds = BedAvailability()
+        # running counts of the patients of the whole network, every hospital's Census passes its changes on to it (with
+        #   a lock of its own in thread-safe mode, hospitals under different locks change it at the same time)
+        self.__census = Census(threading.Lock() if thread_safe else None)
+        self.__total_beds = 0
+        # PatientStore holding the patients in NumPy arrays instead of Patient objects, or None
+        self.__patient_store = patient_store
+        if hospitals is None:  # the hospitals of hospital_network.csv (or the default network)
+            hospitals = HospitalNetwork.load().make_hospitals()
+        for hospital in hospitals:
+            self.add_hospital(hospital)
+        # patient id -> Hospital object the patient is currently admitted to, kept up to date by every method that
+        #   admits, moves or removes a patient so find_patient_hospital never has to search the hospitals
+        self.__patient_index = {}
+        # hands out unique patient ids, pass a PatientIdAllocator with more digits/letters for a bigger id space or
+        #   with release_policy="retire" to never reuse the ids of discharged patients
+        self.__id_allocator = id_allocator if id_allocator is not None else PatientIdAllocator()
+        # where the state is loaded from and every action is saved to: CsvStorage (the default) rewrites
+        #   final_hospital_state.csv after every action, an OperationJournal appends every action to a journal and a
+        #   SqliteStorage writes every action to an indexed SQLite database
+        self.__storage = storage if storage is not None else CsvStorage()
+        # while a batch is applied: the Hospital objects whose free beds have changed, they are updated once at the end
+        #   of the batch
+        self.__deferred_beds = None
+        # EventBus the admissions, transfers, discharges and status changes of addPatient, transferPatient,
+        #   dischargePatient(s), updateStatus, apply_batch and apply_operation are published to, printed to the console
+        #   by default
+        self.__events = events if events is not None else EventBus([ConsoleSink()])
+
+    def add_hospital(self, hospital):
+        """
+        add_hospital adds the Hospital object, hospital, to the hospitals dictionary under its lower case name
+        :param hospital: Hospital
+        :return: None
+        """
+        name = hospital.get_name().lower()
+        self.hospitals[name] = hospital
+        if self.__thread_safe:
+            self.__hospital_locks[name] = threading.Lock()
+        if self.__patient_store is not None:
+            hospital.use_patient_store(self.__patient_store)
+        with self.__shared_lock:
+            self.__beds.add_hospital(name, hospital.available_beds())
+            self.__total_beds += hospital.get_total_beds()
+        hospital.get_census().set_parent(self.__census)
 
     def get_values_or_keys(self, option):
         """
@@ -31,40 +102,47 @@ class PatientManagementSystem:
         :return: List of Patient or List of str
         """
         data = []
-        if option == "values":
-            data = list(self.hospitals.get("kingston").get_patients().values()) + \
-                           list(self.hospitals.get("hamilton").get_patients().values()) + \
-                           list(self.hospitals.get("toronto").get_patients().values())
-        if option == "keys":
-            data = list(self.hospitals.get("kingston").get_patients().keys()) + \
-                       list(self.hospitals.get("hamilton").get_patients().keys()) + \
-                       list(self.hospitals.get("toronto").get_patients().keys())
+        for hospital in self.hospitals.values():  # hospitals in the order they were added
+            if option == "values":
+                data.extend(hospital.get_patients().values())
+            if option == "keys":
+                data.extend(hospital.get_patients().keys())
         return data
 
-    def read_in_csv(self):
+    def read_in_csv(self, file_name='initial_hospital_state.csv', loader=None):
         """
-        reads in the initial_hospital_state.csv file into the hospitals dictionary of a PatientManagementSystem object
-        :return: None
+        reads in the initial_hospital_state.csv file (or file_name) into the hospitals dictionary of a
+            PatientManagementSystem object with a StateLoader (loader, or one with the default options), which loads
+            the file chunk by chunk in bulk. Rows that cannot be loaded (duplicate ids, unknown or full hospitals,
+            invalid statuses, ...) are left out and reported. Returns the LoadReport, or None if the file could not be
+            read.
+        :param file_name: str
+        :param loader: StateLoader or None
+        :return: LoadReport or None
         """
+        loader = loader if loader is not None else StateLoader()
         try:
-            with open('initial_hospital_state.csv', 'r') as csv_file:
-                patient_reader = csv.reader(csv_file, delimiter=',')
-                next(patient_reader)  # skip header
-
-                for row in patient_reader:
-                    # make a new Patient object
-                    new_patient = Patient(row[1], row[2], row[3], row[4])
-                    # add Patient object to the correct hospital
-                    self.hospitals.get(row[2].lower()).add_patients(row[1], new_patient)
-        except:
-            print("There was a problem with opening initial_hospital_state.csv, the system is currently empty.")
-
-    def write_out_csv(self):
+            report = loader.load(self, file_name)
+        except OSError:
+            print("There was a problem with opening {}, the system is currently empty.".format(file_name))
+            return None
+        except (UnicodeDecodeError, csv.Error) as error:
+            print("There was a problem with reading {}, only the rows before the problem were loaded: {}".format(
+                file_name, error))
+            return None
+        if report.get_rejected() > 0:
+            for line in report.describe():
+                print(line)
+        return report
+
+    def write_out_csv(self, file_name='final_hospital_state.csv'):
         """
-        writes out to final_hospital_state.csv from the hospitals dictionary of a PatientManagementSystem object
+        writes out to final_hospital_state.csv (or file_name) from the hospitals dictionary of a
+            PatientManagementSystem object
+        :param file_name: str
         :return: None
         """
-        with open('final_hospital_state.csv', 'w') as csv_file:
+        with open(file_name, 'w') as csv_file:
             patient_writer = csv.writer(csv_file, delimiter=',', lineterminator='\n')
             # all existing ids
             all_patients = self.get_values_or_keys("values")
@@ -76,37 +154,247 @@ class PatientManagementSystem:
                 patient_writer.writerow([str(patient_number)] + patient.get_info())  # write patient info to csv file
                 patient_number += 1
 
-    def addPatient(self, hospital_name, sev_status, covid_positive):
+    def load_state(self):
+        """
+        load_state loads the state of the system from its storage when the program starts
+        :return: None
+        """
+        self.__storage.load(self)
+
+    def save_state(self):
+        """
+        save_state saves the state of the system to its storage after an action. With the default CsvStorage
+            final_hospital_state.csv is rewritten, other storages have already written the action when it was made.
+            In thread-safe mode every hospital is locked while saving.
+        :return: None
+        """
+        with self.__lock_hospitals(self.__hospital_locks):
+            self.__save_state()
+
+    def __save_state(self):
+        """
+        __save_state saves the state of the system, the caller holds the locks of every hospital
+        :return: None
+        """
+        self.__storage.save(self)
+
+    def load_patient(self, patient_id, hospital_name, sev_status, covid_positive):
         """
-        addPatient generates a new unique id across all the hospitals and creates a new Patient using this newly
-            created key, sev_status and covid_positive value. This Patient is then assigned to the Hospital that
-            corresponds with hospital_name. When this method is called, the Hospital should have available space or
-            a new patient cannot be admitted.
+        load_patient admits a patient that already has an id (e.g. read in from a csv file or journal) to the Hospital
+            that corresponds with hospital_name, replacing any patient already in the system with that id. Nothing
+            is printed or journaled.
+        :param patient_id: str
         :param hospital_name: str
         :param sev_status: str
         :param covid_positive: str
         :return: None
         """
-        # all existing ids
-        all_patients = self.get_values_or_keys("keys")
+        if patient_id in self.__patient_index:
+            self.remove_patient(patient_id)
+        hospital = self.hospitals.get(hospital_name.lower())
+        hospital.add_patients(patient_id, self.__new_patient(patient_id, hospital_name, sev_status, covid_positive))
+        self.__update_beds(hospital)
+        self.__patient_index[patient_id] = hospital
+        with self.__shared_lock:
+            self.__id_allocator.reserve(patient_id)  # make sure this id is never generated for a new patient
+
+    def check_patient_ids(self, patient_ids):
+        """
+        check_patient_ids returns the ids of patient_ids that cannot be loaded into the system with the reason why, as a
+            dictionary: the ids of patients already in the system and the ids that are not in the id format of its id
+            allocator (which a PatientStore of the system shares)
+        :param patient_ids: List of str
+        :return: dict
+        """
+        rejected = dict.fromkeys(compress(patient_ids, map(self.__patient_index.__contains__, patient_ids)),
+                                 DUPLICATE_ID)
+        codes = self.__id_allocator.decode_many(patient_ids)
+        rejected.update(dict.fromkeys(compress(patient_ids, map(operator.is_, codes, repeat(None))), INVALID_ID))
+        return rejected
 
-        # generating new unique id
-        random_id = str(random.randint(0, 9)) \
-                    + str(random.randint(0, 9)) \
-                    + str(random.randint(0, 9)) \
-                    + random.choice(string.ascii_letters)
+    def load_patients(self, patient_ids, hospital_names, statuses, covid_positives):
+        """
+        load_patients admits patients that already have ids (the rows of a state file, as lists in the same order) to
+            the Hospitals that correspond with hospital_names in bulk, in the same order as load_patient would one by
+            one. The rows must have been checked first (see StateLoader): the ids must be new (check_patient_ids), the
+            hospitals must exist and have a bed for every patient, and the statuses must be valid. Every hospital's
+            free beds are updated once and the ids are reserved in the id allocator together. Nothing is printed or
+            journaled.
+        :param patient_ids: List of str
+        :param hospital_names: List of str
+        :param statuses: List of str
+        :param covid_positives: List of str
+        :return: None
+        """
+        names = set(hospital_names)
+        if len(names) == 1:
+            groups = {names.pop(): [patient_ids, hospital_names, statuses, covid_positives]}
+        else:
+            # row numbers of every hospital, as written in the file (the same hospital can be spelled differently)
+            rows = {}
+            for row, name in enumerate(hospital_names):
+                rows.setdefault(name, []).append(row)
+            groups = {name: [[column[row] for row in name_rows]
+                             for column in [patient_ids, hospital_names, statuses, covid_positives]]
+                      for name, name_rows in rows.items()}
+        for name, (group_ids, group_names, group_statuses, group_covid) in groups.items():
+            hospital = self.hospitals[name.lower()]
+            if self.__patient_store is not None:
+                patients = list(map(self.__new_patient, group_ids, group_names, group_statuses, group_covid))
+            else:
+                patients = list(map(Patient, group_ids, group_names, group_statuses, group_covid))
+            hospital.add_many_patients(group_ids, patients, group_statuses, group_covid)
+            self.__patient_index.update(zip(group_ids, repeat(hospital)))
+            self.__update_beds(hospital)
+        with self.__shared_lock:
+            self.__id_allocator.reserve_many(patient_ids)  # make sure these ids are never generated for new patients
+
+    def get_state(self):
+        """
+        get_state returns the patients of the system and the state of its id allocator in a compact form for a
+            checkpoint, see set_state. The patients are stored hospital by hospital in the order they were admitted:
+            the number of patients of every hospital, one byte per patient packing its severity status (bits 0-1) and
+            covid status (bit 2), and the patient ids.
+        :return: dict
+        """
+        counts = array("I")
+        codes = bytearray()
+        ids = []
+        renamed = {}  # patient id -> hospital name of patients registered under another spelling than the hospital's
+        for name, hospital in self.hospitals.items():
+            patients = hospital.get_patients()
+            counts.append(len(patients))
+            for patient_id, patient in patients.items():
+                info = patient.get_info()
+                codes.append(int(info[2]) | (4 if info[3] == "true" else 0))
+                ids.append(patient_id)
+                if info[1] != name:
+                    renamed[patient_id] = info[1]
+        with self.__shared_lock:
+            id_allocator = self.__id_allocator.get_state()
+        return {"hospitals": list(self.hospitals), "counts": counts.tobytes(), "codes": bytes(codes),
+                "ids": "\n".join(ids).encode("ascii"), "renamed": renamed, "id_allocator": id_allocator}
+
+    def set_state(self, state):
+        """
+        set_state loads the patients and id allocator of a state returned by get_state into this system, which must
+            hold the same hospitals and no patients. The patients are admitted in the same order, so the system behaves
+            exactly like the one the state was taken from.
+        :param state: dict
+        :return: None
+        """
+        if state["hospitals"] != list(self.hospitals):
+            raise ValueError("the state was taken from a system with other hospitals")
+        if self.__patient_index:
+            raise ValueError("the state can only be loaded into a system without patients")
+        with self.__shared_lock:
+            self.__id_allocator = PatientIdAllocator.from_state(state["id_allocator"])
+        counts = array("I")
+        counts.frombytes(state["counts"])
+        ids = state["ids"].decode("ascii").split("\n") if state["ids"] else []
+        codes = state["codes"]
+        renamed = state["renamed"]
+        start = 0
+        for (name, hospital), count in zip(self.hospitals.items(), counts):
+            # every id is already in use in the restored allocator, so the patients are admitted without reserving
+            #   their ids again, and the free beds of the hospital are updated once
+            for number in range(start, start + count):
+                patient_id = ids[number]
+                hospital.add_patients(patient_id, self.__new_patient(patient_id, renamed.get(patient_id, name),
+                                                                     str(codes[number] & 3),
+                                                                     "true" if codes[number] & 4 else "false"))
+                self.__patient_index[patient_id] = hospital
+            self.__update_beds(hospital)
+            start += count
+
+    def reserve_patient_id(self, patient_id):
+        """
+        reserve_patient_id keeps patient_id from being given to a new patient, used for patients that are saved in a
+            hospital that is not part of the system
+        :param patient_id: str
+        :return: None
+        """
+        with self.__shared_lock:
+            self.__id_allocator.reserve(patient_id)
+
+    def move_patient(self, patient_id, new_hospital_name):
+        """
+        move_patient moves the Patient object with patient_id from its current Hospital object to the one that
+            corresponds with new_hospital_name without printing or journaling anything
+        :param patient_id: str
+        :param new_hospital_name: str
+        :return: None
+        """
+        curr_hospital = self.find_patient_hospital(patient_id)  # get the current hospital of the patient
+        new_hospital = self.hospitals.get(new_hospital_name.lower())  # get the new hospital of the patient
+        patient = curr_hospital.discharge_patient(patient_id)  # discharges patient from old hospital
 
-        while random_id in all_patients:
-            random_id = str(random.randint(0, 9)) + str(random.randint(0, 9)) + str(random.randint(0, 9)) \
-                        + random.choice(string.ascii_letters)
+        # transfer to new hospital
+        patient.update_hospital(new_hospital_name)
+        new_hospital.add_patients(patient_id, patient)
+        self.__update_beds(curr_hospital)
+        self.__update_beds(new_hospital)
+        self.__patient_index[patient_id] = new_hospital
+
+    def remove_patient(self, patient_id):
+        """
+        remove_patient removes the Patient object with patient_id from its Hospital object and hands its id back to
+            the id allocator without printing or journaling anything. Returns the Hospital object it was removed from.
+        :param patient_id: str
+        :return: Hospital
+        """
+        hospital = self.find_patient_hospital(patient_id)  # find the patient's current hospital
+        # remove the Patient object from the Hospital object by calling Hospital object's discharge_patient() method
+        patient = hospital.discharge_patient(patient_id)
+        self.__update_beds(hospital)
+        del self.__patient_index[patient_id]
+        with self.__shared_lock:
+            if self.__patient_store is not None:
+                self.__patient_store.remove(patient)  # free its slot
+            self.__id_allocator.release(patient_id)  # recycle or retire the id
+        return hospital
+
+    def create_patient(self, hospital_name, sev_status, covid_positive):
+        """
+        create_patient admits a new patient with a new id from the id allocator to the Hospital that corresponds with
+            hospital_name without printing or journaling anything, and returns the id. Raises PatientIdsExhaustedError
+            if every patient id is in use.
+        :param hospital_name: str
+        :param sev_status: str
+        :param covid_positive: str
+        :return: str
+        """
+        # generating new unique id
+        with self.__shared_lock:
+            random_id = self.__id_allocator.allocate()
 
         # create new Patient object
-        patient = Patient(random_id, "Kingston", sev_status, covid_positive)
+        patient = self.__new_patient(random_id, hospital_name.lower(), sev_status, covid_positive)
 
         # assign Patient to appropriate hospital
-        self.hospitals.get(hospital_name.lower()).add_patients(random_id, patient)
+        hospital = self.hospitals.get(hospital_name.lower())
+        hospital.add_patients(random_id, patient)
+        self.__update_beds(hospital)
+        self.__patient_index[random_id] = hospital
+        return random_id
 
-        print("Patient successfully added to the {} hospital.".format(hospital_name))
+    def addPatient(self, hospital_name, sev_status, covid_positive):
+        """
+        addPatient gets a new unique id across all the hospitals from the id allocator and creates a new Patient using
+            this newly created key, sev_status and covid_positive value. This Patient is then assigned to the Hospital
+            that corresponds with hospital_name. When this method is called, the Hospital should have available space
+            or a new patient cannot be admitted. Raises PatientIdsExhaustedError if every patient id is in use.
+        :param hospital_name: str
+        :param sev_status: str
+        :param covid_positive: str
+        :return: None
+        """
+        random_id = self.create_patient(hospital_name, sev_status, covid_positive)
+        self.__record({"op": "add", "id": random_id, "hospital": hospital_name.lower(), "status": sev_status,
+                       "covid": covid_positive})
+
+        self.__events.publish(ADMITTED, {"id": random_id, "hospital": hospital_name, "status": sev_status,
+                                         "covid": covid_positive})
 
     def transferPatient(self, patient_id, new_hospital_name):
         """
@@ -118,14 +406,9 @@ class PatientManagementSystem:
         :param new_hospital_name: str
         :return: None
         """
-
-        curr_hospital = self.find_patient_hospital(patient_id)  # get the current hospital of the patient
-        new_hospital = self.hospitals.get(new_hospital_name.lower())  # get the new hospital of the patient
-        patient = curr_hospital.discharge_patient(patient_id)  # discharges patient from old hospital
-
-        # transfer to new hospital
-        new_hospital.add_patients(patient_id, patient)
-        print("Patient transferred successfully to the {} hospital.".format(new_hospital_name))
+        self.move_patient(patient_id, new_hospital_name)
+        self.__record({"op": "transfer", "id": patient_id, "hospital": new_hospital_name.lower()})
+        self.__events.publish(TRANSFERRED, {"id": patient_id, "hospital": new_hospital_name})
 
     def dischargePatient(self, patient_id):
         """
@@ -135,12 +418,33 @@ class PatientManagementSystem:
         :param patient_id: str
         :return: None
         """
-        hospital = self.find_patient_hospital(patient_id)  # find the patient's current hospital
-        # remove the Patient object from the Hospital object by calling Hospital object's discharge_patient() method
-        hospital.discharge_patient(patient_id)
+        hospital = self.remove_patient(patient_id)
+        self.__record({"op": "discharge", "id": patient_id})
+
+        self.__events.publish(DISCHARGED, {"id": patient_id, "hospital": hospital.get_name().capitalize()})
 
-        print("Patient {} has been discharged from the {} hospital.".format(patient_id,
-                                                                            hospital.get_name().capitalize()))
+    def dischargePatients(self, patient_ids):
+        """
+        dischargePatients discharges every patient in patient_ids. They are discharged in sorted order so the ids handed
+            back to the id allocator (and therefore the ids of later patients) do not depend on the order given.
+        :param patient_ids: List of str
+        :return: None
+        """
+        discharged_from = {}  # hospital name -> Hospital object, their free beds are updated once at the end
+        for patient_id in sorted(patient_ids):
+            hospital = self.__patient_index.pop(patient_id)
+            patient = hospital.discharge_patient(patient_id)
+            with self.__shared_lock:
+                if self.__patient_store is not None:
+                    self.__patient_store.remove(patient)
+                self.__id_allocator.release(patient_id)
+            self.__record({"op": "discharge", "id": patient_id})
+            name = hospital.get_name()
+            discharged_from[name] = hospital
+            self.__events.publish(DISCHARGED, {"id": patient_id, "hospital": name})
+        with self.__shared_lock:
+            for name, hospital in discharged_from.items():
+                self.__beds.update(name.lower(), hospital.available_beds())
 
     def updateStatus(self, patient_id, new_status):
         """
@@ -153,24 +457,396 @@ class PatientManagementSystem:
         hospital = self.find_patient_hospital(patient_id)  # get the hospital of the patient
         patient = hospital.get_patient(patient_id)  # get the patient object from the Hospital object
 
-        if patient.get_status() == new_status:  # if the new status of the patient is the same as the current one
-            print("The patient already has a status of {}".format(new_status))
+        old_status = patient.get_status()
+        if old_status == new_status:  # if the new status of the patient is the same as the current one
+            self.__events.publish(MESSAGE, {"text": "The patient already has a status of {}".format(new_status)})
+            self.__events.publish(MESSAGE, {"text": "The status of {} has been successfully updated.".format(
+                patient_id)})
         else:
             patient.update_status(new_status)
-        print("The status of {} has been successfully updated.".format(patient_id))
+            self.__record({"op": "update", "id": patient_id, "status": new_status})
+            self.__events.publish(STATUS_CHANGED, {"id": patient_id, "old": old_status, "new": new_status})
+
+    def apply_batch(self, operations, atomic=True):
+        """
+        apply_batch applies a batch of operations without any input or printing and saves the state of the system once
+            at the end. Every operation is a dictionary in the format of a journal record without the id of new
+            patients:
+                {"op": "add", "hospital": str, "status": str, "covid": str}
+                {"op": "transfer", "id": str, "hospital": str}
+                {"op": "discharge", "id": str}
+                {"op": "update", "id": str, "status": str}
+            The same rules as the text interface apply: a hospital must have an available bed to take a patient, a
+            patient with a severity status of 3 cannot be transferred and only a patient with a severity status of 0
+            can be discharged. With atomic=True every operation is checked first and if any of them fails none are
+            applied, otherwise the operations that fail are skipped and the rest are applied.
+            The event of every operation applied is published to the event bus of the system, like the events of the
+            text interface (a system given a bus without a ConsoleSink prints nothing).
+            Returns one result per operation: {"op": str, "id": str or None, "ok": Bool, "error": str or None}, the
+            id of an add being the id of the new patient. "ok" is True if the operation was applied and "error" holds
+            the reason it could not be, an operation of a rolled back atomic batch that did not fail itself has
+            neither.
+        :param operations: iterable of dict
+        :param atomic: Bool
+        :return: List of dict
+        """
+        operations = list(operations)
+        with self.__lock_hospitals(self.__hospital_locks):  # in thread-safe mode the batch holds every hospital
+            if atomic:
+                # check the whole batch against the state it would leave behind, without changing anything yet
+                pending = {"hospitals": {}, "statuses": {}, "beds": {}, "free_ids": self.__id_allocator.available()}
+                errors = [self.__check_operation(operation, pending) for operation in operations]
+                if any(errors):
+                    return [dict(self.__batch_result(operation, operation.get("id"), error), ok=False)
+                            for operation, error in zip(operations, errors)]
+
+            results = []
+            records = []
+            self.__deferred_beds = set()
+            try:
+                for operation in operations:
+                    error = None if atomic else self.__check_operation(operation)
+                    if error is None:
+                        patient_id = self.__apply_operation(operation, records)
+                    else:
+                        patient_id = operation.get("id")
+                    results.append(self.__batch_result(operation, patient_id, error))
+            finally:
+                deferred, self.__deferred_beds = self.__deferred_beds, None
+                with self.__shared_lock:
+                    for hospital in deferred:
+                        self.__beds.update(hospital.get_name().lower(), hospital.available_beds())
+
+            # persist once for the whole batch
+            if records:
+                with self.__shared_lock:
+                    self.__storage.append_many(records)
+            self.__save_state()
+            return results
+
+    def apply_operation(self, operation):
+        """
+        apply_operation applies one operation (see apply_batch) and appends its record to the storage, without
+            saving the state. Returns its result in the format of apply_batch. In thread-safe mode it can be called
+            from many threads at once: the locks of the hospitals the operation touches (the hospital of the patient,
+            and the new hospital of a transfer) are taken in sorted order so two transfers can never wait on each
+            other, and the operation is checked and applied while they are held.
+        :param operation: dict
+        :return: dict
+        """
+        while True:
+            names = self.__operation_hospitals(operation)
+            with self.__lock_hospitals(names):
+                if self.__operation_hospitals(operation) != names:
+                    continue  # the patient was moved before its hospital was locked, try again
+                error = self.__check_operation(operation)
+                patient_id = operation.get("id")
+                if error is None:
+                    records = []
+                    try:
+                        patient_id = self.__apply_operation(operation, records)
+                    except PatientIdsExhaustedError:  # another thread took the last free id after the check
+                        error = "all patient ids are in use"
+                    for record in records:
+                        self.__record(record)
+                return self.__batch_result(operation, patient_id, error)
+
+    @staticmethod
+    def parse_operation(row):
+        """
+        parse_operation turns a row of a batch file (a command followed by its values, e.g.
+            ["add", "Kingston", "3", "true"], ["transfer", "123f", "Toronto"], ["discharge", "123f"] or
+            ["update", "123f", "0"]) into an operation for apply_batch. A row that is not a valid command becomes an
+            operation that fails with the reason.
+        :param row: List of str
+        :return: dict
+        """
+        command = row[0].strip().lower() if row else ""
+        if command not in BATCH_COMMANDS:
+            return {"op": command, "error": "unknown command {}".format(command)}
+        fields = BATCH_COMMANDS[command]
+        if len(row) != len(fields) + 1:
+            return {"op": command, "error": "{} must be followed by {}".format(command, ", ".join(fields))}
+        operation = {"op": command}
+        for field, value in zip(fields, row[1:]):
+            operation[field] = value.strip()
+        return operation
+
+    def __check_operation(self, operation, pending=None):
+        """
+        __check_operation returns the reason operation cannot be applied, or None if it can. pending holds the changes
+            of the earlier operations of an atomic batch that have been checked but not applied yet, the operation is
+            checked against them and its own changes are added to them if it can be applied.
+        :param operation: dict
+        :param pending: dict or None
+        :return: str or None
+        """
+        command = operation.get("op")
+        if "error" in operation:
+            return operation["error"]
+        if command not in BATCH_COMMANDS:
+            return "unknown command {}".format(command)
+
+        if command == "add":
+            hospital_name = str(operation.get("hospital")).lower()
+            if hospital_name not in self.hospitals:
+                return "there is no hospital called {}".format(operation.get("hospital"))
+            if self.__batch_free_beds(hospital_name, pending) < 1:
+                return "the {} hospital has no available beds".format(hospital_name.capitalize())
+            if operation.get("status") not in STATUSES:
+                return "the severity status must be 0, 1, 2 or 3"
+            if str(operation.get("covid")).lower() not in ["true", "false"]:
+                return "the covid status must be either \"true\" or \"false\""
+            free_ids = pending["free_ids"] if pending is not None else self.__id_allocator.available()
+            if free_ids < 1:
+                return "all patient ids are in use"
+            if pending is not None:
+                pending["beds"][hospital_name] = self.__batch_free_beds(hospital_name, pending) - 1
+                pending["free_ids"] -= 1
+            return None
+
+        patient_id = operation.get("id")
+        hospital_name = self.__batch_hospital(patient_id, pending)
+        if hospital_name is None:
+            return "there is no patient with the id {}".format(patient_id)
+        status = self.__batch_status(patient_id, pending)
+
+        if command == "transfer":
+            new_hospital_name = str(operation.get("hospital")).lower()
+            if new_hospital_name not in self.hospitals:
+                return "there is no hospital called {}".format(operation.get("hospital"))
+            if status == "3":
+                return "patient {} has a severity status of 3 and cannot be transferred".format(patient_id)
+            if new_hospital_name == hospital_name:
+                return "patient {} is already at the {} hospital".format(patient_id, hospital_name.capitalize())
+            if self.__batch_free_beds(new_hospital_name, pending) < 1:
+                return "the {} hospital has no available beds".format(new_hospital_name.capitalize())
+            if pending is not None:
+                pending["beds"][hospital_name] = self.__batch_free_beds(hospital_name, pending) + 1
+                pending["beds"][new_hospital_name] = self.__batch_free_beds(new_hospital_name, pending) - 1
+                pending["hospitals"][patient_id] = new_hospital_name
+        elif command == "discharge":
+            if status != "0":
+                return "patient {} has a severity status of {}, only patients with a severity status of 0 can be " \
+                       "discharged".format(patient_id, status)
+            if pending is not None:
+                pending["beds"][hospital_name] = self.__batch_free_beds(hospital_name, pending) + 1
+                pending["hospitals"][patient_id] = None
+                if self.__id_allocator.get_release_policy() == "recycle":
+                    pending["free_ids"] += 1
+        else:  # update
+            if operation.get("status") not in STATUSES:
+                return "the severity status must be 0, 1, 2 or 3"
+            if pending is not None:
+                pending["statuses"][patient_id] = operation["status"]
+        return None
+
+    def __batch_hospital(self, patient_id, pending):
+        """
+        __batch_hospital returns the lower case name of the hospital of patient_id once the pending changes are
+            applied, or None if the patient is not in the system
+        :param patient_id: str
+        :param pending: dict or None
+        :return: str or None
+        """
+        if pending is not None and patient_id in pending["hospitals"]:
+            return pending["hospitals"][patient_id]
+        hospital = self.__patient_index.get(patient_id)
+        return hospital.get_name().lower() if hospital is not None else None
+
+    def __batch_status(self, patient_id, pending):
+        """
+        __batch_status returns the severity status of patient_id once the pending changes are applied
+        :param patient_id: str
+        :param pending: dict or None
+        :return: str
+        """
+        if pending is not None and patient_id in pending["statuses"]:
+            return pending["statuses"][patient_id]
+        return self.__patient_index[patient_id].get_patient(patient_id).get_status()
+
+    def __batch_free_beds(self, hospital_name, pending):
+        """
+        __batch_free_beds returns the number of available beds of the hospital called hospital_name once the pending
+            changes are applied
+        :param hospital_name: str
+        :param pending: dict or None
+        :return: int
+        """
+        if pending is not None and hospital_name in pending["beds"]:
+            return pending["beds"][hospital_name]
+        return self.hospitals[hospital_name].available_beds()
+
+    def __apply_operation(self, operation, records):
+        """
+        __apply_operation applies an operation of a batch that has been checked, adds its journal record to records
+            and publishes its event. Returns the id of the patient of the operation.
+        :param operation: dict
+        :param records: List of dict
+        :return: str
+        """
+        command = operation["op"]
+        if command == "add":
+            covid_positive = operation["covid"].lower()
+            patient_id = self.create_patient(operation["hospital"], operation["status"], covid_positive)
+            records.append({"op": "add", "id": patient_id, "hospital": operation["hospital"].lower(),
+                            "status": operation["status"], "covid": covid_positive})
+            self.__events.publish(ADMITTED, {"id": patient_id, "hospital": operation["hospital"],
+                                             "status": operation["status"], "covid": covid_positive})
+            return patient_id
+
+        patient_id = operation["id"]
+        if command == "transfer":
+            self.move_patient(patient_id, operation["hospital"])
+            records.append({"op": "transfer", "id": patient_id, "hospital": operation["hospital"].lower()})
+            self.__events.publish(TRANSFERRED, {"id": patient_id, "hospital": operation["hospital"]})
+        elif command == "discharge":
+            hospital = self.remove_patient(patient_id)
+            records.append({"op": "discharge", "id": patient_id})
+            self.__events.publish(DISCHARGED, {"id": patient_id, "hospital": hospital.get_name().capitalize()})
+        else:  # update
+            patient = self.__patient_index[patient_id].get_patient(patient_id)
+            old_status = patient.get_status()
+            if old_status != operation["status"]:
+                patient.update_status(operation["status"])
+                records.append({"op": "update", "id": patient_id, "status": operation["status"]})
+                self.__events.publish(STATUS_CHANGED, {"id": patient_id, "old": old_status,
+                                                       "new": operation["status"]})
+        return patient_id
+
+    def __operation_hospitals(self, operation):
+        """
+        __operation_hospitals returns the lower case names of the hospitals in the system that operation touches
+        :param operation: dict
+        :return: List of str
+        """
+        names = []
+        if operation.get("op") != "add":
+            hospital = self.__patient_index.get(operation.get("id"))
+            if hospital is not None:
+                names.append(hospital.get_name().lower())
+        if operation.get("op") in ["add", "transfer"]:
+            name = str(operation.get("hospital")).lower()
+            if name in self.hospitals and name not in names:
+                names.append(name)
+        return names
+
+    def __lock_hospitals(self, names):
+        """
+        __lock_hospitals takes the locks of the hospitals called names in sorted order and returns a context manager
+            that releases them. Outside thread-safe mode there are no locks to take.
+        :param names: iterable of str
+        :return: contextlib.ExitStack
+        """
+        stack = contextlib.ExitStack()
+        for name in sorted(names):
+            if name in self.__hospital_locks:
+                stack.enter_context(self.__hospital_locks[name])
+        return stack
+
+    @staticmethod
+    def __batch_result(operation, patient_id, error):
+        """
+        __batch_result returns the result of an operation of a batch
+        :param operation: dict
+        :param patient_id: str or None
+        :param error: str or None
+        :return: dict
+        """
+        return {"op": operation.get("op"), "id": patient_id, "ok": error is None, "error": error}
+
+    def __new_patient(self, patient_id, hospital_name, sev_status, covid_positive):
+        """
+        __new_patient creates a new Patient object, or a PatientView in the patient store if the system has one
+        :param patient_id: str
+        :param hospital_name: str
+        :param sev_status: str
+        :param covid_positive: str
+        :return: Patient or PatientView
+        """
+        if self.__patient_store is not None:
+            with self.__shared_lock:
+                return self.__patient_store.add(patient_id, hospital_name, sev_status, covid_positive)
+        return Patient(patient_id, hospital_name, sev_status, covid_positive)
+
+    def __update_beds(self, hospital):
+        """
+        __update_beds updates the free beds of the Hospital object, hospital, in the bed availability structure, or
+            leaves it for the end of the batch being applied
+        :param hospital: Hospital
+        :return: None
+        """
+        if self.__deferred_beds is not None:
+            self.__deferred_beds.add(hospital)
+        else:
+            with self.__shared_lock:
+                self.__beds.update(hospital.get_name().lower(), hospital.available_beds())
+
+    def __record(self, record):
+        """
+        __record appends the record of an action to the storage of the system
+        :param record: dict
+        :return: None
+        """
+        with self.__shared_lock:
+            self.__storage.append(record)
 
     def hospital_availability(self):
         """
-        hospital_availability iterates through all the Hospital objects and appends the names of those that have
-            space available to take new patients by using the available_beds() method from the Hospital class. The
-            list of strings is then returned.
+        hospital_availability returns the names of the hospitals that have space available to take new patients, in
+            the order of the hospitals dictionary.
         :return: List of Str
         """
-        available = []
-        for hospital in self.hospitals.values():  # iterate Hospital objects
-            if hospital.available_beds() > 0:  # determine if beds are available at the current Hospital
-                available.append(hospital.get_name().lower())
-        return available
+        return self.hospitals_with_beds(1)
+
+    def hospitals_with_beds(self, beds):
+        """
+        hospitals_with_beds returns the names of the hospitals with at least beds available beds, in the order of the
+            hospitals dictionary
+        :param beds: int
+        :return: List of str
+        """
+        with self.__shared_lock:
+            return self.__beds.with_at_least(beds)
+
+    def hospital_with_most_beds(self):
+        """
+        hospital_with_most_beds returns the name of the hospital with the most available beds (the first one in the
+            hospitals dictionary if several have the same number), or an empty string if every hospital is full
+        :return: str
+        """
+        with self.__shared_lock:
+            return self.__beds.most_free()
+
+    def network_full(self):
+        """
+        network_full returns True if none of the hospitals have an available bed
+        :return: Bool
+        """
+        with self.__shared_lock:
+            return self.__beds.is_full()
+
+    def census_stats(self, hospital_name=None):
+        """
+        census_stats returns the current counts of the hospital called hospital_name, or of the whole network if no
+            name is given, without scanning the patients: the number of beds, occupied beds and available beds, of
+            covid positive patients and of patients with each severity status (in total and split by covid status).
+            None is returned if there is no hospital called hospital_name.
+        :param hospital_name: str or None
+        :return: dict or None
+        """
+        if hospital_name is None:
+            stats = {"name": None, "total_beds": self.__total_beds}
+            stats.update(self.__census.get_stats())
+        else:
+            hospital = self.hospitals.get(hospital_name.lower())
+            if hospital is None:
+                return None
+            stats = {"name": hospital.get_name(), "total_beds": hospital.get_total_beds()}
+            stats.update(hospital.get_census().get_stats())
+        stats["occupied_beds"] = stats["patients"]
+        stats["available_beds"] = stats["total_beds"] - stats["patients"]
+        return stats
 
     def get_patient(self):
         """
@@ -185,13 +861,20 @@ class PatientManagementSystem:
 
         while patient_hospital == False:  # keep asking until a valid id is entered
             print("This patient ID does not exist, please make sure the ID "
-                  "consists of 3 numbers followed by a letter.")
+                  "consists of {}.".format(self.__id_allocator.describe_format()))
             patient_id = input()
             # check if a Patient object with this id exists
             patient_hospital = self.find_patient_hospital(patient_id.lower())
 
         return patient_id
 
+    def get_events(self):
+        """
+        get_events returns the EventBus the changes made to the system are published to
+        :return: EventBus
+        """
+        return self.__events
+
     def find_patient_hospital(self, patient_id):
         """
         find_patient_hospital uses the string patient_id to find the Hospital of the patient and returns the Hospital
@@ -199,19 +882,8 @@ class PatientManagementSystem:
         :param patient_id: str
         :return: Hospital or Bool
         """
-        # returns the kingston hospital
-        if patient_id in self.hospitals.get("kingston").get_patients().keys():
-            return self.hospitals.get("kingston")
-
-        # returns the hamilton hospital
-        if patient_id in self.hospitals.get("hamilton").get_patients().keys():
-            return self.hospitals.get("hamilton")
-
-        # returns the toronto hospital
-        if patient_id in self.hospitals.get("toronto").get_patients().keys():
-            return self.hospitals.get("toronto")
-
-        return False  # patient id doesnt exist
+        # look the patient up in the system-wide index instead of searching every hospital
+        return self.__patient_index.get(patient_id, False)  # False if the patient id doesnt exist
 
     def get_hospital_choice(self, available_hospitals):
         """
@@ -247,28 +919,9 @@ class PatientManagementSystem:
         :param max_length: int
         :return: list of (list of str)
         """
-        # adding all patients ids to patients list to create each row for the table. patient ids appended as long as
-        #   they exist in that index, otherwise an empty string appended
-        patients = []
-
-        for i in range(max_length):
-            temp = []
-            if i < len(self.hospitals.get("kingston").get_patients()):
-                temp.append(list(self.hospitals.get("kingston").get_patients().keys())[i])
-            else:
-                temp.append("")
-            if i < len(self.hospitals.get("hamilton").get_patients()):
-                temp.append(list(self.hospitals.get("hamilton").get_patients().keys())[i])
-            else:
-                temp.append("")
-            if i < len(self.hospitals.get("toronto").get_patients()):
-                temp.append(list(self.hospitals.get("toronto").get_patients().keys())[i])
-            else:
-                temp.append("")
-            if len(temp) > 0:
-                patients.append(temp)
-            temp = []
-        return patients
+        # one column of patient ids per hospital, padded with empty strings where a hospital has fewer patients
+        columns = [hospital.get_patients().keys() for hospital in self.hospitals.values()]
+        return [list(row) for row in islice(zip_longest(*columns, fillvalue=""), max_length)]
 
     def print_patients(self):
         """
@@ -278,16 +931,15 @@ class PatientManagementSystem:
         """
 
         # finding the greatest number of patients in any Hospital
-        max_length = max([len(self.hospitals.get("kingston").get_patients()),
-                          len(self.hospitals.get("hamilton").get_patients()),
-                          len(self.hospitals.get("toronto").get_patients())])
+        max_length = max([len(hospital.get_patients()) for hospital in self.hospitals.values()], default=0)
 
         # adding all patients ids to patients list to create each row for the table. patient ids appended as long as
         #   they exist in that index, otherwise an empty string appended
         patients = self.make_rows_df(max_length)
 
         # creating a pandas dataframe to use to represent the table
-        df = pd.DataFrame(patients, columns=["Kingston", "Hamilton", "Toronto"])
+        import pandas as pd  # only loaded once a table is printed, it is slow to import
+        df = pd.DataFrame(patients, columns=[hospital.get_name() for hospital in self.hospitals.values()])
 
         # printing the table
         print(df.to_string(justify="center"))
@@ -327,7 +979,7 @@ class PatientManagementSystem:
             # adding patient to the hospital
             self.addPatient(choice, sev_status, covid_positive.lower())
 
-        self.write_out_csv()  # save
+        self.save_state()  # save
         print("The system has now saved its state!")
         print("You will now be returned to the main menu.\n")
         self.print_menu()
@@ -378,7 +1030,7 @@ class PatientManagementSystem:
 
                 self.transferPatient(patient, choice)
 
-        self.write_out_csv()  # save
+        self.save_state()  # save
         print("The system has now saved its state!")
         print("\nYou will now be returned to the main menu.")
         self.print_menu()
@@ -402,7 +1054,7 @@ class PatientManagementSystem:
         else:
             self.dischargePatient(patient)
 
-        self.write_out_csv()  # save
+        self.save_state()  # save
         print("The system has now saved its state!")
         print("\nYou will now be returned to the main menu.")
         self.print_menu()
@@ -425,7 +1077,7 @@ class PatientManagementSystem:
         # updating the patient's status
         self.updateStatus(patient, new_sev_status)
 
-        self.write_out_csv()  # save
+        self.save_state()  # save
         print("The system has now saved its state!")
         print("\nYou will now be returned to the main menu.")
         self.print_menu()
@@ -433,23 +1085,13 @@ class PatientManagementSystem:
     @staticmethod
     def find_lowest_status_patient(hospital):
         """
-        find_lowest_status_patient finds the patient in a hospital object, Hospital, with the lowest severity status
-            and returns the patient id of that patient
+        find_lowest_status_patient finds the first patient in a hospital object, Hospital, with the lowest severity
+            status below 3 and returns the patient id of that patient (an empty string if there is none)
         :param hospital: Hospital
         :return: str
         """
-        # find a patient with the lowest severity status
-        low_status_patient_id = ""
-        minimum_status = 3
-        patients = hospital.get_patients()
-
-        # finding minimum status value and keeping track of that patient's id
-        for patient in patients.values():
-            if int(patient.get_status()) < minimum_status:
-                minimum_status = int(patient.get_status())
-                low_status_patient_id = patient.get_id()
-
-        return low_status_patient_id
+        # the hospital keeps its patients indexed by severity status
+        return hospital.lowest_status_patient()
 
     @staticmethod
     def get_sev_status():
@@ -485,8 +1127,8 @@ class PatientManagementSystem:
         run_program is the main driver of the Patient Management System and acts as the text interface for the user
         :return: None
         """
-        # read in csv file
-        self.read_in_csv()
+        # read in csv file (or the storage given)
+        self.load_state()
         print("             ---------------------------------------------------------------------")
         print("             -                                                                   -")
         print("             -                   Patient Management System                       -")
@@ -522,4 +1164,6 @@ def main():
     patient_management_system = PatientManagementSystem()
     patient_management_system.run_program()
 
-main()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+import asyncio
+import json
+from urllib.parse import unquote
+
+# reason phrases of the status codes the service answers with
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+MAX_BODY_SIZE = 1 << 20  # bytes
+# what follows /patients/<id>/ in the path of a change to a patient -> the values it takes from the json body
+PATIENT_ACTIONS = {"transfer": ["hospital"], "discharge": [], "update": ["status"]}
+
+
+class PatientService:
+    """
+    PatientService serves a PatientManagementSystem over HTTP with json bodies, on an asyncio event loop:
+            POST /patients                  {"hospital": str, "status": str, "covid": str} admits a new patient
+            POST /patients/<id>/transfer    {"hospital": str}
+            POST /patients/<id>/discharge
+            POST /patients/<id>/update      {"status": str}
+            POST /batch                     {"operations": [...], "atomic": Bool} (see apply_batch)
+            GET  /patients/<id>             the hospital, status and covid status of a patient
+            GET  /hospitals                 the census of every hospital (see census_stats)
+            GET  /hospitals/<name>          the census of one hospital
+            GET  /census                    the census of the whole network
+            GET  /stats                     the number of changes and of batches they were applied in
+        A change answers 200 (201 for a new patient) with the result of apply_batch, or 422 with the result if the
+        rules do not allow it.
+        Request handlers never change the system themselves. Changes are put on a queue read by a single writer task,
+        which takes every change waiting (up to max_batch) and applies them with one apply_batch call, so the state is
+        saved once per batch. Reads are answered straight away: the event loop runs one task at a time and a batch is
+        applied without awaiting, so a read never sees half a batch and no locks are needed.
+    """
+
+    def __init__(self, system, max_batch=256):
+        self.__system = system
+        self.__max_batch = max_batch
+        self.__queue = None  # made by start(), it has to belong to the running event loop
+        self.__writer = None
+        self.__server = None
+        self.__batches = 0  # apply_batch calls made by the writer
+        self.__changes = 0  # operations applied or rejected by the writer
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """
+        start starts the writer task and listens for connections on host and port (0 picks a free port). Returns the
+            port listened on.
+        :param host: str
+        :param port: int
+        :return: int
+        """
+        self.__queue = asyncio.Queue()
+        self.__writer = asyncio.ensure_future(self.__write_loop())
+        self.__server = await asyncio.start_server(self.__handle_connection, host, port, backlog=4096)
+        return self.__server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host="127.0.0.1", port=8080):
+        """
+        serve_forever starts the service and serves requests until it is cancelled
+        :param host: str
+        :param port: int
+        :return: None
+        """
+        port = await self.start(host, port)
+        print("Serving the Patient Management System on http://{}:{}".format(host, port), flush=True)
+        try:
+            await self.__server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """
+        stop stops listening for connections and stops the writer task once the changes waiting have been applied
+        :return: None
+        """
+        self.__server.close()
+        await self.__server.wait_closed()
+        await self.__queue.join()
+        self.__writer.cancel()
+
+    async def submit(self, operations, atomic=False):
+        """
+        submit puts operations on the queue of the writer and returns their results once they have been applied. An
+            atomic list of operations is applied in an apply_batch call of its own, other operations may be applied
+            together with the operations of other requests.
+        :param operations: List of dict
+        :param atomic: Bool
+        :return: List of dict
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.__queue.put((operations, atomic, future))
+        return await future
+
+    def get_stats(self):
+        """
+        get_stats returns the number of changes applied by the writer and the number of batches they were applied in
+        :return: dict
+        """
+        return {"changes": self.__changes, "batches": self.__batches}
+
+    async def __write_loop(self):
+        """
+        __write_loop is the single writer: it waits for changes and applies every change waiting, up to max_batch of
+            them, in one go
+        :return: None
+        """
+        while True:
+            waiting = [await self.__queue.get()]
+            changes = len(waiting[0][0])
+            while changes < self.__max_batch and not self.__queue.empty():
+                waiting.append(self.__queue.get_nowait())
+                changes += len(waiting[-1][0])
+            try:
+                self.__apply(waiting)
+            finally:
+                for _ in waiting:
+                    self.__queue.task_done()
+
+    def __apply(self, waiting):
+        """
+        __apply applies the changes of the requests waiting and hands every request its results. Changes that are not
+            atomic are applied together in one apply_batch call, every atomic request gets an apply_batch call of its own.
+        :param waiting: List of tuple of (List of dict, Bool, asyncio.Future)
+        :return: None
+        """
+        together = [request for request in waiting if not request[1]]
+        groups = [[request] for request in waiting if request[1]]
+        if together:
+            groups.insert(0, together)
+        for group in groups:
+            operations = [operation for request in group for operation in request[0]]
+            try:
+                results = self.__system.apply_batch(operations, atomic=group[0][1])
+            except Exception as error:  # e.g. the state could not be saved, every request of the group failed
+                for _, _, future in group:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            self.__batches += 1
+            self.__changes += len(operations)
+            start = 0
+            for request_operations, _, future in group:
+                if not future.done():  # the client may have gone away
+                    future.set_result(results[start:start + len(request_operations)])
+                start += len(request_operations)
+
+    async def __handle_connection(self, reader, writer):
+        """
+        __handle_connection reads the requests sent on one connection and answers them in order, keeping the
+            connection open until the client closes it or asks for it to be closed
+        :param reader: asyncio.StreamReader
+        :param writer: asyncio.StreamWriter
+        :return: None
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")  # the request line and headers in one read
+                except asyncio.IncompleteReadError:
+                    break  # the client closed the connection
+                lines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = lines[0].split()
+                keep_alive = len(parts) == 3 and headers.get("connection", "").lower() != "close" \
+                    and (parts[2] == "HTTP/1.1" or headers.get("connection", "").lower() == "keep-alive")
+                try:
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    length = -1
+                if len(parts) != 3 or length < 0:
+                    status, payload, keep_alive = 400, {"error": "malformed request"}, False
+                elif length > MAX_BODY_SIZE:
+                    status, payload, keep_alive = 413, {"error": "the body is too large"}, False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, payload = await self.__route(parts[0].upper(), parts[1], body)
+                    except Exception as error:
+                        status, payload = 500, {"error": str(error)}
+
+                data = json.dumps(payload).encode()
+                writer.write("HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n"
+                             "Connection: {}\r\n\r\n".format(status, REASONS[status], len(data),
+                                                             "keep-alive" if keep_alive else "close")
+                             .encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass  # the client went away or sent headers too large to read
+        finally:
+            writer.close()
+
+    async def __route(self, method, target, body):
+        """
+        __route answers one request, returning the status code and the json payload
+        :param method: str
+        :param target: str
+        :param body: bytes
+        :return: list of [int, object]
+        """
+        path = [unquote(part) for part in target.split("?", 1)[0].strip("/").split("/")]
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            return [400, {"error": "the body is not valid json"}]
+        if not isinstance(data, dict):
+            return [400, {"error": "the body must be a json object"}]
+
+        if path[0] == "patients" and len(path) <= 3:
+            if len(path) == 1:
+                operation = self.operation_from_json("add", data)
+            elif len(path) == 2:
+                if method != "GET":
+                    return [405, {"error": "use GET to look a patient up"}]
+                return self.__lookup_patient(path[1])
+            elif path[2] in PATIENT_ACTIONS:
+                operation = self.operation_from_json(path[2], data)
+                operation["id"] = path[1]
+            else:
+                return [404, {"error": "there is no endpoint /{}".format("/".join(path))}]
+            if method != "POST":
+                return [405, {"error": "use POST to change a patient"}]
+            result = (await self.submit([operation]))[0]
+            return [(201 if operation["op"] == "add" else 200) if result["ok"] else 422, result]
+
+        if path[0] == "batch" and len(path) == 1:
+            if method != "POST":
+                return [405, {"error": "use POST to apply a batch"}]
+            operations = data.get("operations")
+            if not isinstance(operations, list) or not all(isinstance(item, dict) for item in operations):
+                return [400, {"error": "operations must be a list of json objects"}]
+            operations = [self.operation_from_json(str(item.get("op")), item) for item in operations]
+            results = await self.submit(operations, atomic=bool(data.get("atomic", True)))
+            return [200 if all(result["ok"] for result in results) else 422, {"results": results}]
+
+        if method != "GET":
+            return [405, {"error": "use GET to read /{}".format("/".join(path))}]
+        if path == ["hospitals"]:
+            return [200, [self.__system.census_stats(name) for name in self.__system.hospitals]]
+        if path[0] == "hospitals" and len(path) == 2:
+            stats = self.__system.census_stats(path[1])
+            if stats is None:
+                return [404, {"error": "there is no hospital called {}".format(path[1])}]
+            return [200, stats]
+        if path == ["census"]:
+            return [200, self.__system.census_stats()]
+        if path == ["stats"]:
+            return [200, self.get_stats()]
+        return [404, {"error": "there is no endpoint /{}".format("/".join(path))}]
+
+    @staticmethod
+    def operation_from_json(command, data):
+        """
+        operation_from_json turns the json object of a request into an operation for apply_batch, turning numbers and
+            booleans into the strings the system stores
+        :param command: str
+        :param data: dict
+        :return: dict
+        """
+        operation = {"op": command}
+        for field in ["id", "hospital", "status", "covid"]:
+            value = data.get(field)
+            if isinstance(value, bool):
+                value = "true" if value else "false"
+            if value is not None:
+                operation[field] = str(value)
+        return operation
+
+    def __lookup_patient(self, patient_id):
+        """
+        __lookup_patient returns the status code and payload of a patient lookup
+        :param patient_id: str
+        :return: list of [int, dict]
+        """
+        hospital = self.__system.find_patient_hospital(patient_id)
+        if hospital is False:
+            return [404, {"error": "there is no patient with the id {}".format(patient_id)}]
+        info = hospital.get_patient(patient_id).get_info()
+        return [200, {"id": info[0], "hospital": hospital.get_name(), "status": info[2], "covid": info[3]}]
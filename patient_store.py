@@ -0,0 +1,378 @@
+from array import array
+from collections.abc import Mapping
+
+import numpy as np
+
+from patient_ids import PatientIdAllocator
+
+
+class PatientStore:
+    """
+    PatientStore keeps the patients of a PatientManagementSystem column by column in NumPy arrays instead of one
+        Patient object per patient: the code of the patient id, the index of the hospital, the severity status (int8)
+        and whether the patient is covid positive (bool). Every patient has a slot in the arrays, the slots of
+        discharged patients are reused and the arrays double in size when they are full. The hospitals of a system
+        with a store only keep the slot of every patient (see Hospital.use_patient_store) and the order it was admitted
+        in is kept in the arrays too, so there are no Python objects per patient apart from the id. Patients are handed
+        out as PatientView objects, made when they are asked for, that behave like Patient objects, and scans over all
+        patients are done on whole arrays.
+    """
+
+    def __init__(self, id_codec=None, capacity=1024):
+        # turns patient ids into integer codes and back, it must use the same id format as the id allocator
+        self.__id_codec = id_codec if id_codec is not None else PatientIdAllocator()
+        self.__codes = np.zeros(capacity, dtype=np.int64)
+        self.__hospitals = np.zeros(capacity, dtype=np.int32)
+        self.__statuses = np.zeros(capacity, dtype=np.int8)
+        self.__covid = np.zeros(capacity, dtype=np.bool_)
+        self.__in_use = np.zeros(capacity, dtype=np.bool_)
+        self.__admissions = np.zeros(capacity, dtype=np.int64)  # order the patients were admitted to their hospital in
+        self.__owners = [None] * capacity  # slot -> Hospital object holding the patient
+        self.__next_admission = 0
+        # free slots, the lowest on top, as an array so they take 8 bytes each instead of a Python int each
+        self.__free_slots = array("q", range(capacity - 1, -1, -1))
+        self.__hospital_names = []
+        self.__hospital_indices = {}  # hospital name -> index
+
+    def hospital_index(self, hospital_name):
+        """
+        hospital_index returns the index used for the hospital called hospital_name, giving it one if it is new
+        :param hospital_name: str
+        :return: int
+        """
+        name = hospital_name.lower()
+        if name not in self.__hospital_indices:
+            self.__hospital_indices[name] = len(self.__hospital_names)
+            self.__hospital_names.append(name)
+        return self.__hospital_indices[name]
+
+    def get_hospital_names(self):
+        """
+        get_hospital_names returns the names of the hospitals by index
+        :return: List of str
+        """
+        return self.__hospital_names
+
+    def add(self, patient_id, hospital_name, status, covid_positive):
+        """
+        add stores a new patient in a free slot and returns a PatientView of it
+        :param patient_id: str
+        :param hospital_name: str
+        :param status: str
+        :param covid_positive: str
+        :return: PatientView
+        """
+        code = self.__id_codec.decode(patient_id)
+        if code is None:
+            raise ValueError("The patient id {} cannot be stored, ids must consist of {}.".format(
+                patient_id, self.__id_codec.describe_format()))
+        if not self.__free_slots:
+            self.__grow()
+        slot = self.__free_slots.pop()
+        self.__codes[slot] = code
+        self.__hospitals[slot] = self.hospital_index(hospital_name)
+        self.__statuses[slot] = int(status)
+        self.__covid[slot] = covid_positive.lower() == "true"
+        self.__in_use[slot] = True
+        return PatientView(self, slot)
+
+    def remove(self, patient):
+        """
+        remove frees the slot of a discharged patient, the PatientView must not be used afterwards
+        :param patient: PatientView
+        :return: None
+        """
+        slot = patient.get_slot()
+        self.__in_use[slot] = False
+        self.__owners[slot] = None
+        self.__free_slots.append(slot)
+
+    def __len__(self):
+        """
+        __len__ returns the number of patients in the store
+        :return: int
+        """
+        return int(np.count_nonzero(self.__in_use))
+
+    def __grow(self):
+        """
+        __grow doubles the size of the arrays
+        :return: None
+        """
+        old_capacity = len(self.__codes)
+        self.__codes = np.concatenate([self.__codes, np.zeros(old_capacity, dtype=np.int64)])
+        self.__hospitals = np.concatenate([self.__hospitals, np.zeros(old_capacity, dtype=np.int32)])
+        self.__statuses = np.concatenate([self.__statuses, np.zeros(old_capacity, dtype=np.int8)])
+        self.__covid = np.concatenate([self.__covid, np.zeros(old_capacity, dtype=np.bool_)])
+        self.__in_use = np.concatenate([self.__in_use, np.zeros(old_capacity, dtype=np.bool_)])
+        self.__admissions = np.concatenate([self.__admissions, np.zeros(old_capacity, dtype=np.int64)])
+        self.__owners.extend([None] * old_capacity)
+        self.__free_slots.extend(range(2 * old_capacity - 1, old_capacity - 1, -1))
+
+    def view(self, slot):
+        """
+        view returns a PatientView of the patient in slot
+        :param slot: int
+        :return: PatientView
+        """
+        return PatientView(self, slot)
+
+    def patients(self, slots):
+        """
+        patients returns the dictionary of patients, patient id -> slot, of a Hospital as a dictionary of PatientViews
+        :param slots: dict
+        :return: StoredPatients
+        """
+        return StoredPatients(self, slots)
+
+    # single patient access, used by PatientView
+
+    def get_id(self, slot):
+        """
+        get_id returns the patient id stored in slot
+        :param slot: int
+        :return: str
+        """
+        return self.__id_codec.encode(int(self.__codes[slot]))
+
+    def get_hospital_name(self, slot):
+        """
+        get_hospital_name returns the name of the hospital stored in slot
+        :param slot: int
+        :return: str
+        """
+        return self.__hospital_names[self.__hospitals[slot]]
+
+    def get_status(self, slot):
+        """
+        get_status returns the severity status stored in slot
+        :param slot: int
+        :return: str
+        """
+        return str(self.__statuses[slot])
+
+    def get_covid(self, slot):
+        """
+        get_covid returns "true" if the patient in slot is covid positive, otherwise "false"
+        :param slot: int
+        :return: str
+        """
+        return "true" if self.__covid[slot] else "false"
+
+    def get_owner(self, slot):
+        """
+        get_owner returns the Hospital object holding the patient in slot
+        :param slot: int
+        :return: Hospital or None
+        """
+        return self.__owners[slot]
+
+    def get_admission(self, slot):
+        """
+        get_admission returns the admission number of the patient in slot, the patients admitted to a hospital later
+            have larger numbers
+        :param slot: int
+        :return: int
+        """
+        return int(self.__admissions[slot])
+
+    def holds(self, slot, hospital, admission, status):
+        """
+        holds checks whether slot still holds the patient admitted to the Hospital object, hospital, with the admission
+            number, admission, and whether that patient still has the severity status, status
+        :param slot: int
+        :param hospital: Hospital
+        :param admission: int
+        :param status: int
+        :return: Bool
+        """
+        return self.__owners[slot] is hospital and self.__admissions[slot] == admission \
+            and self.__statuses[slot] == status
+
+    def set_status(self, slot, status):
+        """
+        set_status stores a new severity status in slot
+        :param slot: int
+        :param status: str
+        :return: None
+        """
+        self.__statuses[slot] = int(status)
+
+    def set_hospital(self, slot, hospital_name):
+        """
+        set_hospital stores a new hospital in slot
+        :param slot: int
+        :param hospital_name: str
+        :return: None
+        """
+        self.__hospitals[slot] = self.hospital_index(hospital_name)
+
+    def set_owner(self, slot, hospital):
+        """
+        set_owner stores the Hospital object holding the patient in slot, giving the patient the next admission number
+            when it is admitted to one
+        :param slot: int
+        :param hospital: Hospital or None
+        :return: None
+        """
+        self.__owners[slot] = hospital
+        if hospital is not None:
+            self.__admissions[slot] = self.__next_admission
+            self.__next_admission += 1
+
+    # scans over all patients
+
+    def census(self):
+        """
+        census returns the number of patients at each hospital, by hospital index
+        :return: numpy array of int
+        """
+        return np.bincount(self.__hospitals[self.__in_use], minlength=len(self.__hospital_names))
+
+    def covid_counts(self):
+        """
+        covid_counts returns the number of covid positive patients at each hospital, by hospital index
+        :return: numpy array of int
+        """
+        return np.bincount(self.__hospitals[self.__in_use & self.__covid], minlength=len(self.__hospital_names))
+
+    def severity_counts(self):
+        """
+        severity_counts returns the number of patients with each severity status (0 - 3) at each hospital as an
+            array of shape (hospitals, 4)
+        :return: numpy array of int
+        """
+        keys = self.__hospitals[self.__in_use].astype(np.int64) * 4 + self.__statuses[self.__in_use]
+        return np.bincount(keys, minlength=4 * len(self.__hospital_names)).reshape(-1, 4)
+
+
+class StoredPatients(Mapping):
+    """
+    StoredPatients is the dictionary of patients of a Hospital whose patients are kept in a PatientStore: it maps the
+        patient ids to their slots, in the order the patients were admitted, and hands out a PatientView of a patient
+        when it is read, so it can be used like the dictionary of Patient objects of any other Hospital.
+    """
+
+    def __init__(self, store, slots):
+        self.__store = store
+        self.__slots = slots  # patient id -> slot
+
+    def __getitem__(self, patient_id):
+        """
+        __getitem__ returns a PatientView of the patient with patient_id
+        :param patient_id: str
+        :return: PatientView
+        """
+        return PatientView(self.__store, self.__slots[patient_id])
+
+    def __contains__(self, patient_id):
+        """
+        __contains__ checks whether the patient with patient_id is in the dictionary
+        :param patient_id: str
+        :return: Bool
+        """
+        return patient_id in self.__slots
+
+    def __iter__(self):
+        """
+        __iter__ iterates over the patient ids in the order they were admitted
+        :return: iterator of str
+        """
+        return iter(self.__slots)
+
+    def __reversed__(self):
+        """
+        __reversed__ iterates over the patient ids from the last admitted one
+        :return: iterator of str
+        """
+        return reversed(self.__slots)
+
+    def __len__(self):
+        """
+        __len__ returns the number of patients
+        :return: int
+        """
+        return len(self.__slots)
+
+    def keys(self):
+        """
+        keys returns the patient ids in the order they were admitted
+        :return: dict_keys
+        """
+        return self.__slots.keys()
+
+
+class PatientView:
+    """
+    PatientView is a thin handle on one slot of a PatientStore with the same methods as a Patient object, so a
+        Hospital or PatientManagementSystem does not need to know where its patients are stored.
+    """
+    __slots__ = ("__store", "__slot")
+
+    def __init__(self, store, slot):
+        self.__store = store
+        self.__slot = slot
+
+    def get_slot(self):
+        """
+        get_slot returns the slot of the patient in the PatientStore
+        :return: int
+        """
+        return self.__slot
+
+    def update_hospital(self, new_hospital):
+        """
+        update_hospital changes the name of the hospital the patient is registered at
+        :param new_hospital: str
+        :return: None
+        """
+        self.__store.set_hospital(self.__slot, new_hospital)
+
+    def update_status(self, new_status):
+        """
+        update_status changes the status of the patient to a new one
+        :param new_status: str
+        :return: None
+        """
+        old_status = self.get_status()
+        self.__store.set_status(self.__slot, new_status)
+        hospital = self.__store.get_owner(self.__slot)
+        if hospital is not None and old_status != self.get_status():
+            hospital.status_changed(self.get_id(), old_status, self.get_status())
+
+    def set_current_hospital(self, hospital):
+        """
+        set_current_hospital registers the Hospital object the patient is admitted to (or None once discharged)
+        :param hospital: Hospital or None
+        :return: None
+        """
+        self.__store.set_owner(self.__slot, hospital)
+
+    def get_info(self):
+        """
+        get_info returns the patient's id, hospital, severity status and covid positive status in a list
+        :return: List of str
+        """
+        return [self.get_id(), self.__store.get_hospital_name(self.__slot), self.get_status(),
+                self.__store.get_covid(self.__slot)]
+
+    def get_status(self):
+        """
+        get_status returns the status of the patient
+        :return: str
+        """
+        return self.__store.get_status(self.__slot)
+
+    def get_covid_positive(self):
+        """
+        get_covid_positive returns "true" if the patient is covid positive, otherwise "false"
+        :return: str
+        """
+        return self.__store.get_covid(self.__slot)
+
+    def get_id(self):
+        """
+        get_id returns the id of the patient
+        :return: str
+        """
+        return self.__store.get_id(self.__slot)
@@ -4,6 +4,7 @@ class Patient:
         self.__hospital = hospital
         self.__status = status
         self.__covid_positive = covid_positive
+        self.__current_hospital = None  # Hospital object holding this patient, told about status changes
 
     def update_hospital(self, new_hospital):
         """
@@ -19,7 +20,19 @@ class Patient:
         :param new_status: str
         :return: None
         """
+        old_status = self.__status
         self.__status = new_status
+        if self.__current_hospital is not None and old_status != new_status:
+            self.__current_hospital.status_changed(self.__patient_id, old_status, new_status)
+
+    def set_current_hospital(self, hospital):
+        """
+        set_current_hospital registers the Hospital object the Patient is admitted to (or None once discharged) so
+            the hospital's severity index can be kept up to date when the status changes
+        :param hospital: Hospital or None
+        :return: None
+        """
+        self.__current_hospital = hospital
 
     def get_info(self):
         """
@@ -35,6 +48,13 @@ class Patient:
         """
         return self.__status
 
+    def get_covid_positive(self):
+        """
+        get_covid_positive returns "true" if the Patient is covid positive, otherwise "false"
+        :return: str
+        """
+        return self.__covid_positive
+
     def get_id(self):
         """
         get_id returns the id of the Patient
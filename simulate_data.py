@@ -3,25 +3,119 @@
 This program will simulate 90 days of the use of a Patient Management System and record the state of the system everyday
 in a csv file.
 """
+import os
+import pickle
 import random
+from array import array
+from event_bus import MESSAGE, SNAPSHOT_SAVED, STATUS_CHANGED
+from event_scheduler import EventScheduler
+from hospital_network import HospitalNetwork
+from patient_ids import PatientIdAllocator
 from patient_management_system import PatientManagementSystem
+from snapshot_log import SnapshotLog
 import csv
-import pandas as pd
 
+# discrete-event mode: days a patient stays at a severity status before it drops, and the status it drops to
+#   ("0" means the patient is discharged)
+STATUS_DAYS = {"3": 5, "2": 3, "1": 1}
+NEXT_STATUS = {"3": "2", "2": "1", "1": "0"}
+# order of the events due on the same day
+STATUS_PHASE = 0
+ADMISSION_PHASE = 1
+SNAPSHOT_PHASE = 2
+# columns of the census file, one row per hospital (and one for the whole network) per simulated day
+CENSUS_HEADER = ["Day", "Hospital", "Total_Beds", "Occupied_Beds", "Covid_Positive"] + \
+                ["Status_{}".format(status) for status in range(4)] + \
+                ["Covid_Status_{}".format(status) for status in range(4)]
+# first bytes of a checkpoint file, followed by the pickled state of the simulation
+CHECKPOINT_MAGIC = b"HSIMCKPT1\n"
 
 class SimulateData:
-    def __init__(self):
-        self.__system = PatientManagementSystem()
+    """
+    SimulateData simulates the use of a PatientManagementSystem. engine chooses how the daily severity status changes
+        are worked out:
+            - "pandas": a Dataframe of every patient is built and filtered every day
+            - "vectorized": the statuses and days stayed are kept in arrays by a DayStepEngine and only the patients
+                that change are touched
+        Both engines give the same hospital states for the same random seed.
+        The state of the hospitals is saved every snapshot_every days, to a new hospital_state_<number>.csv file each
+        time or, if snapshot_log (a SnapshotLog) is given, appended to that one file. save_snapshots=False stops the
+        state from being saved and day_observer, if given, is called with the day number and the
+        PatientManagementSystem at the end of every simulated day. With census_file the census of every hospital and of
+        the whole network (see PatientManagementSystem.census_stats) is written to that csv file at the end of every
+        simulated day, from the running counts of the system instead of a saved state.
+        With checkpoint_file, start_simulation saves a checkpoint of the whole simulation (the patients, the days they
+        have stayed, the state of the random module and every counter) to that file every checkpoint_every days, and
+        SimulateData.resume(checkpoint_file) returns a simulation that carries on from it exactly as the interrupted
+        run would have. start_event_simulation does not save checkpoints.
+        With seed, the simulation draws its admissions from a random number generator of its own (an AdmissionDraws,
+        a whole day's admissions at a time) and, unless a system is passed in, hands out patient ids from its own
+        random.Random, so two simulations with the same seed save the same states even when they run side by side in
+        one process. Without a seed the admissions and ids are drawn from the global random module.
+        network is the HospitalNetwork giving the hospitals and how often they admit patients (hospital_network.csv or
+        the default network if not given), a system passed in must hold the same hospitals.
+        The progress of the simulation (messages, saved states and the status changes it makes) is published to the
+        EventBus events, by default the one of the system, which prints to the console unless it was given another.
+    """
+
+    def __init__(self, engine="pandas", system=None, save_snapshots=True, day_observer=None, network=None,
+                 snapshot_every=10, snapshot_log=None, census_file=None, checkpoint_file=None, checkpoint_every=10,
+                 seed=None, events=None):
+        self.__network = network if network is not None else HospitalNetwork.load()
+        # random number generator of the admissions, None draws them from the global random module
+        self.__draws = None
+        if seed is not None:
+            from admission_draws import AdmissionDraws  # only needs NumPy when it is used
+            self.__draws = AdmissionDraws(seed)
+        if system is None:
+            id_allocator = None
+            if self.__draws is not None:
+                id_allocator = PatientIdAllocator(rng=random.Random(self.__draws.get_id_seed()))
+            system = PatientManagementSystem(id_allocator=id_allocator, hospitals=self.__network.make_hospitals(),
+                                             events=events)
+        self.__system = system
+        self.__events = events if events is not None else system.get_events()
         self.__covid_chance = 0.1
         self.__track_patients = {}
         self.__save_file_days = 1
+        self.__save_snapshots = save_snapshots
+        if snapshot_every < 1:
+            raise ValueError("snapshot_every must be at least 1 day, not {}".format(snapshot_every))
+        self.__snapshot_every = snapshot_every
+        self.__snapshot_log = snapshot_log
+        self.__day_observer = day_observer
+        self.__census_file = census_file
+        self.__census_out = None  # [file, csv writer] of the census file while a simulation runs
+        self.__census_append = False  # resumed from a checkpoint: the census file is carried on instead of rewritten
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be at least 1 day, not {}".format(checkpoint_every))
+        self.__checkpoint_file = checkpoint_file
+        self.__checkpoint_every = checkpoint_every
+        self.__resume_day = 0  # the day start_simulation starts on, set by resume
+        # discrete-event mode (start_event_simulation): the scheduler of pending events and the token of the pending
+        #   severity status event of every patient, events with an older token are outdated
+        self.__scheduler = None
+        self.__event_tokens = {}
+        self.__next_token = 0
+        self.__current_day = 0
+        # number of admissions that found their hospital full, and of those how many led to a transfer
+        self.__event_counts = {"full_arrivals": 0, "transfers": 0, "no_transfer_possible": 0}
+        if engine == "vectorized":
+            from simulation_engine import DayStepEngine  # only needs NumPy when it is used
+            self.__engine = DayStepEngine()
+        elif engine == "pandas":
+            self.__engine = None
+        else:
+            raise ValueError("engine must be either \"pandas\" or \"vectorized\", not {}".format(engine))
 
     def write_to_csv(self):
         """
         write_to_csv writes information of the patients from the PatientManagementSystem class to csv format
         :return: None
         """
-        file_name = 'hospital_state_0' + str(self.__save_file_days) + '.csv'  # file_name based on the simulation
+        # file_name based on the simulation, hospital_state_01.csv to hospital_state_09.csv in 90 days with the default
+        #   snapshot_every of 10 days
+        file_name = 'hospital_state_{:02d}.csv'.format(self.__save_file_days)
 
         with open(file_name, 'w') as csv_file:
             patient_writer = csv.writer(csv_file, delimiter=',', lineterminator='\n')
@@ -36,44 +130,202 @@ class SimulateData:
                 patient_writer.writerow([str(patient_number)] + patient.get_info())  # write patient info to csv file
                 patient_number += 1
 
-            print("The state of the hospitals after {} days has been saved to {} in the working directory".format(
-                self.__save_file_days * 10, file_name))
+            self.__events.publish(SNAPSHOT_SAVED, {"day": self.__save_file_days * self.__snapshot_every,
+                                                   "file": file_name, "format": "csv"})
             self.__save_file_days += 1
 
 
+    def save_snapshot(self, day):
+        """
+        save_snapshot saves the state of the hospitals at the end of day, to the snapshot log if the simulation has one
+            and to the next hospital state csv file otherwise
+        :param day: int
+        :return: None
+        """
+        if self.__snapshot_log is None:
+            self.write_to_csv()
+        else:
+            self.__snapshot_log.append(day, self.__system)
+            self.__events.publish(SNAPSHOT_SAVED, {"day": day, "file": self.__snapshot_log.get_file_name(),
+                                                   "format": "log"})
+
+    def record_census(self, day):
+        """
+        record_census writes the census of every hospital and of the whole network at the end of day to the census
+            file, opening it on the first day recorded
+        :param day: int
+        :return: None
+        """
+        if self.__census_out is None:
+            census_file = open(self.__census_file, 'a' if self.__census_append else 'w')
+            self.__census_out = [census_file, csv.writer(census_file, delimiter=',', lineterminator='\n')]
+            if not self.__census_append:
+                self.__census_out[1].writerow(CENSUS_HEADER)
+        names = list(self.__system.hospitals) + [None]
+        for stats in map(self.__system.census_stats, names):
+            self.__census_out[1].writerow([day, stats["name"] if stats["name"] is not None else "All",
+                                           stats["total_beds"], stats["occupied_beds"], stats["covid_positive"]]
+                                          + stats["severity"] + stats["severity_covid_positive"])
+
+    def close_census(self):
+        """
+        close_census closes the census file once the simulation has finished
+        :return: None
+        """
+        if self.__census_out is not None:
+            self.__census_out[0].close()
+            self.__census_out = None
+        self.__census_append = False
+
+    def save_checkpoint(self, file_name, day):
+        """
+        save_checkpoint saves the state of the simulation at the end of day (the number of days simulated so far) to
+            file_name, replacing it only once the new checkpoint has been written in full. The patients are stored as
+            packed bytes (see PatientManagementSystem.get_state) rather than as pickled objects, so saving and resuming
+            stay fast for large networks. The storage of the system is not part of the checkpoint.
+        :param file_name: str
+        :param day: int
+        :return: None
+        """
+        if self.__engine is not None:
+            tracked = None
+            engine = self.__engine.get_state()
+        else:
+            tracked = ["\n".join(self.__track_patients).encode("ascii"),
+                       array("i", self.__track_patients.values()).tobytes()]
+            engine = None
+        snapshot_log = None
+        if self.__snapshot_log is not None:
+            snapshot_log = [self.__snapshot_log.get_file_name(), self.__snapshot_log.get_with_ids(),
+                            self.__snapshot_log.get_position()]
+        census_position = None
+        if self.__census_out is not None:
+            self.__census_out[0].flush()
+            census_position = self.__census_out[0].tell()
+        state = {"day": day, "random": random.getstate(), "network": self.__network,
+                 "system": self.__system.get_state(), "engine": engine, "track_patients": tracked,
+                 "covid_chance": self.__covid_chance, "save_file_days": self.__save_file_days,
+                 "save_snapshots": self.__save_snapshots, "snapshot_every": self.__snapshot_every,
+                 "snapshot_log": snapshot_log, "census_file": self.__census_file, "census_position": census_position,
+                 "checkpoint_every": self.__checkpoint_every, "event_counts": dict(self.__event_counts),
+                 "draws": self.__draws.get_state() if self.__draws is not None else None}
+        temporary_file = file_name + ".tmp"
+        with open(temporary_file, 'wb') as checkpoint:
+            checkpoint.write(CHECKPOINT_MAGIC)
+            pickle.dump(state, checkpoint, protocol=pickle.HIGHEST_PROTOCOL)
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(temporary_file, file_name)
+
+    @staticmethod
+    def resume(file_name, storage=None, patient_store=None, day_observer=None, events=None):
+        """
+        resume returns the simulation saved to the checkpoint file_name, with the state of the random module set back
+            to the one it had then. Calling start_simulation with the same number of days as the interrupted run
+            simulates the remaining days, giving the same hospital state files, snapshot log and census file as a run
+            that was never interrupted: anything written to them after the checkpoint is dropped first. storage and
+            patient_store are passed on to the new PatientManagementSystem, and it carries on saving checkpoints to
+            file_name. events is the EventBus of the new system and simulation.
+        :param file_name: str
+        :param storage: CsvStorage or OperationJournal or SqliteStorage or None
+        :param patient_store: PatientStore or None
+        :param day_observer: function or None
+        :param events: EventBus or None
+        :return: SimulateData
+        """
+        with open(file_name, 'rb') as checkpoint:
+            if checkpoint.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+                raise ValueError("{} is not a simulation checkpoint".format(file_name))
+            state = pickle.load(checkpoint)
+
+        network = state["network"]
+        system = PatientManagementSystem(hospitals=network.make_hospitals(), storage=storage,
+                                         patient_store=patient_store, events=events)
+        system.set_state(state["system"])
+        snapshot_log = None
+        if state["snapshot_log"] is not None:
+            log_file, with_ids, position = state["snapshot_log"]
+            if position is not None:
+                os.truncate(log_file, position)  # drop the records saved after the checkpoint
+            snapshot_log = SnapshotLog(log_file, with_ids=with_ids, resume=position is not None)
+        simulation = SimulateData(engine="vectorized" if state["engine"] is not None else "pandas", system=system,
+                                  save_snapshots=state["save_snapshots"], day_observer=day_observer, network=network,
+                                  snapshot_every=state["snapshot_every"], snapshot_log=snapshot_log,
+                                  census_file=state["census_file"], checkpoint_file=file_name,
+                                  checkpoint_every=state["checkpoint_every"], events=events)
+        if state["engine"] is not None:
+            simulation.__engine.set_state(state["engine"], system)
+        else:
+            ids, days = state["track_patients"]
+            tracked_days = array("i")
+            tracked_days.frombytes(days)
+            simulation.__track_patients = dict(zip(ids.decode("ascii").split("\n") if ids else [], tracked_days))
+        if state["census_position"] is not None:
+            os.truncate(state["census_file"], state["census_position"])  # drop the days recorded after the checkpoint
+            simulation.__census_append = True
+        simulation.__covid_chance = state["covid_chance"]
+        simulation.__save_file_days = state["save_file_days"]
+        simulation.__event_counts = state["event_counts"]
+        if state["draws"] is not None:
+            from admission_draws import AdmissionDraws
+            simulation.__draws = AdmissionDraws.from_state(state["draws"])
+        simulation.__resume_day = state["day"]
+        random.setstate(state["random"])
+        return simulation
+
     def find_most_beds(self):
         """
         find_most_beds looks through all Hospitals in the system and returns the name of the hospital with the most
             available beds
         :return: str
         """
-        max_beds = 0
-        name = ""
-        for hospital in self.__system.hospitals.values():
-            if hospital.available_beds() > max_beds:
-                max_beds = hospital.available_beds()
-                name = hospital.get_name()
-        return name
+        name = self.__system.hospital_with_most_beds()
+        if name == "":  # every hospital is full
+            return name
+        return self.__system.hospitals[name].get_name()
+
+    def draw_admissions(self, count):
+        """
+        draw_admissions draws whether count new patients are covid positive and their severity status with the current
+            covid chance, in one batch from the generator of the simulation. Without a seed it returns None for every
+            patient instead: admit_patient then draws each patient from the global random module as it is admitted,
+            since the patient ids are drawn from it too.
+        :param count: int
+        :return: List of [str, str] (has covid, severity status) or List of None
+        """
+        if self.__draws is None:
+            return [None] * count
+        return list(zip(*self.__draws.draw(count, min(self.__covid_chance, 1.0))))
 
-    def admit_patient(self, curr_hospital):
+    def admit_patient(self, curr_hospital, admission=None):
         """
         admit_patient will admit a new patient to the Hospital, curr_hospital in the PatientManagementSystem, __system,
             with probabilities that determine if they are covid positive or not based on which the severity status is
-            determined
+            determined. admission is the [has covid, severity status] of the patient if it has already been drawn with
+            draw_admissions.
         :param curr_hospital: str
+        :param admission: List of str or None
         :return: None
         """
-        has_covid = random.choices(['true', 'false'], [self.__covid_chance, 1 - self.__covid_chance])[0]
-        if has_covid == 'true':
-            sev_status = random.choices(['1', '2', '3'], [0.4, 0.3, 0.3])[0]
+        if admission is None:
+            admission = self.draw_admissions(1)[0]
+        if admission is not None:
+            has_covid, sev_status = admission
         else:
-            sev_status = random.choices(['1', '2', '3'], [0.6, 0.3, 0.1])[0]
+            # the chance keeps growing, anything above 1 means always covid
+            covid_chance = min(self.__covid_chance, 1.0)
+            has_covid = random.choices(['true', 'false'], [covid_chance, 1 - covid_chance])[0]
+            if has_covid == 'true':
+                sev_status = random.choices(['1', '2', '3'], [0.4, 0.3, 0.3])[0]
+            else:
+                sev_status = random.choices(['1', '2', '3'], [0.6, 0.3, 0.1])[0]
 
         # check if hospital full
         if self.__system.hospitals[curr_hospital].available_beds() > 0:
             self.__system.addPatient(curr_hospital, sev_status, has_covid)  # adding new patient
 
         else:
+            self.__event_counts["full_arrivals"] += 1
             # finding patient with lowest severity status
             low_status_patient = self.__system.find_lowest_status_patient(self.__system.hospitals[curr_hospital])
             # find hospital with most beds
@@ -81,25 +333,97 @@ class SimulateData:
 
             if hospital_most_beds != "" and low_status_patient != "":
                 self.__system.transferPatient(low_status_patient, hospital_most_beds)  # transferring patient
+                self.__event_counts["transfers"] += 1
                 self.__system.addPatient(curr_hospital, sev_status, has_covid)  # adding new patient
-                print("The patient with lowest severity, {}, was transferred to {}, which has the most available"
-                      "beds. Then, a new patient was added to the {} hospital.".format(low_status_patient,
-                                                                                       hospital_most_beds,
-                                                                                       curr_hospital.capitalize()))
+                self.message("The patient with lowest severity, {}, was transferred to {}, which has the most "
+                             "availablebeds. Then, a new patient was added to the {} hospital."
+                             .format(low_status_patient, hospital_most_beds, curr_hospital.capitalize()))
             else:
-                print("Currently all patients in this hospital are at a severity status of level 3. Therefore,"
-                      " it is not possible to transfer any patients from here!")
+                self.__event_counts["no_transfer_possible"] += 1
+                self.message("Currently all patients in this hospital are at a severity status of level 3. "
+                             "Therefore, it is not possible to transfer any patients from here!")
 
         # get id of the newly added patient
-        patient_id = list(self.__system.hospitals[curr_hospital].get_patients().keys())[-1]
+        patient_id = next(reversed(self.__system.hospitals[curr_hospital].get_patients()))
         # day 0 for this new patient
-        self.__track_patients[patient_id] = 0
+        if self.__scheduler is not None:
+            self.__schedule_status_event(patient_id, self.__current_day)
+        elif self.__engine is not None:
+            self.__engine.admit(patient_id, self.__system.hospitals[curr_hospital].get_patient(patient_id))
+        else:
+            self.__track_patients[patient_id] = 0
+
+    def get_system(self):
+        """
+        get_system returns the PatientManagementSystem being simulated
+        :return: PatientManagementSystem
+        """
+        return self.__system
+
+    def get_network(self):
+        """
+        get_network returns the HospitalNetwork being simulated
+        :return: HospitalNetwork
+        """
+        return self.__network
+
+    def get_snapshot_log(self):
+        """
+        get_snapshot_log returns the SnapshotLog the states are saved to, or None if they are saved to csv files
+        :return: SnapshotLog or None
+        """
+        return self.__snapshot_log
+
+    def get_event_counts(self):
+        """
+        get_event_counts returns a dictionary with the number of admissions that found their hospital full
+            ("full_arrivals"), the number of transfers made to admit them ("transfers") and the number of times no
+            transfer was possible ("no_transfer_possible")
+        :return: dict
+        """
+        return dict(self.__event_counts)
+
+    def message(self, text):
+        """
+        message publishes text as a progress note of the simulation, to be printed on the console by default
+        :param text: str
+        :return: None
+        """
+        if self.__events.wants(MESSAGE):
+            self.__events.publish(MESSAGE, {"text": text})
+
+    def patients_tracked(self):
+        """
+        patients_tracked returns the number of patients whose days stayed are being tracked
+        :return: int
+        """
+        if self.__engine is not None:
+            return len(self.__engine)
+        return len(self.__track_patients)
+
+    def __schedule_status_event(self, patient_id, day):
+        """
+        __schedule_status_event schedules the next severity status change (or discharge) of patient_id, which has
+            stayed 0 days at their current status on day. Any event already scheduled for the patient becomes outdated.
+        :param patient_id: str
+        :param day: int
+        :return: None
+        """
+        status = self.__system.find_patient_hospital(patient_id).get_patient(patient_id).get_status()
+        self.__event_tokens[patient_id] = self.__next_token
+        self.__scheduler.schedule(day + STATUS_DAYS[status], (STATUS_PHASE,),
+                                  ("status", patient_id, self.__next_token))
+        self.__next_token += 1
 
     def increment_days(self):
         """
         increment_days will increment the number of days a patient has stayed in a hospital by 1
         :return:None
         """
+        if self.__engine is not None:
+            self.__engine.increment_days()
+            return
+
         # update number of days a patient has stayed in a hospital
         for key in self.__track_patients.keys():
             self.__track_patients[key] = int(self.__track_patients[key]) + 1
@@ -138,10 +462,17 @@ class SimulateData:
         updated_days_list = df["Days"].tolist()
         updated_status_list = df["Status"].tolist()
 
-        # update Patient classes' statuses using patient_ids
+        # update Patient classes' statuses using patient_ids, publishing the changes if anyone listens for them
+        publish_changes = self.__events.wants(STATUS_CHANGED)
         for patient in range(len(updated_patient_list)):
-            self.__system.find_patient_hospital(updated_patient_list[patient]) \
-                .get_patient(updated_patient_list[patient]).update_status(updated_status_list[patient])
+            patient_object = self.__system.find_patient_hospital(updated_patient_list[patient]) \
+                .get_patient(updated_patient_list[patient])
+            if publish_changes and patient_object.get_status() != updated_status_list[patient]:
+                self.__events.publish(STATUS_CHANGED, {"id": updated_patient_list[patient],
+                                                       "old": patient_object.get_status(),
+                                                       "new": updated_status_list[patient],
+                                                       "day": self.__current_day + 1})
+            patient_object.update_status(updated_status_list[patient])
 
         # updating the days in __track_patients from the modified Dataframe
         self.__track_patients = dict(zip(updated_patient_list, updated_days_list))
@@ -156,6 +487,14 @@ class SimulateData:
                 from the hospital
         :return: None
         """
+        if self.__engine is not None:
+            publish_changes = self.__events.wants(STATUS_CHANGED)
+            changes = self.__engine.step(self.__system, record_changes=publish_changes)  # all patients at once
+            for patient_id, old_status, new_status in changes if publish_changes else []:
+                self.__events.publish(STATUS_CHANGED, {"id": patient_id, "old": old_status, "new": new_status,
+                                                       "day": self.__current_day + 1})
+            return
+
         # get all patient ids
         all_patients = self.__system.get_values_or_keys("keys")
         # get all patients' severity statuses
@@ -168,6 +507,7 @@ class SimulateData:
             days.append(self.__track_patients[patient])
 
         # create a dataframe to hold patient id, status and days stayed
+        import pandas as pd  # only loaded by the pandas engine, it is slow to import
         df_info = {"Patients": all_patients, "Status": all_status, "Days": days}
         patient_status_df = pd.DataFrame(df_info)
 
@@ -176,9 +516,8 @@ class SimulateData:
         #   are added after this function is called in start_simulation
         df_status_1 = patient_status_df.loc[patient_status_df["Status"] == "1"]
         patients_to_discharge = df_status_1["Patients"].tolist()
-        print("The following patients will now be discharged:")
-        for patient in patients_to_discharge:
-            self.__system.dischargePatient(patient)
+        self.message("The following patients will now be discharged:")
+        self.__system.dischargePatients(patients_to_discharge)
 
         # removing patients from the Dataframe with severity status 1
         patient_status_df = patient_status_df.loc[patient_status_df["Status"] != "1"]
@@ -194,24 +533,30 @@ class SimulateData:
 
     def current_patients(self):
         """
-        current_patients prints the current patients' ids, days stayed and the hospital they are at
+        current_patients publishes a table of the current patients' ids, days stayed and the hospital they are at as
+            a message, the table is not built if no one listens for messages
         :return: None
         """
+        if not self.__events.wants(MESSAGE):
+            return
+        tracked = self.__engine.get_days() if self.__engine is not None else self.__track_patients
 
-        print("Patient     Status     Days Stayed     Hospital")
-        for patient in self.__track_patients.keys():
+        lines = ["Patient     Status     Days Stayed     Hospital"]
+        for patient in tracked.keys():
             hospital = self.__system.find_patient_hospital(patient)
-            print(
+            lines.append(
                 " {}         {}             {}          {}".format(patient, hospital.get_patient(patient).get_status(),
-                                                                   self.__track_patients[patient],
+                                                                   tracked[patient],
                                                                    hospital.get_name()))
+        self.message("\n".join(lines))
 
-    def start_simulation(self):
+    def start_simulation(self, days=90):
         """
-        start_simulation creates a simulation of the PatientManagementSystem for 90 days and works with the following
-        conditions:
-            - adds a patient to the Toronto Hospital every 4 days
-            - adds a patient to the Kingston and Hamilton hospital every 7 days
+        start_simulation creates a simulation of the PatientManagementSystem for days days (90 by default) and works
+        with the following conditions:
+            - adds a patient to every hospital every Admission_Interval days of the hospital network (every 4 days
+                for Toronto and every 7 days for Kingston and Hamilton in the default network), hospitals admitting
+                on the same day admit in the order of HospitalNetwork.get_admission_schedule()
             - probability of new patient having covid increases by 5% exponentially
             - if a patient doesnt have covid then the chances of being a severity status are as follows:
                 - 3 -> 10%
@@ -225,40 +570,135 @@ class SimulateData:
                 - patient with severity status of 3 is given a status of 2 after 5 days
                 - patient with severity status of 2 is given a status of 1 after 3 days
                 - patient with severity status of 1 is automatically discharged after 1 day
+        :param days: int
         :return:None
         """
-        for day in range(90):
+        # hospitals grouped by the days between their admissions, so each day only checks every distinct interval
+        admission_groups = {}
+        for hospital, every in self.__network.get_admission_schedule().items():
+            admission_groups.setdefault(every, []).append(hospital)
+
+        first_day = self.__resume_day  # 0 unless the simulation was resumed from a checkpoint
+        self.__resume_day = 0
+        for day in range(first_day, days):
+            self.__current_day = day
             self.increment_days()
             # update sev-status of patients and discharge automatically if 0
-            print("\nIt is day {}, patients' days stayed will now be updated!".format(day + 1))
-            if day != 0 and self.__track_patients:
+            self.message("\nIt is day {}, patients' days stayed will now be updated!".format(day + 1))
+            if day != 0 and self.patients_tracked() > 0:
                 self.update_sev_status()
 
             # increase covid chance by 5%
             self.__covid_chance *= 1.05
-            print("Covid chance = {}".format(self.__covid_chance))
+            self.message("Covid chance = {}".format(self.__covid_chance))
 
-            if (day + 1) % 4 == 0:
-                # admit a patient to Toronto hospital
-                self.admit_patient("toronto")
+            # admit a patient to each of the hospitals admitting today, their patients drawn together
+            admitting = [hospital for every, hospitals in admission_groups.items() if (day + 1) % every == 0
+                         for hospital in hospitals]
+            for hospital, admission in zip(admitting, self.draw_admissions(len(admitting))):
+                self.admit_patient(hospital, admission)
 
-            if (day + 1) % 7 == 0:
-                # admit a patient to Kingston hospital
-                self.admit_patient("kingston")
-                # admit a patient to Hamilton hospital
-                self.admit_patient("hamilton")
+            if (day + 1) % self.__snapshot_every == 0 and self.__save_snapshots:
+                self.save_snapshot(day + 1)
 
-            if (day + 1) % 10 == 0:
-                self.write_to_csv()
+            if self.__day_observer is not None:
+                self.__day_observer(day, self.__system)
+            if self.__census_file is not None:
+                self.record_census(day + 1)
+            if self.__checkpoint_file is not None and (day + 1) % self.__checkpoint_every == 0:
+                self.save_checkpoint(self.__checkpoint_file, day + 1)
 
-            print("The current patients are:")
+            self.message("The current patients are:")
             self.current_patients()
 
-        print("\nThe simulation for 90 days has finished!")
+        self.close_census()
+        self.message("\nThe simulation for {} days has finished!".format(days))
+
+    def start_event_simulation(self, days=90, admission_schedule=None):
+        """
+        start_event_simulation simulates the PatientManagementSystem for days days with a discrete-event scheduler
+            instead of a day loop. Admissions, severity status changes, discharges and state saves are scheduled for
+            the day they are due and only days with events due are processed, so the cost depends on the number of
+            events rather than on patients x days. admission_schedule maps hospital names to the number of days
+            between admissions, hospitals admitting on the same day admit in the order of admission_schedule (the
+            default is the admission schedule of the hospital network). With the default schedule and 90 days, the
+            saved states are the same as the ones start_simulation saves for the same random seed.
+        :param days: int
+        :param admission_schedule: dict
+        :return: int (number of events processed)
+        """
+        if self.__resume_day != 0:
+            raise ValueError("a simulation resumed from a checkpoint can only be carried on by start_simulation")
+        if admission_schedule is None:
+            admission_schedule = self.__network.get_admission_schedule()
+        self.__scheduler = EventScheduler()
+        self.__event_tokens = {}
+        covid_day = 0  # the covid chance has been increased for the days before this one
+        census_day = 0  # the census has been recorded for the days before this one
+        processed = 0
+
+        for rank, (hospital, every) in enumerate(admission_schedule.items()):
+            self.__scheduler.schedule(every - 1, (ADMISSION_PHASE, rank), ("admit", hospital, every, rank))
+        if self.__save_snapshots:
+            self.__scheduler.schedule(self.__snapshot_every - 1, (SNAPSHOT_PHASE,), ("snapshot",))
+
+        while len(self.__scheduler) > 0 and self.__scheduler.next_day() < days:
+            day = self.__scheduler.next_day()
+            self.__current_day = day
+            events = self.__scheduler.pop_day(day)
+            processed += len(events)
+            # nothing changed on the days without events since the last day processed
+            while self.__census_file is not None and census_day < day:
+                self.record_census(census_day + 1)
+                census_day += 1
+
+            # severity status changes and discharges, all of the day's discharges are done together
+            discharges = []
+            for event in events:
+                if event[0] == "status" and self.__event_tokens.get(event[1]) == event[2]:
+                    patient_id = event[1]
+                    patient = self.__system.find_patient_hospital(patient_id).get_patient(patient_id)
+                    new_status = NEXT_STATUS[patient.get_status()]
+                    if new_status == "0":
+                        discharges.append(patient_id)
+                        del self.__event_tokens[patient_id]
+                    else:
+                        if self.__events.wants(STATUS_CHANGED):
+                            self.__events.publish(STATUS_CHANGED, {"id": patient_id, "old": patient.get_status(),
+                                                                   "new": new_status, "day": day + 1})
+                        patient.update_status(new_status)
+                        self.__schedule_status_event(patient_id, day)
+            if discharges:
+                self.message("\nIt is day {}, the following patients will now be discharged:".format(day + 1))
+                self.__system.dischargePatients(discharges)
+
+            # increase covid chance by 5% for every day up to this one
+            while covid_day <= day:
+                self.__covid_chance *= 1.05
+                covid_day += 1
+
+            admissions = iter(self.draw_admissions(sum(event[0] == "admit" for event in events)))
+            for event in events:
+                if event[0] == "admit":
+                    self.admit_patient(event[1], next(admissions))
+                    self.__scheduler.schedule(day + event[2], (ADMISSION_PHASE, event[3]), event)
+                elif event[0] == "snapshot":
+                    self.save_snapshot(day + 1)
+                    self.__scheduler.schedule(day + self.__snapshot_every, (SNAPSHOT_PHASE,), event)
+
+        while self.__census_file is not None and census_day < days:
+            self.record_census(census_day + 1)
+            census_day += 1
+        self.close_census()
+        self.__scheduler = None
+        self.message("\nThe simulation for {} days has finished!".format(days))
+        return processed
+
 
 def main():
     test = SimulateData()
     test.start_simulation()
 
 
-main()
+if __name__ == "__main__":
+    main()
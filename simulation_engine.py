@@ -0,0 +1,147 @@
+import numpy as np
+
+
+class DayStepEngine:
+    """
+    DayStepEngine keeps the severity status and days stayed of every patient in a simulation in NumPy arrays and
+        applies a simulated day's changes to all of them at once:
+            - patients with a severity status of 1 are discharged
+            - patients with a severity status of 2 that have stayed 3 days get a status of 1 and their days reset
+            - patients with a severity status of 3 that have stayed 5 days get a status of 2 and their days reset
+        Only the patients that are discharged or change status are touched in the PatientManagementSystem. Rows of
+        discharged patients are removed once they make up half of the arrays.
+    """
+
+    def __init__(self, capacity=1024):
+        self.__patients = []  # row -> Patient object
+        self.__statuses = np.zeros(capacity, dtype=np.int8)
+        self.__days = np.zeros(capacity, dtype=np.int32)
+        self.__in_hospital = np.zeros(capacity, dtype=np.bool_)
+        self.__rows = {}  # patient id -> row
+        self.__discharged = 0  # rows of discharged patients not removed yet
+
+    def __len__(self):
+        """
+        __len__ returns the number of patients being tracked
+        :return: int
+        """
+        return len(self.__patients) - self.__discharged
+
+    def admit(self, patient_id, patient):
+        """
+        admit starts tracking a newly admitted patient with 0 days stayed. If the patient is already tracked their days
+            stayed are reset to 0 instead.
+        :param patient_id: str
+        :param patient: Patient
+        :return: None
+        """
+        row = self.__rows.get(patient_id)
+        if row is not None:
+            self.__days[row] = 0
+            return
+        row = len(self.__patients)
+        if row == len(self.__statuses):
+            self.__statuses = np.concatenate([self.__statuses, np.zeros(row, dtype=np.int8)])
+            self.__days = np.concatenate([self.__days, np.zeros(row, dtype=np.int32)])
+            self.__in_hospital = np.concatenate([self.__in_hospital, np.zeros(row, dtype=np.bool_)])
+        self.__patients.append(patient)
+        self.__statuses[row] = int(patient.get_status())
+        self.__days[row] = 0
+        self.__in_hospital[row] = True
+        self.__rows[patient_id] = row
+
+    def increment_days(self):
+        """
+        increment_days adds a day to the days stayed of every patient
+        :return: None
+        """
+        self.__days[:len(self.__patients)] += 1
+
+    def step(self, system, record_changes=False):
+        """
+        step applies one simulated day's severity status changes and discharges to the PatientManagementSystem, system.
+            With record_changes it returns the status changes made as [patient id, old status, new status] lists.
+        :param system: PatientManagementSystem
+        :param record_changes: Bool
+        :return: List of list or None
+        """
+        rows = len(self.__patients)
+        statuses = self.__statuses[:rows]
+        days = self.__days[:rows]
+        in_hospital = self.__in_hospital[:rows]
+
+        discharge = in_hospital & (statuses == 1)
+        to_status_1 = in_hospital & (statuses == 2) & (days == 3)
+        to_status_2 = in_hospital & (statuses == 3) & (days == 5)
+
+        # discharge everyone with a status of 1
+        discharged_rows = np.flatnonzero(discharge)
+        discharged_ids = [self.__patients[row].get_id() for row in discharged_rows]
+        system.dischargePatients(discharged_ids)
+        in_hospital[discharge] = False
+        for patient_id in discharged_ids:
+            del self.__rows[patient_id]
+        self.__discharged += len(discharged_rows)
+
+        # lower the status of everyone that has stayed long enough
+        statuses[to_status_1] = 1
+        statuses[to_status_2] = 2
+        days[to_status_1 | to_status_2] = 0
+        changes = [] if record_changes else None
+        for row in np.flatnonzero(to_status_1):
+            self.__patients[row].update_status("1")
+            if record_changes:
+                changes.append([self.__patients[row].get_id(), "2", "1"])
+        for row in np.flatnonzero(to_status_2):
+            self.__patients[row].update_status("2")
+            if record_changes:
+                changes.append([self.__patients[row].get_id(), "3", "2"])
+
+        if self.__discharged * 2 > rows:
+            self.__compact()
+        return changes
+
+    def get_state(self):
+        """
+        get_state returns the patients being tracked with their severity status and days stayed, in the order they
+            were admitted, for a checkpoint (see set_state)
+        :return: dict
+        """
+        keep = np.flatnonzero(self.__in_hospital[:len(self.__patients)])
+        return {"ids": "\n".join(self.__patients[row].get_id() for row in keep).encode("ascii"),
+                "statuses": self.__statuses[keep].tobytes(), "days": self.__days[keep].tobytes()}
+
+    def set_state(self, state, system):
+        """
+        set_state tracks the patients of a state returned by get_state, whose Patient objects are looked up in the
+            PatientManagementSystem, system. The engine must not be tracking any patients yet.
+        :param state: dict
+        :param system: PatientManagementSystem
+        :return: None
+        """
+        ids = state["ids"].decode("ascii").split("\n") if state["ids"] else []
+        for patient_id in ids:
+            self.admit(patient_id, system.find_patient_hospital(patient_id).get_patient(patient_id))
+        self.__statuses[:len(ids)] = np.frombuffer(state["statuses"], dtype=np.int8)
+        self.__days[:len(ids)] = np.frombuffer(state["days"], dtype=np.int32)
+
+    def get_days(self):
+        """
+        get_days returns a dictionary of the days stayed of every patient being tracked, by patient id
+        :return: dict
+        """
+        return {patient_id: int(self.__days[row]) for patient_id, row in self.__rows.items()}
+
+    def __compact(self):
+        """
+        __compact removes the rows of discharged patients from the arrays
+        :return: None
+        """
+        keep = np.flatnonzero(self.__in_hospital[:len(self.__patients)])
+        self.__patients = [self.__patients[row] for row in keep]
+        self.__statuses[:len(keep)] = self.__statuses[keep]
+        self.__days[:len(keep)] = self.__days[keep]
+        self.__in_hospital[:len(keep)] = True
+        self.__in_hospital[len(keep):] = False
+        self.__rows = {patient.get_id(): row for row, patient in enumerate(self.__patients)}
+        self.__discharged = 0
@@ -0,0 +1,143 @@
+import csv
+from collections import Counter
+from itertools import islice
+import numpy as np
+from snapshot_log import COVID_BIT
+
+# every patient falls into one of 8 groups, its severity status (0 - 3) plus COVID_BIT if it is covid positive, the same
+#   packing as the status bytes of a SnapshotLog
+GROUPS = 2 * COVID_BIT
+
+
+class SnapshotAggregates:
+    """
+    SnapshotAggregates counts the patients of the saved states of a simulation instead of keeping them: every state is
+        read in one pass into the number of patients of every hospital in each of 8 groups (severity status 0 - 3,
+        covid positive or not), so the memory used depends on the number of states and hospitals and not on the
+        number of patients. get_severity_counts and get_covid_counts return the counts as NumPy arrays of
+        day x hospital x severity status and day x hospital.
+        Hospitals are kept in the order given, followed by hospitals found in the states in the order they are found.
+    """
+
+    def __init__(self, hospitals=None):
+        self.__hospitals = []
+        self.__positions = {}  # lower case hospital name -> position in __hospitals
+        for name in hospitals or []:
+            self.__position(name)
+        self.__days = []  # day (or number) of every state added
+        self.__day_counts = []  # hospitals x GROUPS array of every state added, its hospitals are the ones known then
+        self.__counts = None  # every state stacked into one days x hospitals x GROUPS array, made when first needed
+
+    def add_csv_file(self, file_name, day=None):
+        """
+        add_csv_file counts the patients of a hospital state csv file (in the format of hospital_state_01.csv) as the
+            state of day, the next state number if day is not given. Nothing is added if the file cannot be read.
+        :param file_name: str
+        :param day: int or None
+        :return: None
+        """
+        with open(file_name, 'r') as csv_file:
+            # count the rows of every (hospital, status, covid) in C, the file is never held in memory
+            groups = Counter((row[2].lower(), row[3], row[4]) for row in islice(csv.reader(csv_file), 1, None))
+        # work out every group before anything is added, so a file with a bad status adds nothing
+        found = [(name, int(status) + (COVID_BIT if covid_positive == "true" else 0), count)
+                 for (name, status, covid_positive), count in groups.items()]
+        if any(not 0 <= group < GROUPS for _, group, _ in found):
+            raise ValueError("{} holds a severity status that is not 0, 1, 2 or 3".format(file_name))
+        positions = [self.__position(name) for name, _, _ in found]
+        counts = np.zeros((len(self.__hospitals), GROUPS), dtype=np.int64)
+        for position, (_, group, count) in zip(positions, found):
+            counts[position, group] = count
+        self.__add(day, counts)
+
+    def add_log_record(self, day, hospitals, counts, codes):
+        """
+        add_log_record counts the patients of a record of a SnapshotLog, whose hospitals are hospitals
+        :param day: int
+        :param hospitals: List of str
+        :param counts: array of int
+        :param codes: bytes
+        :return: None
+        """
+        positions = np.array([self.__position(name) for name in hospitals], dtype=np.int64)
+        # the position of the hospital of every patient, the patients are stored hospital by hospital
+        patient_positions = np.repeat(positions, np.frombuffer(counts, dtype=np.uint32).astype(np.int64))
+        groups = np.frombuffer(codes, dtype=np.uint8).astype(np.int64)
+        totals = np.bincount(patient_positions * GROUPS + groups, minlength=len(self.__hospitals) * GROUPS)
+        self.__add(day, totals.reshape(len(self.__hospitals), GROUPS))
+
+    def add_log(self, snapshot_log):
+        """
+        add_log counts the patients of every record of a SnapshotLog, streaming it one day at a time
+        :param snapshot_log: SnapshotLog
+        :return: None
+        """
+        hospitals = snapshot_log.read_hospitals()
+        for day, counts, codes, ids in snapshot_log.read_days():
+            self.add_log_record(day, hospitals, counts, codes)
+
+    def get_hospitals(self):
+        """
+        get_hospitals returns the lower case names of the hospitals, in the order of the hospital axis of the counts
+        :return: List of str
+        """
+        return list(self.__hospitals)
+
+    def get_days(self):
+        """
+        get_days returns the day (or number) of every state, in the order of the day axis of the counts
+        :return: List of int
+        """
+        return list(self.__days)
+
+    def get_severity_counts(self):
+        """
+        get_severity_counts returns the number of patients of every severity status in every hospital in every state
+        :return: numpy.ndarray of days x hospitals x 4
+        """
+        counts = self.__stacked()
+        return counts[:, :, :COVID_BIT] + counts[:, :, COVID_BIT:]
+
+    def get_covid_counts(self):
+        """
+        get_covid_counts returns the number of covid positive patients in every hospital in every state
+        :return: numpy.ndarray of days x hospitals
+        """
+        return self.__stacked()[:, :, COVID_BIT:].sum(axis=2)
+
+    def __position(self, name):
+        """
+        __position returns the position of the hospital called name, adding it after the hospitals known so far if it
+            is new
+        :param name: str
+        :return: int
+        """
+        name = name.lower()
+        if name not in self.__positions:
+            self.__positions[name] = len(self.__hospitals)
+            self.__hospitals.append(name)
+        return self.__positions[name]
+
+    def __add(self, day, counts):
+        """
+        __add adds the counts of one state
+        :param day: int or None
+        :param counts: numpy.ndarray of hospitals x GROUPS
+        :return: None
+        """
+        self.__days.append(day if day is not None else len(self.__days) + 1)
+        self.__day_counts.append(counts)
+        self.__counts = None
+
+    def __stacked(self):
+        """
+        __stacked returns the counts of every state in one days x hospitals x GROUPS array, states added before a
+            hospital was found have no patients in it
+        :return: numpy.ndarray
+        """
+        if self.__counts is None:
+            counts = np.zeros((len(self.__day_counts), len(self.__hospitals), GROUPS), dtype=np.int64)
+            for day, day_counts in enumerate(self.__day_counts):
+                counts[day, :len(day_counts)] = day_counts
+            self.__counts = counts
+        return self.__counts
@@ -0,0 +1,187 @@
+import json
+import os
+import struct
+import zlib
+from array import array
+
+MAGIC = b"HSNAPLOG1\n"
+HEADER_LENGTH = struct.Struct("<I")
+# day, number of patients and number of bytes of the (compressed) body of a record
+RECORD_HEADER = struct.Struct("<III")
+# severity status and covid status of a patient packed into one byte: bits 0-1 the status, bit 2 covid positive
+COVID_BIT = 4
+
+
+class SnapshotLog:
+    """
+    SnapshotLog streams the state of a PatientManagementSystem into one append-only file, one record per saved day,
+        instead of a csv file per saved state. The file starts with a header naming the hospitals (in the order of the
+        system's hospitals dictionary), then every record holds:
+            - the day, the number of patients and the size of the body
+            - the number of patients in every hospital (the patients are stored hospital by hospital, so the hospital
+                of a patient is never stored)
+            - one byte per patient packing its severity status and covid status
+            - with with_ids=True, the patient ids
+        The body of a record is compressed with zlib and records are written through a large buffer, so a save is a
+        single bulk write. read_days streams the records back one day at a time, dropping a record cut off by a crash.
+        With resume=True the records are appended to an existing file instead of starting a new one.
+    """
+
+    def __init__(self, file_name="hospital_states.snapshots", with_ids=False, resume=False, buffer_size=1 << 20):
+        self.__file_name = file_name
+        self.__with_ids = with_ids
+        self.__resume = resume
+        self.__buffer_size = buffer_size
+        self.__file = None
+
+    def get_file_name(self):
+        """
+        get_file_name returns the name of the file the snapshots are written to
+        :return: str
+        """
+        return self.__file_name
+
+    def get_with_ids(self):
+        """
+        get_with_ids returns True if the patient ids are written to the log
+        :return: Bool
+        """
+        return self.__with_ids
+
+    def get_position(self):
+        """
+        get_position writes the buffered records and returns the size of the log written so far, or None if nothing
+            has been written to it yet
+        :return: int or None
+        """
+        if self.__file is None:
+            return None
+        self.__file.flush()
+        return self.__file.tell()
+
+    def append(self, day, system):
+        """
+        append adds the state of the PatientManagementSystem, system, at the end of day to the log
+        :param day: int
+        :param system: PatientManagementSystem
+        :return: None
+        """
+        if self.__file is None:
+            self.__open(list(system.hospitals))
+        counts = array("I")
+        codes = bytearray()
+        ids = []
+        for hospital in system.hospitals.values():
+            patients = hospital.get_patients()
+            counts.append(len(patients))
+            for patient in patients.values():
+                info = patient.get_info()
+                codes.append(int(info[2]) | (COVID_BIT if info[3] == "true" else 0))
+                if self.__with_ids:
+                    ids.append(info[0])
+        body = counts.tobytes() + bytes(codes)
+        if self.__with_ids:
+            body += "\n".join(ids).encode("ascii")
+        body = zlib.compress(body, 1)
+        self.__file.write(RECORD_HEADER.pack(day, len(codes), len(body)) + body)
+
+    def flush(self):
+        """
+        flush writes the buffered records to the file
+        :return: None
+        """
+        if self.__file is not None:
+            self.__file.flush()
+
+    def close(self):
+        """
+        close writes the buffered records and closes the file
+        :return: None
+        """
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    def read_hospitals(self):
+        """
+        read_hospitals returns the lower case names of the hospitals in the log, in the order they are stored in
+        :return: List of str
+        """
+        with open(self.__file_name, 'rb') as log:
+            return self.__read_header(log)["hospitals"]
+
+    def read_days(self):
+        """
+        read_days streams the records of the log back one day at a time. Every record is a list of
+            [day, counts, codes, ids]: counts is an array of the number of patients in every hospital (in the order of
+            read_hospitals), codes is bytes holding one packed status byte per patient (see decode) and ids is the list
+            of patient ids, or None if the log was written without them.
+        :return: generator of list
+        """
+        with open(self.__file_name, 'rb', buffering=self.__buffer_size) as log:
+            header = self.__read_header(log)
+            hospitals = len(header["hospitals"])
+            while True:
+                record_header = log.read(RECORD_HEADER.size)
+                if len(record_header) < RECORD_HEADER.size:
+                    return  # end of the log, or a record header cut off by a crash
+                day, patients, size = RECORD_HEADER.unpack(record_header)
+                body = log.read(size)
+                if len(body) < size:
+                    return  # a record cut off by a crash
+                body = zlib.decompress(body)
+                counts = array("I")
+                counts.frombytes(body[:4 * hospitals])
+                codes = body[4 * hospitals:4 * hospitals + patients]
+                ids = body[4 * hospitals + patients:].decode("ascii").split("\n") if header["ids"] else None
+                yield [day, counts, codes, ids]
+
+    @staticmethod
+    def decode(code):
+        """
+        decode turns a packed status byte back into the severity status and covid status of a patient
+        :param code: int
+        :return: list of [str, str]
+        """
+        return [str(code & 3), "true" if code & COVID_BIT else "false"]
+
+    def __open(self, hospitals):
+        """
+        __open opens the file for appending records, writing the header of a new log or checking the header of the log
+            being resumed
+        :param hospitals: List of str
+        :return: None
+        """
+        if self.__resume and os.path.exists(self.__file_name) and os.path.getsize(self.__file_name) > 0:
+            with open(self.__file_name, 'r+b') as log:
+                header = self.__read_header(log)
+                if header["hospitals"] != hospitals or header["ids"] != self.__with_ids:
+                    raise ValueError("{} holds snapshots of other hospitals or was written {} patient ids".format(
+                        self.__file_name, "with" if header["ids"] else "without"))
+                # skip to the end of the last complete record and drop anything after it
+                end = log.tell()
+                record_header = log.read(RECORD_HEADER.size)
+                while len(record_header) == RECORD_HEADER.size:
+                    size = RECORD_HEADER.unpack(record_header)[2]
+                    if log.seek(size, os.SEEK_CUR) > os.path.getsize(self.__file_name):
+                        break
+                    end = log.tell()
+                    record_header = log.read(RECORD_HEADER.size)
+                log.truncate(end)
+            self.__file = open(self.__file_name, 'ab', buffering=self.__buffer_size)
+            return
+        self.__file = open(self.__file_name, 'wb', buffering=self.__buffer_size)
+        header = json.dumps({"hospitals": hospitals, "ids": self.__with_ids}).encode()
+        self.__file.write(MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+
+    def __read_header(self, log):
+        """
+        __read_header reads the header at the start of the open log file, raising ValueError if it is not a snapshot
+            log
+        :param log: file
+        :return: dict
+        """
+        if log.read(len(MAGIC)) != MAGIC:
+            raise ValueError("{} is not a snapshot log".format(self.__file_name))
+        length = HEADER_LENGTH.unpack(log.read(HEADER_LENGTH.size))[0]
+        return json.loads(log.read(length))
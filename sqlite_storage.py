@@ -0,0 +1,160 @@
+import sqlite3
+
+
+class SqliteStorage:
+    """
+    SqliteStorage keeps the state of a PatientManagementSystem in a SQLite database in WAL mode, with one row per
+        patient indexed by patient id, by hospital and by severity status. Every action is written as soon as it is
+        made in a transaction of its own that changes a single row, and a batch of actions in one transaction, so
+        saving an action does not depend on the number of patients. When the database does not exist yet
+        initial_hospital_state.csv is read in and written to it.
+        Every row also holds an admission number, the order the patient was admitted (or transferred) to its hospital
+        in, so the patients of a hospital are read back in the same order as they were kept in (the first admitted
+        patient with a given severity status is the one moved out when a hospital is full).
+    """
+
+    def __init__(self, database_file="hospital_state.db", initial_file="initial_hospital_state.csv", sync=False):
+        self.__database_file = database_file
+        self.__initial_file = initial_file
+        self.__sync = sync  # wait for every transaction to reach the disk instead of only the operating system
+        self.__connection = None
+        self.__new_database = False  # True if the table of patients did not exist before it was connected to
+        self.__admissions = 0  # admission number of the next patient admitted or transferred
+
+    def load(self, system):
+        """
+        load reads the patients of the hospitals of the PatientManagementSystem, system, from the database, hospital by
+            hospital through the hospital index. The ids of patients saved in hospitals that are not in the system are
+            kept from being given to new patients. If the database is new, the initial state file is read in and
+            written to it instead.
+        :param system: PatientManagementSystem
+        :return: None
+        """
+        connection = self.__connect()
+        if self.__new_database:
+            system.read_in_csv(self.__initial_file)
+            self.write_all(system)
+            return
+
+        for name in system.hospitals:
+            for patient_id, status, covid_positive in connection.execute(
+                    "SELECT patient_id, status, covid_positive FROM patients WHERE hospital = ? ORDER BY admission",
+                    (name,)):
+                system.load_patient(patient_id, name, status, covid_positive)
+        for (name,) in connection.execute("SELECT DISTINCT hospital FROM patients").fetchall():
+            if name not in system.hospitals:
+                for (patient_id,) in connection.execute("SELECT patient_id FROM patients WHERE hospital = ?", (name,)):
+                    system.reserve_patient_id(patient_id)
+        self.__admissions = connection.execute("SELECT COALESCE(MAX(admission), -1) FROM patients").fetchone()[0] + 1
+
+    def write_all(self, system):
+        """
+        write_all replaces the patients in the database with every patient of the PatientManagementSystem, system, in
+            one transaction
+        :param system: PatientManagementSystem
+        :return: None
+        """
+        connection = self.__connect()
+        rows = []
+        for name, hospital in system.hospitals.items():
+            for patient in hospital.get_patients().values():
+                info = patient.get_info()
+                rows.append((info[0], name, info[2], info[3], len(rows)))
+        with connection:
+            connection.execute("BEGIN")
+            connection.execute("DELETE FROM patients")
+            connection.executemany("INSERT INTO patients VALUES (?, ?, ?, ?, ?)", rows)
+        self.__admissions = len(rows)
+
+    def append(self, record):
+        """
+        append writes the journal record of one action to the database in a transaction of its own
+        :param record: dict
+        :return: None
+        """
+        self.__connect().execute(*self.__statement(record))
+
+    def append_many(self, records):
+        """
+        append_many writes the journal records of a batch of actions to the database in one transaction
+        :param records: List of dict
+        :return: None
+        """
+        connection = self.__connect()
+        with connection:  # commits at the end, or rolls back if a record cannot be written
+            connection.execute("BEGIN")
+            for record in records:
+                connection.execute(*self.__statement(record))
+
+    def save(self, system):
+        """
+        save does nothing, every action has already been written by append
+        :param system: PatientManagementSystem
+        :return: None
+        """
+
+    def count_patients(self, hospital_name=None, status=None):
+        """
+        count_patients counts the patients saved in the database, only those in the hospital called hospital_name
+            and/or with the severity status status if given, using the indexes instead of reading every patient
+        :param hospital_name: str or None
+        :param status: str or None
+        :return: int
+        """
+        conditions = []
+        values = []
+        if hospital_name is not None:
+            conditions.append("hospital = ?")
+            values.append(hospital_name.lower())
+        if status is not None:
+            conditions.append("status = ?")
+            values.append(status)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return self.__connect().execute("SELECT COUNT(*) FROM patients" + where, values).fetchone()[0]
+
+    def close(self):
+        """
+        close closes the connection to the database
+        :return: None
+        """
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def __connect(self):
+        """
+        __connect returns the connection to the database, opening it and making the table and indexes the first time
+        :return: sqlite3.Connection
+        """
+        if self.__connection is None:
+            # isolation_level=None: every statement outside a BEGIN is a transaction of its own. The connection may be
+            #   used by the threads of a thread-safe PatientManagementSystem, which only write one at a time.
+            connection = sqlite3.connect(self.__database_file, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous={}".format("FULL" if self.__sync else "NORMAL"))
+            self.__new_database = connection.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'patients'").fetchone()[0] == 0
+            connection.execute("CREATE TABLE IF NOT EXISTS patients (patient_id TEXT PRIMARY KEY, hospital TEXT NOT "
+                               "NULL, status TEXT NOT NULL, covid_positive TEXT NOT NULL, admission INTEGER NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS patients_by_hospital ON patients (hospital, admission)")
+            connection.execute("CREATE INDEX IF NOT EXISTS patients_by_status ON patients (status)")
+            self.__connection = connection
+        return self.__connection
+
+    def __statement(self, record):
+        """
+        __statement returns the sql statement and values that apply a journal record to the database
+        :param record: dict
+        :return: tuple of (str, tuple)
+        """
+        if record["op"] == "add":
+            self.__admissions += 1
+            return ("INSERT OR REPLACE INTO patients VALUES (?, ?, ?, ?, ?)",
+                    (record["id"], record["hospital"], record["status"], record["covid"], self.__admissions - 1))
+        if record["op"] == "transfer":
+            self.__admissions += 1
+            return ("UPDATE patients SET hospital = ?, admission = ? WHERE patient_id = ?",
+                    (record["hospital"], self.__admissions - 1, record["id"]))
+        if record["op"] == "discharge":
+            return "DELETE FROM patients WHERE patient_id = ?", (record["id"],)
+        return "UPDATE patients SET status = ? WHERE patient_id = ?", (record["status"], record["id"])
@@ -0,0 +1,290 @@
+import collections
+import contextlib
+import csv
+import gc
+from itertools import accumulate, islice
+
+# reasons a row of a state file is rejected for
+WRONG_COLUMNS = "wrong number of columns"
+INVALID_ID = "invalid patient id"
+DUPLICATE_ID = "duplicate patient id"
+UNKNOWN_HOSPITAL = "unknown hospital"
+INVALID_STATUS = "invalid severity status"
+INVALID_COVID = "invalid covid status"
+HOSPITAL_FULL = "hospital full"
+REJECT_REASONS = [WRONG_COLUMNS, INVALID_ID, DUPLICATE_ID, UNKNOWN_HOSPITAL, INVALID_STATUS, INVALID_COVID,
+                  HOSPITAL_FULL]
+# columns of a state file: the row number, Patient_ID, Hospital, Status and Covid_Positive
+STATE_COLUMNS = 5
+VALID_STATUSES = {"0", "1", "2", "3"}
+VALID_COVID = {"true", "false"}
+DEFAULT_CHUNK_ROWS = 100000
+# columns of the rejects file, followed by the columns of the rejected row as they were read
+REJECTS_HEADER = ["Line", "Reason"]
+
+
+class LoadReport:
+    """
+    LoadReport is the result of loading a state file with a StateLoader: the number of rows loaded and rejected, how
+        many were rejected for every reason and the first max_rejects rejected rows as [line number, reason, columns]
+        lists. Every rejected row is also written to the rejects file of the loader, if it has one.
+    """
+
+    def __init__(self, file_name, max_rejects=1000):
+        self.__file_name = file_name
+        self.__max_rejects = max_rejects
+        self.__loaded = 0
+        self.__rejected = 0
+        self.__reject_counts = {}  # reason -> number of rows rejected for it
+        self.__rejected_rows = []
+
+    def add_loaded(self, count):
+        """
+        add_loaded counts count more rows loaded
+        :param count: int
+        :return: None
+        """
+        self.__loaded += count
+
+    def add_rejected(self, line, reason, row):
+        """
+        add_rejected counts the row (list of columns) on line of the file as rejected for reason, keeping it if fewer
+            than max_rejects rows have been kept
+        :param line: int
+        :param reason: str
+        :param row: List of str
+        :return: None
+        """
+        self.__rejected += 1
+        self.__reject_counts[reason] = self.__reject_counts.get(reason, 0) + 1
+        if len(self.__rejected_rows) < self.__max_rejects:
+            self.__rejected_rows.append([line, reason, row])
+
+    def get_file_name(self):
+        """
+        get_file_name returns the name of the file that was loaded
+        :return: str
+        """
+        return self.__file_name
+
+    def get_loaded(self):
+        """
+        get_loaded returns the number of rows loaded
+        :return: int
+        """
+        return self.__loaded
+
+    def get_rejected(self):
+        """
+        get_rejected returns the number of rows rejected
+        :return: int
+        """
+        return self.__rejected
+
+    def get_reject_counts(self):
+        """
+        get_reject_counts returns the number of rows rejected for every reason a row was rejected for
+        :return: dict
+        """
+        return dict(self.__reject_counts)
+
+    def get_rejected_rows(self):
+        """
+        get_rejected_rows returns the first max_rejects rejected rows, in the order of the file, as [line number,
+            reason, columns] lists
+        :return: List of list
+        """
+        return list(self.__rejected_rows)
+
+    def describe(self, rows=10):
+        """
+        describe returns lines of text telling how many rows were rejected for every reason and which rows the first
+            rows rejected were
+        :param rows: int
+        :return: List of str
+        """
+        lines = ["{} of the {} rows of {} were rejected and not loaded:".format(
+            self.__rejected, self.__loaded + self.__rejected, self.__file_name)]
+        for reason in REJECT_REASONS:
+            if reason in self.__reject_counts:
+                lines.append("    {}: {} rows".format(reason, self.__reject_counts[reason]))
+        for line, reason, columns in self.__rejected_rows[:rows]:
+            lines.append("    line {}, {}: {}".format(line, reason, ",".join(columns)))
+        if self.__rejected > rows:
+            lines.append("    ... and {} more rows".format(self.__rejected - rows))
+        return lines
+
+
+class StateLoader:
+    """
+    StateLoader streams a hospital state csv file (initial_hospital_state.csv, final_hospital_state.csv or a snapshot,
+        one patient per line: the row number, Patient_ID, Hospital, Status and Covid_Positive after a header line) into
+        a PatientManagementSystem chunk_rows lines at a time, so the memory used while loading does not grow with the
+        size of the file. The file is read by one csv reader, so quoted fields may hold commas and line breaks, and
+        every row is reported by the line it starts on. Every chunk is checked as a whole with set operations and, if
+        all its rows are valid, loaded in bulk with PatientManagementSystem.load_patients. Only a chunk holding a bad
+        row is checked row by row, and these rows are rejected:
+            - rows without 5 columns, and ids that are not in the id format of the system's id allocator
+            - ids already in the system or on an earlier row of the file (the first one is loaded)
+            - hospitals that are not in the system, or that have no free beds left (the beds go to the rows in the
+                order of the file)
+            - severity statuses other than 0 - 3 and covid statuses other than true or false (in any case)
+        The rejected rows are counted in the LoadReport returned by load, with their line numbers, and written to
+        rejects_file as csv if it is given. The garbage collector is paused while loading: the patients are kept, so
+        collecting again and again as millions of them are made would only take time.
+    """
+
+    def __init__(self, chunk_rows=DEFAULT_CHUNK_ROWS, max_rejects=1000, rejects_file=None):
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1, not {}".format(chunk_rows))
+        self.__chunk_rows = chunk_rows
+        self.__max_rejects = max_rejects
+        self.__rejects_file = rejects_file
+
+    def load(self, system, file_name):
+        """
+        load loads the patients of the state file file_name into the PatientManagementSystem, system, and returns the
+            LoadReport of the rows loaded and rejected
+        :param system: PatientManagementSystem
+        :param file_name: str
+        :return: LoadReport
+        """
+        report = LoadReport(file_name, self.__max_rejects)
+        gc_enabled = gc.isenabled()
+        with open(file_name, 'r', newline='') as csv_file, \
+                open(self.__rejects_file, 'w') if self.__rejects_file is not None else contextlib.nullcontext() as out:
+            rejects = None
+            if out is not None:
+                rejects = csv.writer(out, lineterminator='\n')
+                rejects.writerow(REJECTS_HEADER)
+            reader = csv.reader(csv_file)
+            next(reader, None)  # skip header
+            gc.disable()
+            try:
+                while True:
+                    first_line = reader.line_num + 1  # line the first row of the chunk starts on
+                    rows = list(islice(reader, self.__chunk_rows))
+                    if not rows:
+                        break
+                    self.__load_chunk(system, rows, first_line, reader.line_num, report, rejects)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+        return report
+
+    def __load_chunk(self, system, rows, first_line, last_line, report, rejects):
+        """
+        __load_chunk loads the rows of a chunk that takes up lines first_line to last_line of the file, in bulk if every
+            row is valid
+        :param system: PatientManagementSystem
+        :param rows: List of list
+        :param first_line: int
+        :param last_line: int
+        :param report: LoadReport
+        :param rejects: csv writer or None
+        :return: None
+        """
+        if set(map(len, rows)) == {STATE_COLUMNS}:
+            columns = [list(column) for column in zip(*rows)][1:]
+            if self.__chunk_valid(system, *columns):
+                system.load_patients(*columns)
+                report.add_loaded(len(rows))
+                return
+        if last_line - first_line + 1 == len(rows):
+            lines = range(first_line, last_line + 1)  # one line per row
+        else:
+            # some rows have quoted line breaks, every row starts on the line after the last line of the row before
+            lines = list(accumulate([first_line] + [1 + sum(map(self.__count_line_breaks, row)) for row in rows[:-1]]))
+        self.__load_rows(system, rows, lines, report, rejects)
+
+    @staticmethod
+    def __count_line_breaks(text):
+        """
+        __count_line_breaks returns the number of line breaks ("\n", "\r\n" or "\r") in text, as the csv reader counts
+            them
+        :param text: str
+        :return: int
+        """
+        return text.count("\n") + text.count("\r") - text.count("\r\n")
+
+    @staticmethod
+    def __chunk_valid(system, patient_ids, hospital_names, statuses, covid_positives):
+        """
+        __chunk_valid checks whether every row of a chunk, given as columns, can be loaded into the system as it is
+        :param system: PatientManagementSystem
+        :param patient_ids: List of str
+        :param hospital_names: List of str
+        :param statuses: List of str
+        :param covid_positives: List of str
+        :return: Bool
+        """
+        if not set(statuses) <= VALID_STATUSES or not set(covid_positives) <= VALID_COVID:
+            return False
+        unique_ids = set(patient_ids)
+        if len(unique_ids) < len(patient_ids) or "" in unique_ids:
+            return False
+        free_beds = {}  # lower case hospital name -> free beds left after the chunk
+        for name, count in collections.Counter(hospital_names).items():
+            hospital = system.hospitals.get(name.lower())
+            if hospital is None:
+                return False
+            free_beds[name.lower()] = free_beds.get(name.lower(), hospital.available_beds()) - count
+            if free_beds[name.lower()] < 0:
+                return False
+        return not system.check_patient_ids(patient_ids)
+
+    @staticmethod
+    def __load_rows(system, rows, lines, report, rejects):
+        """
+        __load_rows checks the rows of a chunk, starting on lines of the file, one by one, loads the valid rows in bulk
+            and rejects the others
+        :param system: PatientManagementSystem
+        :param rows: List of list
+        :param lines: List of int or range
+        :param report: LoadReport
+        :param rejects: csv writer or None
+        :return: None
+        """
+        # ids already in the system or not in its id format
+        checked = system.check_patient_ids([row[1] for row in rows if len(row) == STATE_COLUMNS])
+        seen = set()
+        free_beds = {}  # lower case hospital name -> free beds left
+        loaded = [[], [], [], []]  # columns of the rows loaded
+        for line, row in zip(lines, rows):
+            if not row:
+                continue  # blank line
+            reason = None
+            if len(row) != STATE_COLUMNS:
+                reason = WRONG_COLUMNS
+            else:
+                patient_id, hospital_name, status, covid_positive = row[1], row[2], row[3], row[4].lower()
+                name = hospital_name.lower()
+                if not patient_id:
+                    reason = INVALID_ID
+                elif patient_id in checked:
+                    reason = checked[patient_id]
+                elif patient_id in seen:
+                    reason = DUPLICATE_ID
+                elif name not in system.hospitals:
+                    reason = UNKNOWN_HOSPITAL
+                elif status not in VALID_STATUSES:
+                    reason = INVALID_STATUS
+                elif covid_positive not in VALID_COVID:
+                    reason = INVALID_COVID
+                else:
+                    if name not in free_beds:
+                        free_beds[name] = system.hospitals[name].available_beds()
+                    if free_beds[name] <= 0:
+                        reason = HOSPITAL_FULL
+            if reason is not None:
+                report.add_rejected(line, reason, row)
+                if rejects is not None:
+                    rejects.writerow([line, reason] + row)
+                continue
+            seen.add(patient_id)
+            free_beds[name] -= 1
+            for column, value in zip(loaded, [patient_id, hospital_name, status, covid_positive]):
+                column.append(value)
+        if loaded[0]:
+            system.load_patients(*loaded)
+            report.add_loaded(len(loaded[0]))
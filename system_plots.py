@@ -4,57 +4,71 @@ This program will run a simulation for 90 days using the SimulateData class and
 number of covid patients at each hospital in the recorded states and a scatter plot showing the severity status of all
 patients at the hospitals over the recorded states.
 """
-import csv
-import matplotlib.pyplot as plt
-import numpy as np
+import glob
+import multiprocessing
+import os
+import re
 from simulate_data import SimulateData
+from snapshot_log import SnapshotLog
+
+# networks with more hospitals than this are drawn with one plot call for all hospitals and without a legend
+MAX_LEGEND_HOSPITALS = 10
+# charts with more bars or points than this are drawn as a heatmap of the counts instead, so the time taken to draw them
+#   does not grow with the number of patients, hospitals and states
+MAX_DRAWN_MARKERS = 20000
+# charts of more states than this get tick labels picked by matplotlib instead of one per state
+MAX_STATE_TICKS = 30
 
 
 class SystemPlots:
-    def __init__(self):
-        self.simulation = SimulateData()
-        self.hospitals = None
+    def __init__(self, network=None, snapshot_file=None, snapshot_every=10, output_dir=None, seed=None):
+        # the states are saved to and read from the snapshot log snapshot_file if it is given, otherwise to and from
+        #   the hospital state csv files
+        # with output_dir the plots are drawn with the non-interactive Agg backend and saved as png files in that
+        #   directory instead of being shown in a window
+        # seed is the seed of the simulation's own random number generator (see SimulateData)
+        self.output_dir = output_dir
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+        self.snapshot_log = SnapshotLog(snapshot_file) if snapshot_file is not None else None
+        self.simulation = SimulateData(network=network, snapshot_every=snapshot_every, snapshot_log=self.snapshot_log,
+                                       seed=seed)
+        self.aggregates = None  # SnapshotAggregates of the states read in
 
-    @staticmethod
-    def read_in_csv():
+    def read_in_csv(self):
         """
-        read_in_csv reads in all the day states created from the simulation of the patient management system
-        :return: dict
+        read_in_csv reads in all the day states created from the simulation of the patient management system, every
+            hospital_state_<number>.csv file in the order of their numbers, counting the patients of every hospital in
+            one pass over each file
+        :return: SnapshotAggregates
         """
-        files = []
-        for file in range(1, 10):
-            file_name = 'hospital_state_0' + str(file) + '.csv'
-            files.append(file_name)
+        from snapshot_aggregates import SnapshotAggregates  # loads NumPy, only needed once something is plotted
+
+        files = [name for name in glob.glob('hospital_state_*.csv') if name[len('hospital_state_'):-4].isdigit()]
+        files.sort(key=lambda name: int(name[len('hospital_state_'):-4]))
 
-        # keep track of patients per hospital for each state file
-        hospitals = {"kingston": [], "hamilton": [], "toronto": []}
+        # the hospitals of the network come first, a hospital that is not in the network gets no patients in earlier
+        #   states
+        aggregates = SnapshotAggregates(self.simulation.get_network().get_names())
         for file in files:
-            # hold the patients for 1 day state
-            kingston_patients = []
-            hamilton_patients = []
-            toronto_patients = []
             try:
-                with open(file, 'r') as csv_file:
-                    patient_reader = csv.reader(csv_file, delimiter=',')
-                    next(patient_reader)  # skip header
-                    for row in patient_reader:
-                        # append patients for the day state to the correct hospital
-                        if row[2] == "kingston":
-                            kingston_patients.append([row[1], row[3], row[4]])
-                        elif row[2] == "hamilton":
-                            hamilton_patients.append([row[1], row[3], row[4]])
-                        else:
-                            toronto_patients.append([row[1], row[3], row[4]])
-
-                # add patients to the dict
-                hospitals["kingston"].append(kingston_patients)
-                hospitals["hamilton"].append(hamilton_patients)
-                hospitals["toronto"].append(toronto_patients)
+                aggregates.add_csv_file(file)
             except:
                 print("There was a problem opening {} for reading, therefore it has not been loaded"
                       " into the program.".format(file))
 
-        return hospitals
+        return aggregates
+
+    def read_in_log(self):
+        """
+        read_in_log reads in all the day states saved to the snapshot log, in the same format as read_in_csv
+        :return: SnapshotAggregates
+        """
+        from snapshot_aggregates import SnapshotAggregates
+
+        aggregates = SnapshotAggregates(self.simulation.get_network().get_names())
+        aggregates.add_log(self.snapshot_log)
+        return aggregates
 
     def get_hospital_covid_nums(self, hospital):
         """
@@ -63,109 +77,260 @@ class SystemPlots:
         :param hospital: str
         :return: List of int
         """
-        covid_nums = []
-        for day in self.hospitals[hospital]:
-            count_covid = 0
-            for patient in day:
-                if patient[2] == 'true':
-                    count_covid += 1
-            covid_nums.append(count_covid)
-        return covid_nums
+        position = self.aggregates.get_hospitals().index(hospital.lower())
+        return self.aggregates.get_covid_counts()[:, position].tolist()
 
     def get_severity_states(self, hospital):
         """
         get_severity_states will return x (sev_days) and y (sev_states) values for a scatter plot where the x values
-            represent the state days and the y values represent the severity statuses for the hospital.
+            represent the state days and the y values represent the severity statuses for the hospital, one pair per
+            patient.
         :param hospital: str
         :return: list of [list of int, list of int]
         """
-        sev_days = []
-        sev_states = []
-        for day in range(len(self.hospitals[hospital])):
-            status = []
-            for patient in self.hospitals[hospital][day]:
-                sev_states.append(int(patient[1]))
-                sev_days.append(day + 1)
-        return [sev_days, sev_states]
+        import numpy as np
+
+        position = self.aggregates.get_hospitals().index(hospital.lower())
+        counts = self.aggregates.get_severity_counts()[:, position, :]  # states x severity status
+        days, states = np.indices(counts.shape)
+        counts = counts.ravel()
+        return [np.repeat(days.ravel() + 1, counts).tolist(), np.repeat(states.ravel(), counts).tolist()]
 
     def plot_hospital_covid_patients(self):
         """
         plot_hospital_covid_patients will plot a bar chart that shows the number of patients with covid in each of the
-            3 hospitals in each of the states generated from SimulateData() class
+            hospitals in each of the states generated from SimulateData() class. With more than MAX_DRAWN_MARKERS bars
+            a heatmap of the number of patients of every hospital in every state is drawn instead.
         :return: None
         """
-        # get number of patients with covid at each hospital
-        kingston_covid_numbers = self.get_hospital_covid_nums('kingston')
-        hamilton_covid_numbers = self.get_hospital_covid_nums('hamilton')
-        toronto_covid_numbers = self.get_hospital_covid_nums('toronto')
+        # matplotlib and NumPy are only loaded once something is plotted, they are slow to import
+        plt = self.__pyplot()
+        from matplotlib.collections import PolyCollection
+        import numpy as np
+
+        # get number of patients with covid at each hospital, one row per hospital
+        names = self.aggregates.get_hospitals()
+        covid_numbers = self.aggregates.get_covid_counts().T
+        states = covid_numbers.shape[1]
 
         # plot bar graph
-        x = np.arange(1, 10)  # states
-        width = 0.2  # width of bars
+        x = np.arange(1, states + 1)  # states
+        width = 0.6 / max(len(names), 1)  # width of bars
+        offsets = (np.arange(len(names)) - (len(names) - 1) / 2) * width
         plt.figure(figsize=(12, 4))
         # making each bar so they fit side by side
-        plt.bar(x - width, kingston_covid_numbers, width, label='Kingston')
-        plt.bar(x, hamilton_covid_numbers, width, label='Hamilton')
-        plt.bar(x + width, toronto_covid_numbers, width, label='Toronto')
+        if covid_numbers.size > MAX_DRAWN_MARKERS:
+            # one image of the counts, whatever the number of hospitals and states
+            plt.imshow(covid_numbers, aspect="auto", interpolation="nearest", cmap="viridis",
+                       extent=(0.5, states + 0.5, len(names) + 0.5, 0.5))
+            plt.colorbar(label="Number of Patients")
+        elif len(names) <= MAX_LEGEND_HOSPITALS:
+            for row, name in enumerate(names):
+                plt.bar(x + offsets[row], covid_numbers[row], width, label=name.capitalize())
+            plt.legend()
+        else:
+            # all bars as one collection of rectangles instead of one artist per bar, bars of 0 patients are left out
+            left = (x[np.newaxis, :] + offsets[:, np.newaxis]).ravel() - width / 2
+            heights = covid_numbers.ravel()
+            colours = plt.cm.viridis(np.repeat(np.linspace(0, 1, len(names)), states))
+            drawn = heights > 0
+            left, heights, colours = left[drawn], heights[drawn], colours[drawn]
+            bottom = np.zeros(len(left))
+            corners = np.stack([np.column_stack([left, bottom]), np.column_stack([left, heights]),
+                                np.column_stack([left + width, heights]), np.column_stack([left + width, bottom])], axis=1)
+            axes = plt.gca()
+            axes.add_collection(PolyCollection(corners, facecolors=colours))
+            axes.set_xlim(0.5, states + 0.5)
+            axes.set_ylim(0, max(heights.max(initial=0), 1) * 1.05)
 
-        plt.legend()
-        plt.xticks(x, x)
+        if states <= MAX_STATE_TICKS:
+            plt.xticks(x, x)
         plt.xlabel("States")
-        plt.ylabel("Number of Patients")
-        plt.locator_params(axis="y", integer=True)
-        plt.title("Bar chart showing the number of patients with COVID at \n3 hospitals over 9 day states")
-        plt.show()
+        if covid_numbers.size > MAX_DRAWN_MARKERS:
+            plt.ylabel("Hospitals")
+        else:
+            plt.ylabel("Number of Patients")
+            plt.locator_params(axis="y", integer=True)
+        plt.title("{} showing the number of patients with COVID at \n{} hospitals over {} day states".format(
+            "Heatmap" if covid_numbers.size > MAX_DRAWN_MARKERS else "Bar chart", len(names), states))
+        self.__show("covid_patients.png")
 
     def severity_scatter_plot(self):
         """
         severity_scatter_plot will plot a scatter plot for the severity status of all patients in each of the saved
-            states differentiated by hospital
+            states differentiated by hospital. With more than MAX_DRAWN_MARKERS points a heatmap of the number of
+            patients of every severity status in every state (over all hospitals) is drawn instead.
         :return: None
         """
-        # get all the severity statuses for each hospital
-        kingston_statuses = self.get_severity_states('kingston')
-        hamilton_statuses = self.get_severity_states('hamilton')
-        toronto_statuses = self.get_severity_states('toronto')
+        plt = self.__pyplot()  # loaded once something is plotted
+        import numpy as np
+
+        # the (state, severity status) pairs that hold patients in each hospital, patients with the same pair are drawn
+        #   on the same spot so one point is drawn per pair instead of per patient
+        names = self.aggregates.get_hospitals()
+        counts = self.aggregates.get_severity_counts()  # states x hospitals x severity status
+        states = counts.shape[0]
+        aggregated = np.count_nonzero(counts) > MAX_DRAWN_MARKERS
 
         # plot the scatter plot
         plt.figure(figsize=(12, 4))
-        plt.scatter(kingston_statuses[0], kingston_statuses[1], label="Kingston")
-        plt.scatter(hamilton_statuses[0], hamilton_statuses[1], label="Hamilton")
-        plt.scatter(toronto_statuses[0], toronto_statuses[1], label="Toronto")
-        x = np.arange(1, 10)  # states
-        plt.xticks(x)
-        plt.yticks([1, 2, 3])
-        plt.legend()
+        if aggregated:
+            # one image of the number of patients of every severity status in every state
+            plt.imshow(counts.sum(axis=1).T, aspect="auto", interpolation="nearest", cmap="viridis", origin="lower",
+                       extent=(0.5, states + 0.5, -0.5, 3.5))
+            plt.colorbar(label="Number of Patients")
+        elif len(names) <= MAX_LEGEND_HOSPITALS:
+            for row, name in enumerate(names):
+                sev_days, sev_states = np.nonzero(counts[:, row, :])
+                plt.scatter(sev_days + 1, sev_states, label=name.capitalize())
+            plt.legend()
+        else:
+            # all hospitals in one call, coloured by their position in the network
+            sev_days, rows, sev_states = np.nonzero(counts)
+            plt.scatter(sev_days + 1, sev_states, c=rows, cmap="viridis")
+        x = np.arange(1, states + 1)  # states
+        if states <= MAX_STATE_TICKS:
+            plt.xticks(x)
+        plt.yticks([0, 1, 2, 3] if aggregated else [1, 2, 3])
         plt.xlabel("States")
         plt.ylabel("Severity Status")
-        plt.title("Scatter plot showing the severity of all patients in \neach of the hospitals over the 9 day states")
-        plt.show()
+        if aggregated:
+            plt.title("Heatmap showing the severity of all patients in \nthe {} hospitals over the {} day "
+                      "states".format(len(names), states))
+        else:
+            plt.title("Scatter plot showing the severity of all patients in \neach of the hospitals over the 9 day "
+                      "states")
+        self.__show("severity.png")
 
-    def run_plots(self):
+    def save_hospital_charts(self, processes=None):
         """
-        run_plots will start the simulation of the hospital and generate plots for the 9 collected states
+        save_hospital_charts saves a chart set for every hospital to hospital_<name>.png in the output directory, the
+            number of covid positive patients and the number of patients of every severity status in every state,
+            rendered across processes worker processes (all cores by default, 1 renders them in this process)
+        :param processes: int or None
+        :return: List of str
+        """
+        covid_numbers = self.aggregates.get_covid_counts()
+        severity_counts = self.aggregates.get_severity_counts()
+        tasks = [(os.path.join(self.output_dir, "hospital_{}.png".format(re.sub(r"\W+", "_", name))), name,
+                  covid_numbers[:, row], severity_counts[:, row, :])
+                 for row, name in enumerate(self.aggregates.get_hospitals())]
+        return render_charts(render_hospital_charts, tasks, processes)
+
+    def run_plots(self, simulate=True, per_hospital=False, processes=None):
+        """
+        run_plots will start the simulation of the hospital and generate plots for the 9 collected states. With
+            simulate=False the state files already in the working directory are plotted instead. With an output
+            directory, per_hospital=True also saves the chart set of every hospital (see save_hospital_charts).
+        :param simulate: Bool
+        :param per_hospital: Bool
+        :param processes: int or None
         :return: None
         """
         # start simulation to generate the state files
-        self.simulation.start_simulation()
+        if simulate:
+            self.simulation.start_simulation()
 
         # read in the state files
-        self.hospitals = self.read_in_csv()
+        if self.snapshot_log is not None:
+            self.snapshot_log.close()  # write the buffered states
+            self.aggregates = self.read_in_log()
+        else:
+            self.aggregates = self.read_in_csv()
 
         # make the plots
         self.plot_hospital_covid_patients()
         self.severity_scatter_plot()
+        if per_hospital and self.output_dir is not None:
+            self.save_hospital_charts(processes)
+
+    def __pyplot(self):
+        """
+        __pyplot imports and returns matplotlib.pyplot, selecting the non-interactive Agg backend when the plots are
+            saved to the output directory
+        :return: module
+        """
+        if self.output_dir is not None:
+            import matplotlib
+            matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        return plt
+
+    def __show(self, file_name):
+        """
+        __show shows the current figure, or saves it to file_name in the output directory and closes it
+        :param file_name: str
+        :return: None
+        """
+        import matplotlib.pyplot as plt
+        if self.output_dir is None:
+            plt.show()
+        else:
+            plt.savefig(os.path.join(self.output_dir, file_name))
+            plt.close()
+
+
+def render_charts(render, tasks, processes=None):
+    """
+    render_charts calls render on every task across processes worker processes (all cores by default, 1 renders them
+        in this process) and returns the results in the order of the tasks. render must be a module level function so
+        it can be sent to the workers.
+    :param render: function
+    :param tasks: List
+    :param processes: int or None
+    :return: List
+    """
+    if processes == 1:
+        return list(map(render, tasks))
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(render, tasks)
+
+
+def render_hospital_charts(task):
+    """
+    render_hospital_charts saves the chart set of one hospital with the Agg backend: a bar chart of its covid positive
+        patients and stacked bars of its patients of every severity status, in every state
+    :param task: tuple of (str, str, numpy array of int, numpy array of int) with the file name, the hospital name, the
+        covid counts of every state and the severity counts (states x 4) of every state
+    :return: str
+    """
+    file_name, name, covid_numbers, severity_counts = task
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    x = np.arange(1, len(covid_numbers) + 1)  # states
+    figure, (covid_axes, severity_axes) = plt.subplots(2, 1, figsize=(12, 6), sharex=True)
+    covid_axes.bar(x, covid_numbers, 0.8)
+    covid_axes.set_ylabel("COVID Patients")
+    bottom = np.zeros(len(x), dtype=np.int64)
+    for status in range(severity_counts.shape[1]):
+        severity_axes.bar(x, severity_counts[:, status], 0.8, bottom=bottom, label="Status {}".format(status))
+        bottom = bottom + severity_counts[:, status]
+    severity_axes.set_ylabel("Patients")
+    severity_axes.set_xlabel("States")
+    if len(x) <= MAX_STATE_TICKS:
+        severity_axes.set_xticks(x)
+    for axes in [covid_axes, severity_axes]:
+        axes.locator_params(axis="y", integer=True)
+    severity_axes.legend()
+    figure.suptitle("{} over {} day states".format(name.capitalize(), len(x)))
+    figure.savefig(file_name)
+    plt.close(figure)
+    return file_name
 
 
 def main():
     """
     This program will first run a simulation of 90 days and generate the hospital state files which are then used
-        to plot the charts. Although Line 20 in this file can be changed to use any other hospital state files
-        previously generated!
+        to plot the charts. Although run_plots(simulate=False) (or python cli.py plot --existing) plots the hospital
+        state files previously generated instead!
     :return: None
     """
     plots = SystemPlots()
     plots.run_plots()
 
 
-main()
+if __name__ == "__main__":
+    main()